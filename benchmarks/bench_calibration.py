@@ -0,0 +1,66 @@
+"""Micro-benchmark of the per-frame calibration in `get_spectrum()`.
+
+Compares the original implementation, which recalculated the wavelength axis
+and scaled the full frame for every spectrum, with the cached calibration.
+Runs without hardware by feeding the driver a fixed raw frame.
+
+Usage: python benchmarks/bench_calibration.py
+"""
+
+import numpy as np
+from timing import per_frame_time
+
+from ocean_optics.usb2000plus import (
+    NUM_DARK_PIXELS,
+    NUM_PIXELS,
+    DeviceConfiguration,
+    OceanOpticsUSB2000Plus,
+)
+
+CONFIG = DeviceConfiguration(
+    serial_number="USB2+F00000",
+    wavelength_calibration_coefficients=[339.1, 0.3728, -1.58e-5, -1.93e-9],
+    stray_light_constant=0.0,
+    nonlinearity_correction_coefficients=[1.0] + 7 * [0.0],
+    polynomial_order_nonlinearity_calibration=7,
+    optical_bench="",
+    device_configuration="",
+    saturation_level=np.uint16(62_500),
+)
+
+RAW_FRAME = np.random.default_rng(0).integers(0, 60_000, NUM_PIXELS, dtype=np.uint16)
+
+
+def naive_get_spectrum() -> tuple[np.ndarray, np.ndarray]:
+    """The original calibration, evaluated for every spectrum."""
+    data = RAW_FRAME
+    x = np.arange(len(data))
+    c = CONFIG.wavelength_calibration_coefficients
+    x = c[0] + c[1] * x + c[2] * x**2 + c[3] * x**3
+    data = data * (65535 / CONFIG.saturation_level)
+    return x[20:], data[20:]
+
+
+def make_device() -> OceanOpticsUSB2000Plus:
+    """Create a driver instance which does not talk to hardware."""
+    device = OceanOpticsUSB2000Plus.__new__(OceanOpticsUSB2000Plus)
+    device.config = CONFIG
+    device.get_raw_spectrum = lambda: RAW_FRAME  # type: ignore[method-assign]
+    return device
+
+
+def main() -> None:
+    device = make_device()
+    out = np.empty(NUM_PIXELS - NUM_DARK_PIXELS)
+
+    results = {
+        "naive": per_frame_time(naive_get_spectrum),
+        "cached": per_frame_time(device.get_spectrum),
+        "cached, out=": per_frame_time(lambda: device.get_spectrum(out=out)),
+    }
+    for name, seconds in results.items():
+        print(f"{name:>14s}: {seconds * 1e6:8.2f} µs per frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Benchmark of the nonlinearity and stray light correction.
+
+Measures the per-frame cost of calibrating a raw frame with and without the
+corrections and compares it to the frame period at the shortest integration
+time of the device, which is the highest frame rate the corrections need to
+keep up with.
+
+Usage: python benchmarks/bench_corrections.py
+"""
+
+import numpy as np
+from timing import per_frame_time
+
+from ocean_optics.simulation import SimulatedDevice
+from ocean_optics.usb2000plus import NUM_DARK_PIXELS, NUM_PIXELS, OceanOpticsUSB2000Plus
+
+# shortest integration time of the USB2000+, in seconds
+MIN_FRAME_PERIOD = 0.001
+
+
+def main() -> None:
+    device = OceanOpticsUSB2000Plus(SimulatedDevice(latency_factor=0), use_cache=False)
+    raw = device.get_raw_spectrum().copy()
+    out = np.empty(NUM_PIXELS - NUM_DARK_PIXELS)
+
+    results = {}
+    for name, nonlinearity, stray_light in [
+        ("none", False, False),
+        ("nonlinearity", True, False),
+        ("stray light", False, True),
+        ("both", True, True),
+    ]:
+        device.set_corrections(nonlinearity, stray_light)
+        results[name] = per_frame_time(
+            lambda: device.calibrate(raw, out=out), number=5_000
+        )
+
+    print(f"frame period at 1 ms integration time: {MIN_FRAME_PERIOD * 1e6:.0f} µs")
+    for name, seconds in results.items():
+        print(
+            f"{name:>13s}: {seconds * 1e6:6.2f} µs per frame "
+            f"({seconds / MIN_FRAME_PERIOD:.1%} of frame period)"
+        )
+
+
+if __name__ == "__main__":
+    main()
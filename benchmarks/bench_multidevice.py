@@ -0,0 +1,49 @@
+"""Benchmark of concurrent acquisition from multiple devices.
+
+Measures the aggregate frame rate of the multi-device acquisition engine for
+an increasing number of simulated devices. The simulated devices wait for the
+integration time without holding the GIL, like PyUSB during a transfer, so the
+aggregate frame rate should scale with the number of devices.
+
+Usage: python benchmarks/bench_multidevice.py
+"""
+
+import time
+
+from ocean_optics.acquisition import MultiAcquisitionEngine
+from ocean_optics.simulation import SimulatedDevice
+from ocean_optics.usb2000plus import OceanOpticsUSB2000Plus
+
+INTEGRATION_TIME = 5_000
+DURATION = 2.0
+
+
+def aggregate_frame_rate(num_devices: int) -> float:
+    """Return the total number of frames per second of all devices."""
+    devices = [
+        OceanOpticsUSB2000Plus(
+            SimulatedDevice(serial_number=f"SIM{idx:05d}"), use_cache=False
+        )
+        for idx in range(num_devices)
+    ]
+    for device in devices:
+        device.set_integration_time(INTEGRATION_TIME)
+    with MultiAcquisitionEngine(devices) as engine:
+        time.sleep(DURATION)
+        frames = sum(e.latest_sequence + 1 for e in engine.engines)
+    return frames / DURATION
+
+
+def main() -> None:
+    print(f"integration time: {INTEGRATION_TIME / 1000:.0f} ms")
+    single = aggregate_frame_rate(1)
+    for num_devices in 1, 2, 4, 8:
+        rate = single if num_devices == 1 else aggregate_frame_rate(num_devices)
+        print(
+            f"{num_devices} device(s): {rate:7.1f} frames/s "
+            f"(scaling {rate / single:.2f} of {num_devices})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Benchmark of the smoothing filters.
+
+Compares the per-frame cost of the smoothing filters, which precompute their
+weights, to naive implementations, which smooth each pixel separately and
+calculate its weights for every frame, on calibrated spectra of a USB2000+.
+The times are compared to the frame period at the shortest integration time
+of the device, i.e. 1,000 frames per second.
+
+Usage: python benchmarks/bench_smoothing.py
+"""
+
+import functools
+from collections.abc import Callable
+
+import numpy as np
+from timing import per_frame_time
+
+from ocean_optics import smoothing
+from ocean_optics.usb2000plus import NUM_DARK_PIXELS, NUM_PIXELS
+
+# shortest integration time of the USB2000+, in seconds
+MIN_FRAME_PERIOD = 0.001
+SIZE = NUM_PIXELS - NUM_DARK_PIXELS
+
+
+def naive_boxcar(intensities: np.ndarray, width: int) -> np.ndarray:
+    """Average each pixel with the available pixels within `width`."""
+    out = np.empty(len(intensities))
+    for pixel in range(len(intensities)):
+        out[pixel] = intensities[max(pixel - width, 0) : pixel + width + 1].mean()
+    return out
+
+
+def naive_savitzky_golay(
+    intensities: np.ndarray, window: int, order: int
+) -> np.ndarray:
+    """Fit a polynomial to the window of each pixel."""
+    half = window // 2
+    size = len(intensities)
+    x = np.arange(window)
+    out = np.empty(size)
+    for pixel in range(size):
+        # the first and last pixels use the first and last window
+        start = min(max(pixel - half, 0), size - window)
+        coefficients = np.polyfit(x, intensities[start : start + window], order)
+        out[pixel] = np.polyval(coefficients, pixel - start)
+    return out
+
+
+def naive_gaussian(
+    intensities: np.ndarray, sigma: float, truncate: float = 4.0
+) -> np.ndarray:
+    """Weigh the available pixels within the window of each pixel."""
+    half = max(int(np.ceil(truncate * sigma)), 1)
+    out = np.empty(len(intensities))
+    for pixel in range(len(intensities)):
+        start = max(pixel - half, 0)
+        window = intensities[start : pixel + half + 1]
+        weights = np.exp(-0.5 * ((np.arange(len(window)) + start - pixel) / sigma) ** 2)
+        out[pixel] = weights @ window / weights.sum()
+    return out
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    intensities = rng.normal(1000, 10, SIZE)
+    buffer = intensities.copy()
+
+    filters: list[tuple[str, smoothing.Boxcar | smoothing.Smoother, Callable]] = [
+        (
+            "boxcar 5",
+            smoothing.Boxcar(2, SIZE),
+            functools.partial(naive_boxcar, width=2),
+        ),
+        (
+            "boxcar 21",
+            smoothing.Boxcar(10, SIZE),
+            functools.partial(naive_boxcar, width=10),
+        ),
+        (
+            "savgol 11,3",
+            smoothing.savitzky_golay(11, 3),
+            functools.partial(naive_savitzky_golay, window=11, order=3),
+        ),
+        (
+            "savgol 51,3",
+            smoothing.savitzky_golay(51, 3),
+            functools.partial(naive_savitzky_golay, window=51, order=3),
+        ),
+        (
+            "gaussian 2",
+            smoothing.gaussian(2.0),
+            functools.partial(naive_gaussian, sigma=2.0),
+        ),
+    ]
+
+    print(f"frame period at 1 ms integration time: {MIN_FRAME_PERIOD * 1e6:.0f} µs")
+    for name, smoother, naive in filters:
+        np.testing.assert_allclose(
+            smoother.apply(intensities), naive(intensities), rtol=1e-9
+        )
+        naive_time = per_frame_time(lambda naive=naive: naive(intensities), number=1)
+        fast_time = per_frame_time(
+            lambda smoother=smoother: smoother.apply(intensities, out=buffer),
+            number=2_000,
+        )
+        print(
+            f"{name:>12s}: naive {naive_time * 1e6:9.1f} µs, "
+            f"precomputed {fast_time * 1e6:6.1f} µs per frame "
+            f"({fast_time / MIN_FRAME_PERIOD:.1%} of frame period, "
+            f"{naive_time / fast_time:.0f}x faster)"
+        )
+
+
+if __name__ == "__main__":
+    main()
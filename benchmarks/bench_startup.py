@@ -0,0 +1,46 @@
+"""Benchmark of opening the device with and without the configuration cache.
+
+Uses a simulated device with a fixed latency for every USB transfer, so that
+the number of round-trips to the device dominates the startup time, like it
+does with real hardware.
+
+Usage: python benchmarks/bench_startup.py
+"""
+
+import os
+import statistics
+import tempfile
+
+from ocean_optics.simulation import SimulatedDevice
+from ocean_optics.usb2000plus import OceanOpticsUSB2000Plus
+
+TRANSFER_LATENCY = 0.001
+REPEAT = 20
+
+
+def startup_time(refresh_cache: bool) -> float:
+    """Return the median startup time in seconds."""
+    times = []
+    for _ in range(REPEAT):
+        device = OceanOpticsUSB2000Plus(
+            SimulatedDevice(transfer_latency=TRANSFER_LATENCY),
+            refresh_cache=refresh_cache,
+        )
+        times.append(device.startup_time)
+    return statistics.median(times)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["OCEAN_OPTICS_CACHE_DIR"] = cache_dir
+        results = {
+            "cold": startup_time(refresh_cache=True),
+            "warm": startup_time(refresh_cache=False),
+        }
+    print(f"transfer latency: {TRANSFER_LATENCY * 1e3:.1f} ms")
+    for name, seconds in results.items():
+        print(f"{name:>5s} start: {seconds * 1e3:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
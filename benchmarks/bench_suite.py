@@ -0,0 +1,276 @@
+"""Benchmark suite of the driver, processing and export hot paths.
+
+Runs against a virtual device and writes the results to a JSON file, so that
+they can be compared between commits. Each benchmark reports the best and the
+median time per call in seconds. The simulated device normally generates a
+new random spectrum for every request, so the benchmarks replay a fixed
+spectrum as fast as possible instead, which leaves only the cost of the driver
+itself. Use --replay to benchmark on previously measured spectra.
+
+The GUI benchmark uses the offscreen Qt platform and is skipped if Qt is not
+available.
+
+Usage: python benchmarks/bench_suite.py [--output FILE] [--compare FILE]
+                                      [--replay FILE]
+"""
+
+import argparse
+import datetime
+import io
+import json
+import os
+import pathlib
+import platform
+import subprocess
+import tempfile
+import timeit
+from collections.abc import Callable
+
+import numpy as np
+
+from ocean_optics.bands import Band, BandChannels
+from ocean_optics.export import write_spectra, write_time_series
+from ocean_optics.peaks import PeakFinder, PeakTracker
+from ocean_optics.pipeline import Pipeline, parse_stages
+from ocean_optics.replay import ReplayDevice
+from ocean_optics.simulation import EmissionLine, SimulatedDevice
+from ocean_optics.spectroscopy import SpectroscopyExperiment
+from ocean_optics.usb2000plus import NUM_DARK_PIXELS, NUM_PIXELS, OceanOpticsUSB2000Plus
+
+REPEAT = 5
+INTEGRATE_COUNTS = (1, 10, 100)
+TIME_SERIES_LENGTH = 100
+NUM_PEAKS = 40
+NUM_BANDS = 8
+PIPELINE = "baseline=340-360 boxcar=2 normalize"
+GUI_UPDATES = 20
+DEFAULT_OUTPUT = pathlib.Path(__file__).parent / "results" / "latest.json"
+
+
+# The recording or CSV file of spectra to replay, set by the --replay option.
+replay_file: pathlib.Path | None = None
+
+
+def open_device(lines: list[EmissionLine] | None = None) -> OceanOpticsUSB2000Plus:
+    """Open a device which replays spectra as fast as possible.
+
+    Args:
+        lines: the emission lines of a simulated spectrum to replay, if no
+            replay file was given.
+    """
+    if replay_file is not None and lines is None:
+        replay = ReplayDevice.from_file(replay_file, speed=None)
+    else:
+        simulated = OceanOpticsUSB2000Plus(
+            SimulatedDevice(lines=lines, latency_factor=0, seed=0), use_cache=False
+        )
+        frames = simulated.get_raw_spectrum()[np.newaxis]
+        replay = ReplayDevice(frames, simulated.config, speed=None)
+    return OceanOpticsUSB2000Plus(replay, use_cache=False)
+
+
+def measure(func: Callable[[], object], number: int | None = None) -> dict[str, float]:
+    """Return the best and median time per call in seconds.
+
+    Args:
+        func: the function to benchmark.
+        number: the number of calls in each repeat. By default, enough calls to
+            take at least 0.2 seconds.
+    """
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    times = np.array(timer.repeat(repeat=REPEAT, number=number)) / number
+    return {"min": float(times.min()), "median": float(np.median(times))}
+
+
+def driver_benchmarks() -> dict[str, dict[str, float]]:
+    device = open_device()
+    raw = np.empty(NUM_PIXELS, dtype=np.uint16)
+    out = np.empty(NUM_PIXELS - NUM_DARK_PIXELS)
+    results = {
+        "raw_spectrum": measure(device.get_raw_spectrum),
+        "raw_spectrum_out": measure(lambda: device.get_raw_spectrum(out=raw)),
+        "calibrate": measure(lambda: device.calibrate(raw, out=out)),
+        "spectrum": measure(lambda: device.get_spectrum(out=out)),
+    }
+    device.set_corrections(nonlinearity=True, stray_light=True)
+    results["spectrum_corrected"] = measure(lambda: device.get_spectrum(out=out))
+    return results
+
+
+def integrate_benchmarks() -> dict[str, dict[str, float]]:
+    experiment = SpectroscopyExperiment(open_device(), use_cache=False)
+    results = {}
+    for count in INTEGRATE_COUNTS:
+
+        def integrate(count: int = count) -> None:
+            for _ in experiment.integrate_spectrum(count):
+                pass
+
+        results[f"integrate_{count}"] = measure(integrate)
+    return results
+
+
+def peak_benchmarks() -> dict[str, dict[str, float]]:
+    lines = [
+        EmissionLine(wavelength, 100_000)
+        for wavelength in np.linspace(360, 1000, NUM_PEAKS)
+    ]
+    device = open_device(lines)
+    wavelengths, intensities = device.get_spectrum()
+    finder = PeakFinder(wavelengths)
+    tracker = PeakTracker()
+    return {
+        f"find_peaks_{NUM_PEAKS}": measure(lambda: finder.find(intensities)),
+        f"track_peaks_{NUM_PEAKS}": measure(
+            lambda: tracker.update(finder.find(intensities))
+        ),
+    }
+
+
+def band_benchmarks() -> dict[str, dict[str, float]]:
+    device = open_device()
+    wavelengths, intensities = device.get_spectrum()
+    starts = np.linspace(400, 900, NUM_BANDS)
+    channels = BandChannels(
+        wavelengths, [Band(f"{start:g}", start, start + 10) for start in starts]
+    )
+    out = np.empty(NUM_BANDS)
+    return {f"bands_{NUM_BANDS}": measure(lambda: channels.compute(intensities, out))}
+
+
+def pipeline_benchmarks() -> dict[str, dict[str, float]]:
+    device = open_device()
+    wavelengths, intensities = device.get_spectrum()
+    pipeline = Pipeline(wavelengths, parse_stages(PIPELINE))
+    buffer = intensities.copy()
+
+    def run() -> None:
+        buffer[:] = intensities
+        pipeline.run(buffer)
+
+    return {"pipeline": measure(run)}
+
+
+def export_benchmarks() -> dict[str, dict[str, float]]:
+    device = open_device()
+    wavelengths, intensities = device.get_spectrum()
+    spectra = np.tile(intensities, (TIME_SERIES_LENGTH, 1))
+    timestamps = np.arange(TIME_SERIES_LENGTH) / 10
+
+    results = {
+        "write_spectra": measure(
+            lambda: write_spectra(io.StringIO(), wavelengths, {"I": intensities})
+        ),
+        f"write_time_series_{TIME_SERIES_LENGTH}": measure(
+            lambda: write_time_series(io.StringIO(), wavelengths, spectra, timestamps)
+        ),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        path = pathlib.Path(directory) / "spectrum.csv"
+        results["write_spectra_file"] = measure(
+            lambda: write_spectra(path, wavelengths, {"I": intensities})
+        )
+    return results
+
+
+def gui_benchmarks() -> dict[str, dict[str, float]]:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PySide6 import QtWidgets
+
+        from ocean_optics.gui import UserInterface
+    except ImportError:
+        print("Qt is not available, skipping GUI benchmarks.")
+        return {}
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    experiment = SpectroscopyExperiment(open_device(), use_cache=False)
+    ui = UserInterface(experiment)
+    wavelengths, intensities = experiment.get_spectrum()
+    intensities = intensities.copy()
+
+    def update() -> None:
+        ui.plot_data(wavelengths, intensities)
+        app.processEvents()
+
+    # each update also runs the Qt event loop, so keep the number of calls fixed
+    return {"plot_update": measure(update, number=GUI_UPDATES)}
+
+
+def git_commit() -> str | None:
+    """Return the current commit, or None if it is unknown."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=pathlib.Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=pathlib.Path,
+        default=DEFAULT_OUTPUT,
+        help="write the results to this JSON file",
+    )
+    parser.add_argument(
+        "--compare",
+        type=pathlib.Path,
+        help="compare the results with a previous JSON results file",
+    )
+    parser.add_argument(
+        "--replay",
+        type=pathlib.Path,
+        help="replay the spectra of a recording or a CSV file instead of a "
+        "simulated spectrum",
+    )
+    args = parser.parse_args()
+    global replay_file
+    replay_file = args.replay
+
+    benchmarks = {}
+    for group in (
+        driver_benchmarks,
+        integrate_benchmarks,
+        peak_benchmarks,
+        band_benchmarks,
+        pipeline_benchmarks,
+        export_benchmarks,
+        gui_benchmarks,
+    ):
+        benchmarks |= group()
+
+    previous = {}
+    if args.compare is not None:
+        previous = json.loads(args.compare.read_text())["benchmarks"]
+    for name, result in benchmarks.items():
+        line = f"{name:>28s}: {result['min'] * 1e6:10.2f} µs"
+        if name in previous:
+            line += f" ({result['min'] / previous[name]['min']:.2f}x)"
+        print(line)
+
+    results = {
+        "commit": git_commit(),
+        "date": datetime.datetime.now(datetime.UTC).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "replay": None if replay_file is None else str(replay_file),
+        "benchmarks": benchmarks,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Results written to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""Timing helpers shared by the benchmark scripts."""
+
+import timeit
+from collections.abc import Callable
+
+
+def per_frame_time(func: Callable[[], object], number: int = 10_000) -> float:
+    """Return the best per-call time in seconds.
+
+    Args:
+        func: the function to benchmark.
+        number: the number of calls in each of the five repeats.
+    """
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
@@ -0,0 +1,84 @@
+import numpy as np
+
+__all__ = ["SpectrumAccumulator"]
+
+
+class SpectrumAccumulator:
+    """Accumulate spectra in a running sum.
+
+    The sum is updated in place, so the cost of adding a spectrum and the
+    memory used do not depend on the number of spectra. Optionally, the
+    per-pixel variance is tracked using Welford's online algorithm.
+    """
+
+    count: int = 0
+    """The number of spectra added."""
+
+    def __init__(self, size: int, track_variance: bool = False) -> None:
+        """Initialize the accumulator.
+
+        Args:
+            size: the number of pixels in a spectrum.
+            track_variance: whether to track the per-pixel variance.
+        """
+        self.track_variance = track_variance
+        self.sum = np.zeros(size, dtype=np.float64)
+        if track_variance:
+            self._mean = np.zeros(size, dtype=np.float64)
+            self._m2 = np.zeros(size, dtype=np.float64)
+            self._delta = np.empty(size, dtype=np.float64)
+            self._tmp = np.empty(size, dtype=np.float64)
+
+    def reset(self) -> None:
+        """Remove all spectra from the accumulator."""
+        self.count = 0
+        self.sum.fill(0)
+        if self.track_variance:
+            self._mean.fill(0)
+            self._m2.fill(0)
+
+    def add(self, spectrum: np.ndarray) -> None:
+        """Add a spectrum to the accumulator.
+
+        Args:
+            spectrum: the intensities of the spectrum.
+        """
+        self.count += 1
+        self.sum += spectrum
+        if self.track_variance:
+            # Welford's algorithm, without temporary arrays
+            np.subtract(spectrum, self._mean, out=self._delta)
+            np.multiply(self._delta, 1 / self.count, out=self._tmp)
+            self._mean += self._tmp
+            np.subtract(spectrum, self._mean, out=self._tmp)
+            self._tmp *= self._delta
+            self._m2 += self._tmp
+
+    @property
+    def mean(self) -> np.ndarray:
+        """The per-pixel mean of the spectra."""
+        return self.sum / self.count
+
+    @property
+    def variance(self) -> np.ndarray:
+        """The per-pixel sample variance of the spectra.
+
+        Raises:
+            RuntimeError: the variance is not tracked.
+        """
+        if not self.track_variance:
+            raise RuntimeError("Variance is not tracked by this accumulator.")
+        if self.count < 2:
+            return np.full_like(self._m2, np.nan)
+        return self._m2 / (self.count - 1)
+
+    @property
+    def standard_error(self) -> np.ndarray:
+        """The per-pixel standard error of the mean.
+
+        Multiply by `count` to get the standard error of the sum.
+
+        Raises:
+            RuntimeError: the variance is not tracked.
+        """
+        return np.sqrt(self.variance / self.count)
@@ -0,0 +1,388 @@
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from types import TracebackType
+from typing import Self
+
+import numpy as np
+import usb.core
+
+from ocean_optics.usb2000plus import NUM_PIXELS, OceanOpticsUSB2000Plus
+
+__all__ = ["AcquisitionEngine", "Frame", "FrameReader", "MultiAcquisitionEngine"]
+
+# Time to wait before requesting a spectrum again after a timeout, in seconds
+RETRY_DELAY = 0.01
+
+
+@dataclass
+class Frame:
+    """A raw spectrum taken by the acquisition engine.
+
+    Attributes:
+        sequence: the sequence number of the frame, starting at 0.
+        timestamp: the `time.monotonic()` value when the frame was read.
+        data: the raw intensities of all pixels, including dark pixels.
+    """
+
+    sequence: int
+    timestamp: float
+    data: np.ndarray
+
+
+class AcquisitionEngine:
+    """Continuously acquire spectra in a background thread.
+
+    The engine keeps requesting spectra from the device and stores them in a
+    fixed-size ring buffer of raw frames, so that the device keeps measuring
+    while consumers process or display earlier frames. The acquisition thread
+    never waits for consumers: when a consumer falls behind, the oldest frames
+    are overwritten and counted as dropped by that consumer's `FrameReader`.
+
+    The engine can be used as a context manager, which starts and stops the
+    acquisition thread.
+    """
+
+    timeouts: int = 0
+    """The number of spectrum requests that timed out."""
+
+    _thread: threading.Thread | None = None
+    _error: Exception | None = None
+
+    def __init__(self, device: OceanOpticsUSB2000Plus, size: int = 64) -> None:
+        """Initialize the engine.
+
+        Args:
+            device: the spectrometer to acquire spectra from. It should not be
+                used by other code while the engine is running.
+            size: the number of frames in the ring buffer.
+        """
+        self.device = device
+        self.size = size
+        self._frames = np.zeros((size, NUM_PIXELS), dtype=np.uint16)
+        self._timestamps = np.zeros(size, dtype=np.float64)
+        # The sequence number of the frame stored in each slot, or -1 if the
+        # slot is empty or being written.
+        self._sequences = np.full(size, -1, dtype=np.int64)
+        self._latest = -1
+        # set whenever the acquisition thread is not (or no longer) running
+        self._stop_event = threading.Event()
+        self._stop_event.set()
+        self._new_frame = threading.Condition()
+        self._reader = FrameReader(self)
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.stop()
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the acquisition thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def latest_sequence(self) -> int:
+        """The sequence number of the most recent frame, or -1 if none."""
+        return self._latest
+
+    @property
+    def wavelengths(self) -> np.ndarray:
+        """The calibrated wavelength axis of the device."""
+        return self.device.wavelengths
+
+    def start(self) -> None:
+        """Start the acquisition thread."""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the acquisition thread.
+
+        The spectrum that is currently being read is completed first.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def set_integration_time(self, integration_time: int) -> None:
+        """Set device integration time.
+
+        Args:
+            integration_time: The desired integration time in microseconds.
+        """
+        self.device.set_integration_time(integration_time)
+
+    def reader(self) -> "FrameReader":
+        """Create a reader for an additional consumer of frames.
+
+        Each reader keeps track of the frames it has read and of the frames it
+        has missed.
+        """
+        return FrameReader(self)
+
+    def latest_frame(self) -> Frame | None:
+        """Return the most recent frame, see `FrameReader.latest_frame()`."""
+        return self._reader.latest_frame()
+
+    def next_frame(self, timeout: float | None = None) -> Frame:
+        """Wait for the next unread frame, see `FrameReader.next_frame()`."""
+        return self._reader.next_frame(timeout)
+
+    @property
+    def dropped_frames(self) -> int:
+        """Number of frames missed by `latest_frame()` and `next_frame()`."""
+        return self._reader.dropped_frames
+
+    def nearest_frame(self, timestamp: float) -> Frame | None:
+        """Return the frame in the ring buffer read closest to a given time.
+
+        Args:
+            timestamp: a `time.monotonic()` value.
+
+        Returns:
+            The frame, or None if no frames have been acquired yet.
+        """
+        while True:
+            slots = np.flatnonzero(self._sequences >= 0)
+            if len(slots) == 0:
+                return None
+            slot = slots[np.argmin(abs(self._timestamps[slots] - timestamp))]
+            sequence = int(self._sequences[slot])
+            if sequence >= 0 and (frame := self._read_frame(sequence)) is not None:
+                return frame
+
+    def calibrate(self, frame: Frame) -> tuple[np.ndarray, np.ndarray]:
+        """Calibrate a frame.
+
+        Returns:
+            A tuple of `np.ndarrays` with wavelength, intensity data, like
+            `OceanOpticsUSB2000Plus.get_spectrum()`.
+        """
+        return self.device.calibrate(frame.data)
+
+    def _run(self) -> None:
+        sequence = self._latest + 1
+        try:
+            while not self._stop_event.is_set():
+                slot = sequence % self.size
+                # mark slot as invalid while it is being overwritten
+                self._sequences[slot] = -1
+                try:
+                    self.device.get_raw_spectrum(out=self._frames[slot])
+                except usb.core.USBTimeoutError:
+                    self.timeouts += 1
+                    if (stats := self.device.stats) is not None:
+                        stats.count("retries")
+                    # don't spin on transports which time out without blocking
+                    self._stop_event.wait(RETRY_DELAY)
+                    continue
+                self._timestamps[slot] = time.monotonic()
+                self._sequences[slot] = sequence
+                self._latest = sequence
+                sequence += 1
+                with self._new_frame:
+                    self._new_frame.notify_all()
+        except Exception as exc:
+            # re-raised as the cause of the error in the consumer's thread
+            self._error = exc
+        finally:
+            self._stop_event.set()
+            with self._new_frame:
+                self._new_frame.notify_all()
+
+    def _read_frame(self, sequence: int) -> Frame | None:
+        """Copy a frame from the ring buffer.
+
+        Returns:
+            The frame, or None if it is no longer available.
+        """
+        slot = sequence % self.size
+        if self._sequences[slot] != sequence:
+            return None
+        frame = Frame(
+            sequence=sequence,
+            timestamp=float(self._timestamps[slot]),
+            data=self._frames[slot].copy(),
+        )
+        # the frame may have been overwritten while copying
+        if self._sequences[slot] != sequence:
+            return None
+        return frame
+
+    def _wait_for(self, sequence: int, timeout: float | None) -> None:
+        """Block until the frame with the given sequence number is available.
+
+        Raises:
+            TimeoutError: the frame did not become available in time.
+            RuntimeError: the acquisition thread is not running.
+        """
+        with self._new_frame:
+            if not self._new_frame.wait_for(
+                lambda: self._latest >= sequence or self._stop_event.is_set(),
+                timeout,
+            ):
+                raise TimeoutError("Timeout while waiting for a new frame.")
+        if self._latest < sequence:
+            if self._error is not None:
+                raise RuntimeError("Acquisition failed.") from self._error
+            raise RuntimeError("Acquisition is not running.")
+
+
+class FrameReader:
+    """Read frames from an acquisition engine.
+
+    Use `AcquisitionEngine.reader()` to create a reader.
+    """
+
+    dropped_frames: int = 0
+    """The number of frames that were acquired but not read."""
+
+    def __init__(self, engine: AcquisitionEngine) -> None:
+        self._engine = engine
+        self._last_read = engine.latest_sequence
+
+    def latest_frame(self) -> Frame | None:
+        """Return the most recent frame.
+
+        Frames acquired since the previous read are skipped and counted as
+        dropped.
+
+        Returns:
+            The most recent frame, or None if no frames have been acquired yet.
+        """
+        while (sequence := self._engine.latest_sequence) >= 0:
+            if (frame := self._engine._read_frame(sequence)) is not None:
+                self._update_last_read(sequence)
+                return frame
+        return None
+
+    def next_frame(self, timeout: float | None = None) -> Frame:
+        """Wait for the next unread frame.
+
+        If the next frame has already been overwritten in the ring buffer, the
+        oldest available frame is returned instead and the missed frames are
+        counted as dropped.
+
+        Args:
+            timeout: the maximum time to wait in seconds, or None to wait
+                indefinitely.
+
+        Raises:
+            TimeoutError: no new frame was acquired in time.
+            RuntimeError: the acquisition engine is not running.
+        """
+        sequence = self._last_read + 1
+        while True:
+            self._engine._wait_for(sequence, timeout)
+            if (frame := self._engine._read_frame(sequence)) is not None:
+                self._update_last_read(sequence)
+                return frame
+            # frame was overwritten, skip to the oldest frame still available
+            sequence = max(
+                sequence + 1, self._engine.latest_sequence - self._engine.size + 2
+            )
+
+    def _update_last_read(self, sequence: int) -> None:
+        self.dropped_frames += max(sequence - self._last_read - 1, 0)
+        self._last_read = sequence
+
+
+class MultiAcquisitionEngine:
+    """Continuously acquire spectra from several devices concurrently.
+
+    Each device is read by its own `AcquisitionEngine` in a separate thread.
+    PyUSB releases the GIL while waiting for a transfer, so the devices are
+    measuring at the same time and the total frame rate scales with the number
+    of devices.
+
+    The engine can be used as a context manager, which starts and stops the
+    acquisition threads.
+    """
+
+    def __init__(
+        self, devices: Sequence[OceanOpticsUSB2000Plus], size: int = 64
+    ) -> None:
+        """Initialize the engine.
+
+        Args:
+            devices: the spectrometers to acquire spectra from.
+            size: the number of frames in the ring buffer of each device.
+        """
+        self.engines = [AcquisitionEngine(device, size) for device in devices]
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Start the acquisition threads."""
+        for engine in self.engines:
+            engine.start()
+
+    def stop(self) -> None:
+        """Stop the acquisition threads."""
+        for engine in self.engines:
+            engine._stop_event.set()
+        for engine in self.engines:
+            engine.stop()
+
+    @property
+    def dropped_frames(self) -> list[int]:
+        """Number of frames missed by `next_frames()`, for each device."""
+        return [engine.dropped_frames for engine in self.engines]
+
+    def next_frames(self, timeout: float | None = None) -> list[Frame]:
+        """Wait for a new frame from every device and return time-aligned frames.
+
+        The devices need not run at the same frame rate. The frames are
+        aligned to the most recent frame of the device which was read the
+        longest ago: for every other device, the frame read closest to that
+        time is returned.
+
+        Args:
+            timeout: the maximum time to wait for each device in seconds, or
+                None to wait indefinitely.
+
+        Returns:
+            A frame for each device, in the order of the devices.
+
+        Raises:
+            TimeoutError: a device did not acquire a new frame in time.
+            RuntimeError: the acquisition engines are not running.
+        """
+        frames = [engine.next_frame(timeout) for engine in self.engines]
+        # use the most recent frames, which may be newer than the frames waited
+        # for; all devices have acquired a frame at or after the reference time
+        frames = [
+            engine.latest_frame() or frame
+            for engine, frame in zip(self.engines, frames)
+        ]
+        reference = min(frame.timestamp for frame in frames)
+        return [
+            frame
+            if frame.timestamp == reference
+            else (engine.nearest_frame(reference) or frame)
+            for engine, frame in zip(self.engines, frames)
+        ]
@@ -0,0 +1,207 @@
+import asyncio
+import concurrent.futures
+from collections.abc import AsyncIterator, Callable
+from types import TracebackType
+from typing import Any, Self, TypeVar
+
+import numpy as np
+
+from ocean_optics.acquisition import AcquisitionEngine
+from ocean_optics.exposure import ExposureResult
+from ocean_optics.spectroscopy import MeasurementMode, SpectroscopyExperiment
+from ocean_optics.usb2000plus import TriggerMode
+
+__all__ = ["AsyncSpectroscopyExperiment"]
+
+T = TypeVar("T")
+
+# Maximum time in seconds the I/O thread blocks while waiting for a frame when
+# streaming, which bounds the time it takes to stop a cancelled stream.
+STREAM_POLL_INTERVAL = 0.1
+
+
+class AsyncSpectroscopyExperiment:
+    """An asyncio interface to a spectroscopy experiment.
+
+    All blocking calls to the experiment run in a single, dedicated I/O thread,
+    so the event loop never blocks while waiting for the device. Calls are
+    executed in the order in which they are awaited.
+
+    Cancelling a coroutine or an `async for` loop stops the acquisition, like
+    setting the `stopped` attribute of the experiment. A USB transfer which is
+    in progress can't be interrupted, so it is completed in the background and
+    its result is discarded.
+
+    The experiment can be used as an async context manager, which shuts down
+    the I/O thread on exit.
+    """
+
+    def __init__(self, experiment: SpectroscopyExperiment) -> None:
+        """Initialize the interface.
+
+        Args:
+            experiment: the experiment to control. It should not be used
+                directly while the interface is in use.
+        """
+        self.experiment = experiment
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ocean-optics-io"
+        )
+
+    @classmethod
+    async def open(
+        cls, serial_number: str | None = None
+    ) -> "AsyncSpectroscopyExperiment":
+        """Open a spectroscopy experiment without blocking the event loop.
+
+        Args:
+            serial_number: the serial number of the device to open. By default,
+                the first connected device is opened.
+
+        Raises:
+            DeviceNotFoundError: no (matching) device is connected.
+        """
+        loop = asyncio.get_running_loop()
+        experiment = await loop.run_in_executor(
+            None, lambda: SpectroscopyExperiment(serial_number=serial_number)
+        )
+        return cls(experiment)
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Wait for pending calls to finish and shut down the I/O thread."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._executor.shutdown)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a blocking function in the I/O thread.
+
+        Args:
+            func: the function to call, e.g. a method of the experiment.
+            *args: the arguments of the function.
+
+        Returns:
+            The return value of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def get_spectrum(self) -> tuple[np.ndarray, np.ndarray]:
+        """Record a spectrum, see `SpectroscopyExperiment.get_spectrum()`."""
+        return await self.run(self.experiment.get_spectrum)
+
+    async def integrate_spectrum(
+        self, count: int, track_variance: bool = False
+    ) -> AsyncIterator[tuple[np.ndarray, np.ndarray]]:
+        """Record a spectrum by integrating over multiple measurements.
+
+        See `SpectroscopyExperiment.integrate_spectrum()`. The yielded
+        intensity array is updated in place by the next measurement, so make a
+        copy if you want to keep intermediate results. Breaking out of the
+        loop or cancelling it stops the integration.
+
+        Args:
+            count: The number of measurements to perform.
+            track_variance: Also track the per-pixel variance, which is
+                available from the `accumulator` attribute of the experiment.
+        """
+        spectra = self.experiment.integrate_spectrum(count, track_variance)
+        try:
+            # the generator only advances in the I/O thread while we wait
+            while (spectrum := await self.run(next, spectra, None)) is not None:
+                yield spectrum
+        finally:
+            self.experiment.stopped = True
+            await self.run(spectra.close)
+
+    async def stream(
+        self, size: int = 64
+    ) -> AsyncIterator[tuple[np.ndarray, np.ndarray]]:
+        """Continuously record spectra.
+
+        Spectra are acquired in the background by an `AcquisitionEngine` and
+        processed like `SpectroscopyExperiment.get_spectrum()`. When the loop
+        body is slower than the device, the oldest unprocessed frames are
+        dropped. Breaking out of the loop or cancelling it stops the
+        acquisition.
+
+        Args:
+            size: the number of frames buffered by the acquisition engine.
+
+        Yields:
+            A tuple of wavelength, intensity data for each spectrum.
+        """
+        engine = AcquisitionEngine(self.experiment.device, size)
+        engine.start()
+        try:
+            while True:
+                spectrum = await self.run(self._next_spectrum, engine)
+                if spectrum is not None:
+                    yield spectrum
+        finally:
+            await self.run(engine.stop)
+
+    def _next_spectrum(
+        self, engine: AcquisitionEngine
+    ) -> tuple[np.ndarray, np.ndarray] | None:
+        """Wait for and process the next frame, or return None on a timeout."""
+        try:
+            frame = engine.next_frame(timeout=STREAM_POLL_INTERVAL)
+        except TimeoutError:
+            return None
+        wavelengths, intensities = engine.calibrate(frame)
+        return wavelengths, self.experiment.process_spectrum(
+            intensities, out=intensities
+        )
+
+    async def set_integration_time(self, integration_time: int) -> None:
+        """Set device integration time in microseconds."""
+        await self.run(self.experiment.set_integration_time, integration_time)
+
+    async def set_scans_to_average(self, scans_to_average: int) -> None:
+        """Set the number of scans to average for each spectrum."""
+        await self.run(self.experiment.set_scans_to_average, scans_to_average)
+
+    async def set_boxcar_width(self, boxcar_width: int) -> None:
+        """Set the boxcar width for smoothing spectra."""
+        await self.run(self.experiment.set_boxcar_width, boxcar_width)
+
+    async def set_trigger_mode(self, trigger_mode: TriggerMode) -> None:
+        """Set the trigger mode of the device."""
+        await self.run(self.experiment.set_trigger_mode, trigger_mode)
+
+    async def set_corrections(
+        self, nonlinearity: bool = False, stray_light: bool = False
+    ) -> None:
+        """Enable or disable corrections of the spectra."""
+        await self.run(self.experiment.set_corrections, nonlinearity, stray_light)
+
+    async def set_measurement_mode(self, mode: MeasurementMode) -> None:
+        """Set the quantity calculated from the measured spectra."""
+        await self.run(self.experiment.set_measurement_mode, mode)
+
+    async def capture_dark(self, count: int = 10) -> np.ndarray:
+        """Measure and store the dark spectrum for the current integration time."""
+        return await self.run(self.experiment.capture_dark, count)
+
+    async def capture_reference(self, count: int = 10) -> np.ndarray:
+        """Measure and store the reference spectrum for the current integration time."""
+        return await self.run(self.experiment.capture_reference, count)
+
+    async def auto_exposure(
+        self, target: float = 0.8, tolerance: float = 0.05, max_iterations: int = 10
+    ) -> ExposureResult:
+        """Adjust the integration time so the peak reaches a target level."""
+        return await self.run(
+            self.experiment.auto_exposure, target, tolerance, max_iterations
+        )
@@ -0,0 +1,129 @@
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+__all__ = ["Band", "BandChannels"]
+
+BAND_PATTERN = re.compile(
+    r"^(?:(?P<name>[^=]+)=)?\s*(?P<start>[\d.]+)\s*-\s*(?P<stop>[\d.]+)\s*$"
+)
+
+
+@dataclass(frozen=True)
+class Band:
+    """A named wavelength band.
+
+    Attributes:
+        name: the name of the band.
+        start: the start of the band in nanometers.
+        stop: the end of the band in nanometers.
+    """
+
+    name: str
+    start: float
+    stop: float
+
+    def __post_init__(self) -> None:
+        if not self.start < self.stop:
+            raise ValueError(
+                f"The start of band {self.name!r} must be smaller than its end."
+            )
+
+    @classmethod
+    def parse(cls, text: str) -> "Band":
+        """Parse a band given as 'NAME=START-STOP' or 'START-STOP'.
+
+        Without a name, the band is named after its limits, e.g. '585-595 nm'.
+
+        Args:
+            text: the definition of the band, with the limits in nanometers.
+        """
+        if (match := BAND_PATTERN.match(text)) is None:
+            raise ValueError(f"Invalid band {text!r}, expected NAME=START-STOP.")
+        try:
+            start, stop = float(match["start"]), float(match["stop"])
+        except ValueError:
+            raise ValueError(
+                f"Invalid band {text!r}, expected NAME=START-STOP."
+            ) from None
+        name = match["name"]
+        if name is None:
+            name = f"{match['start']}-{match['stop']} nm"
+        return cls(name.strip(), start, stop)
+
+
+class BandChannels:
+    """Integrate spectra over a set of wavelength bands.
+
+    Each pixel covers the wavelengths halfway to its neighbours. A pixel which
+    lies partly inside a band contributes in proportion to its overlap with the
+    band, so the band values change smoothly with the band limits instead of
+    jumping by whole pixels. The weights of all bands are calculated once, for
+    the pixels spanned by the bands, after which all band values of a spectrum
+    follow from a single matrix product.
+    """
+
+    def __init__(
+        self, wavelengths: np.ndarray, bands: Sequence[Band], average: bool = False
+    ) -> None:
+        """Initialize the band channels.
+
+        Args:
+            wavelengths: the wavelength axis of the spectra, in increasing
+                order.
+            bands: the bands.
+            average: calculate the mean value in each band instead of the
+                integral over wavelength, e.g. for transmittance or absorbance.
+        """
+        if not bands:
+            raise ValueError("At least one band is required.")
+        wavelengths = np.asarray(wavelengths, dtype=np.float64)
+        self.bands = list(bands)
+        self.average = average
+
+        # pixel boundaries, halfway between the pixel centers
+        edges = np.empty(len(wavelengths) + 1)
+        edges[1:-1] = (wavelengths[:-1] + wavelengths[1:]) / 2
+        edges[0] = 2 * wavelengths[0] - edges[1]
+        edges[-1] = 2 * wavelengths[-1] - edges[-2]
+        starts = np.array([[band.start] for band in self.bands])
+        stops = np.array([[band.stop] for band in self.bands])
+        # overlap of each pixel with each band in nanometers
+        weights = np.minimum(edges[1:], stops) - np.maximum(edges[:-1], starts)
+        np.clip(weights, 0, None, out=weights)
+        totals = weights.sum(axis=1)
+        if not totals.all():
+            names = [band.name for band, total in zip(self.bands, totals) if not total]
+            raise ValueError(f"Bands {names} are outside of the wavelength range.")
+        if average:
+            weights /= totals[:, np.newaxis]
+
+        # only keep the (bands, pixels) weights of the pixels spanned by the bands
+        pixels = np.flatnonzero(weights.any(axis=0))
+        self.pixels = slice(int(pixels[0]), int(pixels[-1]) + 1)
+        self.weights = np.ascontiguousarray(weights[:, self.pixels])
+
+    @property
+    def names(self) -> list[str]:
+        """The names of the bands."""
+        return [band.name for band in self.bands]
+
+    def __len__(self) -> int:
+        return len(self.bands)
+
+    def compute(
+        self, intensities: np.ndarray, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Calculate the band values of a spectrum.
+
+        Args:
+            intensities: the intensities of the spectrum.
+            out: an optional array of one element per band to store the values
+                in.
+
+        Returns:
+            The value of each band.
+        """
+        return np.matmul(self.weights, intensities[self.pixels], out=out)
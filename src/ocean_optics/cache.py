@@ -0,0 +1,23 @@
+import os
+import pathlib
+import sys
+
+__all__ = ["user_cache_dir"]
+
+
+def user_cache_dir() -> pathlib.Path:
+    """Return the directory for cached data.
+
+    The location follows the conventions of the platform and can be overridden
+    by setting the `OCEAN_OPTICS_CACHE_DIR` environment variable.
+    """
+    if path := os.environ.get("OCEAN_OPTICS_CACHE_DIR"):
+        return pathlib.Path(path)
+    home = pathlib.Path.home()
+    if sys.platform == "win32":
+        base = pathlib.Path(os.environ.get("LOCALAPPDATA", home / "AppData/Local"))
+    elif sys.platform == "darwin":
+        base = home / "Library/Caches"
+    else:
+        base = pathlib.Path(os.environ.get("XDG_CACHE_HOME", home / ".cache"))
+    return base / "ocean-optics"
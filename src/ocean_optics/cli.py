@@ -1,30 +1,133 @@
-import csv
 import pathlib
+import time
+from dataclasses import dataclass
 from typing import Annotated
 
-import matplotlib.pyplot as plt
 import numpy as np
-import plotext
 import typer
 from rich import print
-from rich.progress import track
 from rich.table import Table
 
-import ocean_optics.gui
-from ocean_optics.spectroscopy import DeviceNotFoundError, SpectroscopyExperiment
+from ocean_optics.acquisition import AcquisitionEngine
+from ocean_optics.bands import Band
+from ocean_optics.export import (
+    DEFAULT_PRECISION,
+    write_bands,
+    write_peaks,
+    write_spectra,
+    write_time_series,
+)
+from ocean_optics.instrumentation import AcquisitionStats
+from ocean_optics.pipeline import parse_stage
+from ocean_optics.recording import Recording, RecordingWriter
+from ocean_optics.simulation import SimulatedDevice
+from ocean_optics.spectroscopy import (
+    DeviceNotFoundError,
+    MeasurementMode,
+    ReferenceNotAvailableError,
+    SpectroscopyExperiment,
+    get_spectra,
+)
+from ocean_optics.usb2000plus import OceanOpticsUSB2000Plus, list_devices
 
 app = typer.Typer()
 
 
+@dataclass
+class GlobalOptions:
+    """The global options, set by the main callback."""
+
+    simulate: bool = False
+    refresh_config: bool = False
+    serial: str | None = None
+    connect: str | None = None
+    replay: pathlib.Path | None = None
+    replay_speed: float = 1.0
+
+
+options = GlobalOptions()
+
+# Axis labels and column names of the measurement modes.
+MODE_LABELS = {
+    MeasurementMode.INTENSITY: "Intensity",
+    MeasurementMode.DARK_SUBTRACTED: "Intensity",
+    MeasurementMode.TRANSMITTANCE: "Transmittance",
+    MeasurementMode.ABSORBANCE: "Absorbance",
+}
+# Minimum time in seconds between updates of live tables.
+LIVE_REFRESH_INTERVAL = 0.1
+
+
+@app.callback()
+def main(
+    simulate: Annotated[
+        bool,
+        typer.Option(help="Use a simulated spectrometer instead of a real device."),
+    ] = False,
+    refresh_config: Annotated[
+        bool,
+        typer.Option(
+            help="Query the device configuration instead of using the cached one."
+        ),
+    ] = False,
+    serial: Annotated[
+        str | None,
+        typer.Option(
+            help="Use the device with this serial number, or 'all' to use all "
+            "connected devices. By default, the first device is used."
+        ),
+    ] = None,
+    connect: Annotated[
+        str | None,
+        typer.Option(
+            help="Receive spectra from an 'ocean-optics serve' server at HOST:PORT "
+            "or the path of a Unix socket, instead of using a local device."
+        ),
+    ] = None,
+    replay: Annotated[
+        pathlib.Path | None,
+        typer.Option(
+            exists=True,
+            dir_okay=False,
+            help="Replay the spectra of a recording or a CSV or TSV file of "
+            "spectra instead of using a device.",
+        ),
+    ] = None,
+    replay_speed: Annotated[
+        float,
+        typer.Option(
+            min=0,
+            help="Replay speed relative to real time. Use 0 to replay as fast as "
+            "possible.",
+        ),
+    ] = 1.0,
+) -> None:
+    """Spectroscopy using an Ocean Optics USB2000+ spectrometer."""
+    options.simulate = simulate
+    options.refresh_config = refresh_config
+    options.serial = serial
+    options.connect = connect
+    options.replay = replay
+    options.replay_speed = replay_speed
+
+
 @app.command()
-def check():
+def check() -> None:
     """Check if a compatible device can be found."""
     try:
-        SpectroscopyExperiment()
+        experiments = create_experiments()
     except DeviceNotFoundError:
         print("[red]No compatible device found.")
     else:
-        print("[green]Device is connected and available.")
+        if len(experiments) == 1:
+            print("[green]Device is connected and available.")
+        else:
+            print(f"[green]{len(experiments)} devices are connected and available.")
+        for experiment in experiments:
+            print(
+                f"Serial number: {experiment.device.config.serial_number}, "
+                f"startup time: {experiment.device.startup_time * 1e3:.1f} ms."
+            )
 
 
 @app.command()
@@ -37,6 +140,41 @@ def spectrum(
             help="Set the integration time of the device in microseconds.",
         ),
     ] = 100_000,
+    scans_to_average: Annotated[
+        int,
+        typer.Option(
+            "--scans-to-average",
+            "-a",
+            min=1,
+            help="Average each spectrum over this number of scans.",
+        ),
+    ] = 1,
+    boxcar: Annotated[
+        int,
+        typer.Option(
+            min=0, help="Average each pixel with this number of pixels on either side."
+        ),
+    ] = 0,
+    nonlinearity: Annotated[
+        bool,
+        typer.Option(
+            "--correct-nonlinearity",
+            help="Correct for the nonlinear response of the detector.",
+        ),
+    ] = False,
+    stray_light: Annotated[
+        bool,
+        typer.Option("--correct-stray-light", help="Correct for stray light."),
+    ] = False,
+    mode: Annotated[
+        MeasurementMode,
+        typer.Option(
+            "--mode",
+            "-m",
+            help="Calculate this quantity, using the stored dark and reference "
+            "spectra for the integration time.",
+        ),
+    ] = MeasurementMode.INTENSITY,
     graph: Annotated[
         bool,
         typer.Option(
@@ -54,60 +192,140 @@ def spectrum(
     limits: Annotated[
         tuple[float, float], typer.Option(help="Restrict wavelengths to (min, max).")
     ] = (None, None),
+    process: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--process",
+            "-p",
+            help="Apply a processing stage after calculating the quantity: "
+            "boxcar=WIDTH, savgol=WINDOW,ORDER, gaussian=SIGMA (in pixels), "
+            "baseline=START-STOP or normalize[=START-STOP]. Repeat to apply "
+            "several stages in order.",
+        ),
+    ] = None,
     output: Annotated[
-        typer.FileTextWrite,
-        typer.Option("--output", "-o", help="Write the results to a CSV file."),
+        typer.FileTextWrite | None,
+        typer.Option(
+            "--output",
+            "-o",
+            help="Write the results to a CSV file, or a TSV file if the name "
+            "ends in .tsv or .txt.",
+        ),
     ] = None,
+    precision: Annotated[
+        int,
+        typer.Option(min=1, help="Number of significant digits in the output file."),
+    ] = DEFAULT_PRECISION,
     quiet: Annotated[
         bool, typer.Option("--quiet", "-q", help="Don't show any console output.")
     ] = False,
-):
+    stats: Annotated[
+        bool,
+        typer.Option(
+            "--stats", help="Show timing statistics of the acquisition afterwards."
+        ),
+    ] = False,
+) -> None:
     """Record a spectrum.
 
     Record a spectrum using the spectrometer, displaying the results in a graph
     in the terminal. There are various options for other forms of output. The
-    unit of intensity is arbitrary.
+    unit of intensity is arbitrary. When using all connected devices, the
+    devices measure concurrently and the output file name is suffixed with the
+    serial number of each device.
     """
 
-    experiment = open_experiment()
-    experiment.set_integration_time(int_time)
-    wavelengths, intensities = experiment.get_spectrum()
+    experiments = open_experiments()
+    for experiment in experiments:
+        experiment.set_integration_time(int_time)
+        experiment.set_scans_to_average(scans_to_average)
+        experiment.set_boxcar_width(boxcar)
+        experiment.set_corrections(nonlinearity, stray_light)
+        experiment.set_measurement_mode(mode)
+        set_processing(experiment, process)
+        if stats:
+            experiment.device.stats = AcquisitionStats()
+    try:
+        spectra = get_spectra(experiments)
+    except ReferenceNotAvailableError as exc:
+        print(f"[red]{exc}")
+        raise typer.Abort()
 
     xmin, xmax = limits
-    if limits != (None, None):
-        mask = (xmin <= wavelengths) & (wavelengths <= xmax)
-        wavelengths = wavelengths[mask]
-        intensities = intensities[mask]
+    results = {}
+    for experiment, (wavelengths, intensities) in zip(experiments, spectra):
+        if limits != (None, None):
+            mask = (xmin <= wavelengths) & (wavelengths <= xmax)
+            wavelengths = wavelengths[mask]
+            intensities = intensities[mask]
+        results[experiment.device.config.serial_number] = wavelengths, intensities
+    # label the spectra by serial number when using multiple devices
+    multiple = len(results) > 1
 
     if not quiet:
         if graph:
             if gui:
-                if scatter:
-                    plt.scatter(wavelengths, intensities, marker=".")
-                else:
-                    plt.plot(wavelengths, intensities)
+                import matplotlib.pyplot as plt
+
+                for serial, (wavelengths, intensities) in results.items():
+                    label = serial if multiple else None
+                    if scatter:
+                        plt.scatter(wavelengths, intensities, marker=".", label=label)
+                    else:
+                        plt.plot(wavelengths, intensities, label=label)
+                if multiple:
+                    plt.legend()
                 plt.xlim(xmin, xmax)
                 plt.xlabel("Wavelength (nm)")
-                plt.ylabel("Intensity")
+                plt.ylabel(MODE_LABELS[mode])
                 plt.show()
             else:
+                import plotext
+
                 plotext.theme("clear")
-                if scatter:
-                    plotext.scatter(wavelengths, intensities, marker="braille")
-                else:
-                    plotext.plot(wavelengths, intensities, marker="braille")
+                for serial, (wavelengths, intensities) in results.items():
+                    label = serial if multiple else None
+                    if scatter:
+                        plotext.scatter(
+                            wavelengths, intensities, marker="braille", label=label
+                        )
+                    else:
+                        plotext.plot(
+                            wavelengths, intensities, marker="braille", label=label
+                        )
                 plotext.xlim(xmin, xmax)
                 plotext.xlabel("Wavelength (nm)")
-                plotext.ylabel("Intensity")
+                plotext.ylabel(MODE_LABELS[mode])
                 plotext.show()
         else:
-            rich_table = Table("Wavelength (nm)", "Intensity")
-            for wavelength, intensity in zip(wavelengths, intensities):
-                rich_table.add_row(f"{wavelength:.1f}", f"{intensity:.1f}")
-            print(rich_table)
+            for serial, (wavelengths, intensities) in results.items():
+                rich_table = Table(
+                    "Wavelength (nm)",
+                    MODE_LABELS[mode],
+                    title=serial if multiple else None,
+                )
+                for wavelength, intensity in zip(wavelengths, intensities):
+                    rich_table.add_row(f"{wavelength:.1f}", f"{intensity:.1f}")
+                print(rich_table)
 
     if output:
-        save_spectrum(output, wavelengths, intensities)
+        for serial, (wavelengths, intensities) in results.items():
+            path: typer.FileTextWrite | pathlib.Path
+            if multiple:
+                path = pathlib.Path(output.name)
+                path = path.with_stem(f"{path.stem}_{serial}")
+            else:
+                path = output
+            save_spectrum(
+                path, wavelengths, {MODE_LABELS[mode]: intensities}, precision
+            )
+
+    if stats:
+        for experiment in experiments:
+            print_stats(
+                experiment.device.stats,
+                title=experiment.device.config.serial_number if multiple else None,
+            )
 
 
 @app.command()
@@ -123,6 +341,41 @@ def integrate(
             help="Set the integration time of the device in microseconds.",
         ),
     ] = 100_000,
+    scans_to_average: Annotated[
+        int,
+        typer.Option(
+            "--scans-to-average",
+            "-a",
+            min=1,
+            help="Average each spectrum over this number of scans.",
+        ),
+    ] = 1,
+    boxcar: Annotated[
+        int,
+        typer.Option(
+            min=0, help="Average each pixel with this number of pixels on either side."
+        ),
+    ] = 0,
+    nonlinearity: Annotated[
+        bool,
+        typer.Option(
+            "--correct-nonlinearity",
+            help="Correct for the nonlinear response of the detector.",
+        ),
+    ] = False,
+    stray_light: Annotated[
+        bool,
+        typer.Option("--correct-stray-light", help="Correct for stray light."),
+    ] = False,
+    mode: Annotated[
+        MeasurementMode,
+        typer.Option(
+            "--mode",
+            "-m",
+            help="Calculate this quantity, using the stored dark and reference "
+            "spectra for the integration time.",
+        ),
+    ] = MeasurementMode.INTENSITY,
     graph: Annotated[
         bool,
         typer.Option(
@@ -138,53 +391,747 @@ def integrate(
     limits: Annotated[
         tuple[float, float], typer.Option(help="Restrict wavelengths to (min, max).")
     ] = (None, None),
+    process: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--process",
+            "-p",
+            help="Apply a processing stage after calculating the quantity: "
+            "boxcar=WIDTH, savgol=WINDOW,ORDER, gaussian=SIGMA (in pixels), "
+            "baseline=START-STOP or normalize[=START-STOP]. Repeat to apply "
+            "several stages in order.",
+        ),
+    ] = None,
     output: Annotated[
-        typer.FileTextWrite,
-        typer.Option("--output", "-o", help="Write the results to a CSV file."),
+        typer.FileTextWrite | None,
+        typer.Option(
+            "--output",
+            "-o",
+            help="Write the results to a CSV file, or a TSV file if the name "
+            "ends in .tsv or .txt.",
+        ),
     ] = None,
-):
+    precision: Annotated[
+        int,
+        typer.Option(min=1, help="Number of significant digits in the output file."),
+    ] = DEFAULT_PRECISION,
+    std_error: Annotated[
+        bool,
+        typer.Option(
+            "--std-error",
+            help="Add the standard error of the integrated spectrum to the output.",
+        ),
+    ] = False,
+    stats: Annotated[
+        bool,
+        typer.Option(
+            "--stats", help="Show timing statistics of the acquisition afterwards."
+        ),
+    ] = False,
+) -> None:
     """Record a spectrum by integrating over multiple measurements.
 
     Record an integrated spectrum using the spectrometer. Multiple measurements
     are taken and they are summed to increase the signal to noise ratio. The
     results are displayed in a graph in the terminal. There are various options
-    for other forms of output. The unit of intensity is arbitrary.
+    for other forms of output. The unit of intensity is arbitrary. The
+    transmittance and absorbance are calculated from the mean spectrum.
     """
+    if std_error and mode in (
+        MeasurementMode.TRANSMITTANCE,
+        MeasurementMode.ABSORBANCE,
+    ):
+        raise typer.BadParameter(
+            "The standard error is only available for intensities.",
+            param_hint="--std-error",
+        )
     experiment = open_experiment()
     experiment.set_integration_time(int_time)
+    experiment.set_scans_to_average(scans_to_average)
+    experiment.set_boxcar_width(boxcar)
+    experiment.set_corrections(nonlinearity, stray_light)
+    experiment.set_measurement_mode(mode)
+    set_processing(experiment, process)
+    if stats:
+        experiment.device.stats = AcquisitionStats()
     xmin, xmax = limits
 
+    import plotext
+    from rich.progress import track
+
     plotext.theme("clear")
     plotext.xlim(xmin, xmax)
     plotext.xlabel("Wavelength (nm)")
-    plotext.ylabel("Intensity")
-    for wavelengths, intensities in track(
-        experiment.integrate_spectrum(count), total=count, description="Taking data..."
-    ):
-        if limits != (None, None):
-            mask = (xmin <= wavelengths) & (wavelengths <= xmax)
-            wavelengths = wavelengths[mask]
-            intensities = intensities[mask]
+    plotext.ylabel(MODE_LABELS[mode])
+    spectra = experiment.integrate_spectrum(count, track_variance=std_error)
+    try:
+        for wavelengths, intensities in track(
+            spectra, total=count, description="Taking data..."
+        ):
+            if limits != (None, None):
+                mask = (xmin <= wavelengths) & (wavelengths <= xmax)
+                wavelengths = wavelengths[mask]
+                intensities = intensities[mask]
 
-        if graph:
-            plotext.clear_data()
-            if scatter:
-                plotext.scatter(wavelengths, intensities, marker="braille")
-            else:
-                plotext.plot(wavelengths, intensities, marker="braille")
-            plotext.show()
+            if graph:
+                plotext.clear_data()
+                if scatter:
+                    plotext.scatter(wavelengths, intensities, marker="braille")
+                else:
+                    plotext.plot(wavelengths, intensities, marker="braille")
+                plotext.show()
+    except ReferenceNotAvailableError as exc:
+        print(f"[red]{exc}")
+        raise typer.Abort()
 
     if output:
-        save_spectrum(output, wavelengths, intensities)
+        columns = {MODE_LABELS[mode]: intensities}
+        if std_error and (accumulator := experiment.accumulator) is not None:
+            # standard error of the sum of all measurements
+            errors = accumulator.standard_error * accumulator.count
+            if limits != (None, None):
+                errors = errors[mask]
+            columns["Standard error"] = errors
+        save_spectrum(output, wavelengths, columns, precision)
+
+    if stats:
+        print_stats(experiment.device.stats)
+
+
+@app.command()
+def dark(
+    int_time: Annotated[
+        int,
+        typer.Option(
+            "--int-time",
+            "-t",
+            help="Set the integration time of the device in microseconds.",
+        ),
+    ] = 100_000,
+    count: Annotated[
+        int,
+        typer.Option("--count", "-c", min=1, help="Number of spectra to average."),
+    ] = 10,
+) -> None:
+    """Measure and store a dark spectrum.
+
+    Block the light path to the spectrometer before measuring. The dark
+    spectrum is stored for the integration time and is used by the
+    dark-subtracted, transmittance and absorbance measurement modes.
+    """
+    experiment = open_experiment()
+    experiment.set_integration_time(int_time)
+    experiment.capture_dark(count)
+    print(f"[green]Dark spectrum stored for an integration time of {int_time} µs.")
+
+
+@app.command()
+def reference(
+    int_time: Annotated[
+        int,
+        typer.Option(
+            "--int-time",
+            "-t",
+            help="Set the integration time of the device in microseconds.",
+        ),
+    ] = 100_000,
+    count: Annotated[
+        int,
+        typer.Option("--count", "-c", min=1, help="Number of spectra to average."),
+    ] = 10,
+) -> None:
+    """Measure and store a reference spectrum.
+
+    Measure the light source without the sample. The reference spectrum is
+    stored for the integration time and is used by the transmittance and
+    absorbance measurement modes.
+    """
+    experiment = open_experiment()
+    experiment.set_integration_time(int_time)
+    experiment.capture_reference(count)
+    print(f"[green]Reference spectrum stored for an integration time of {int_time} µs.")
 
 
 @app.command()
-def gui():
+def sweep(
+    int_times: Annotated[
+        list[int],
+        typer.Argument(help="The integration times of the device in microseconds."),
+    ],
+    count: Annotated[
+        int,
+        typer.Option(
+            "--count",
+            "-c",
+            min=1,
+            help="Number of spectra to average for each integration time.",
+        ),
+    ] = 1,
+    mode: Annotated[
+        MeasurementMode,
+        typer.Option(
+            "--mode",
+            "-m",
+            help="Calculate this quantity, using the stored dark and reference "
+            "spectra for each integration time.",
+        ),
+    ] = MeasurementMode.INTENSITY,
+    graph: Annotated[
+        bool,
+        typer.Option(help="Plot the spectra in a graph in the terminal."),
+    ] = True,
+    process: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--process",
+            "-p",
+            help="Apply a processing stage after calculating the quantity: "
+            "boxcar=WIDTH, savgol=WINDOW,ORDER, gaussian=SIGMA (in pixels), "
+            "baseline=START-STOP or normalize[=START-STOP]. Repeat to apply "
+            "several stages in order.",
+        ),
+    ] = None,
+    output: Annotated[
+        typer.FileTextWrite | None,
+        typer.Option(
+            "--output",
+            "-o",
+            help="Write the results to a CSV file, or a TSV file if the name "
+            "ends in .tsv or .txt.",
+        ),
+    ] = None,
+    precision: Annotated[
+        int,
+        typer.Option(min=1, help="Number of significant digits in the output file."),
+    ] = DEFAULT_PRECISION,
+    stats: Annotated[
+        bool,
+        typer.Option(
+            "--stats", help="Show timing statistics of the acquisition afterwards."
+        ),
+    ] = False,
+) -> None:
+    """Record spectra over a range of integration times.
+
+    The integration times are measured in ascending order, which minimizes the
+    time spent discarding spectra after changing the integration time. The
+    output file contains one column for each integration time.
+    """
+    from rich.progress import track
+
+    experiment = open_experiment()
+    experiment.set_measurement_mode(mode)
+    set_processing(experiment, process)
+    if stats:
+        experiment.device.stats = AcquisitionStats()
+    columns = {}
+    try:
+        for int_time, wavelengths, intensities in track(
+            experiment.sweep_integration_time(int_times, count),
+            total=len(set(int_times)),
+            description="Taking data...",
+        ):
+            columns[f"{MODE_LABELS[mode]} ({int_time} µs)"] = intensities
+    except ReferenceNotAvailableError as exc:
+        print(f"[red]{exc}")
+        raise typer.Abort()
+
+    if graph:
+        import plotext
+
+        plotext.theme("clear")
+        for label, intensities in columns.items():
+            plotext.plot(wavelengths, intensities, marker="braille", label=label)
+        plotext.xlabel("Wavelength (nm)")
+        plotext.ylabel(MODE_LABELS[mode])
+        plotext.show()
+
+    if output:
+        save_spectrum(output, wavelengths, columns, precision)
+
+    if stats:
+        print_stats(experiment.device.stats)
+
+
+@app.command()
+def exposure(
+    target: Annotated[
+        float,
+        typer.Option(
+            min=0,
+            max=1,
+            help="The desired peak height as a fraction of the saturation level.",
+        ),
+    ] = 0.8,
+    tolerance: Annotated[
+        float,
+        typer.Option(help="The accepted deviation from the target fraction."),
+    ] = 0.05,
+    max_iterations: Annotated[
+        int,
+        typer.Option(min=1, help="The maximum number of spectra to measure."),
+    ] = 10,
+    int_time: Annotated[
+        int,
+        typer.Option(
+            "--int-time",
+            "-t",
+            help="Start at this integration time of the device in microseconds.",
+        ),
+    ] = 100_000,
+) -> None:
+    """Find the integration time for a target peak height.
+
+    The integration time is adjusted until the highest peak in the spectrum
+    reaches the target fraction of the saturation level of the detector. Use
+    the resulting integration time with the --int-time option of the other
+    commands.
+    """
+    experiment = open_experiment()
+    experiment.set_integration_time(int_time)
+    result = experiment.auto_exposure(target, tolerance, max_iterations)
+    color = "green" if result.converged else "red"
+    print(
+        f"[{color}]Integration time: {result.integration_time} µs, peak at "
+        f"{result.peak_fraction:.1%} of saturation after {result.iterations} "
+        "spectra."
+    )
+    if not result.converged:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def peaks(
+    int_time: Annotated[
+        int,
+        typer.Option(
+            "--int-time",
+            "-t",
+            help="Set the integration time of the device in microseconds.",
+        ),
+    ] = 100_000,
+    count: Annotated[
+        int | None,
+        typer.Option("--count", "-c", min=1, help="Number of spectra to analyze."),
+    ] = None,
+    threshold: Annotated[
+        float | None,
+        typer.Option(
+            help="Minimum height of a peak above the baseline. By default, 5% of "
+            "the highest point of each spectrum."
+        ),
+    ] = None,
+    max_shift: Annotated[
+        float,
+        typer.Option(
+            help="Maximum change in wavelength of a peak between spectra, in nm."
+        ),
+    ] = 1.0,
+    mode: Annotated[
+        MeasurementMode,
+        typer.Option(
+            "--mode",
+            "-m",
+            help="Find peaks in this quantity, using the stored dark and reference "
+            "spectra for the integration time.",
+        ),
+    ] = MeasurementMode.INTENSITY,
+    process: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--process",
+            "-p",
+            help="Apply a processing stage after calculating the quantity: "
+            "boxcar=WIDTH, savgol=WINDOW,ORDER, gaussian=SIGMA (in pixels), "
+            "baseline=START-STOP or normalize[=START-STOP]. Repeat to apply "
+            "several stages in order.",
+        ),
+    ] = None,
+    output: Annotated[
+        typer.FileTextWrite | None,
+        typer.Option(
+            "--output",
+            "-o",
+            help="Write the peaks of each spectrum to a CSV file, or a TSV file if "
+            "the name ends in .tsv or .txt.",
+        ),
+    ] = None,
+    precision: Annotated[
+        int,
+        typer.Option(min=1, help="Number of significant digits in the output file."),
+    ] = DEFAULT_PRECISION,
+) -> None:
+    """Track the wavelength, height and width of peaks over time.
+
+    Spectra are acquired continuously and the peaks are fitted with sub-pixel
+    accuracy. Each peak keeps its number as long as it is found in the
+    spectra. The peaks of the latest spectrum are shown in a table. Tracking
+    stops after the given number of spectra or when pressing Ctrl-C.
+    """
+    from rich.live import Live
+
+    experiment = open_experiment()
+    experiment.set_integration_time(int_time)
+    experiment.set_measurement_mode(mode)
+    set_processing(experiment, process)
+    results = []
+    with Live(auto_refresh=False) as live:
+        try:
+            for spectrum_peaks in experiment.track_peaks(
+                count, threshold, max_shift=max_shift
+            ):
+                results.append(spectrum_peaks)
+                table = Table(
+                    "Peak",
+                    "Wavelength (nm)",
+                    MODE_LABELS[mode],
+                    "FWHM (nm)",
+                    title=f"Spectrum {len(results)}",
+                )
+                for peak_id, wavelength, height, fwhm in zip(
+                    spectrum_peaks.ids,
+                    spectrum_peaks.wavelengths,
+                    spectrum_peaks.heights,
+                    spectrum_peaks.fwhms,
+                ):
+                    table.add_row(
+                        str(peak_id),
+                        f"{wavelength:.3f}",
+                        f"{height:.1f}",
+                        f"{fwhm:.3f}",
+                    )
+                live.update(table, refresh=True)
+        except ReferenceNotAvailableError as exc:
+            print(f"[red]{exc}")
+            raise typer.Abort()
+        except KeyboardInterrupt:
+            pass
+
+    if output:
+        write_peaks(output, results, precision)
+        print(f"Data written to [bold]{output.name}[/] successfully.")
+
+
+@app.command()
+def bands(
+    band_definitions: Annotated[
+        list[str],
+        typer.Argument(
+            metavar="BANDS...",
+            help="The wavelength bands as NAME=START-STOP or START-STOP, in nm, "
+            "e.g. Na=585-595.",
+        ),
+    ],
+    int_time: Annotated[
+        int,
+        typer.Option(
+            "--int-time",
+            "-t",
+            help="Set the integration time of the device in microseconds.",
+        ),
+    ] = 100_000,
+    count: Annotated[
+        int | None,
+        typer.Option("--count", "-c", min=1, help="Number of spectra to analyze."),
+    ] = None,
+    mode: Annotated[
+        MeasurementMode,
+        typer.Option(
+            "--mode",
+            "-m",
+            help="Calculate the bands of this quantity, using the stored dark and "
+            "reference spectra for the integration time.",
+        ),
+    ] = MeasurementMode.INTENSITY,
+    average: Annotated[
+        bool,
+        typer.Option(
+            "--average",
+            help="Calculate the mean value in each band instead of the integral "
+            "over wavelength.",
+        ),
+    ] = False,
+    graph: Annotated[
+        bool,
+        typer.Option(help="Plot the time series in a graph in the terminal."),
+    ] = True,
+    process: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--process",
+            "-p",
+            help="Apply a processing stage after calculating the quantity: "
+            "boxcar=WIDTH, savgol=WINDOW,ORDER, gaussian=SIGMA (in pixels), "
+            "baseline=START-STOP or normalize[=START-STOP]. Repeat to apply "
+            "several stages in order.",
+        ),
+    ] = None,
+    output: Annotated[
+        typer.FileTextWrite | None,
+        typer.Option(
+            "--output",
+            "-o",
+            help="Write the time series to a CSV file, or a TSV file if the name "
+            "ends in .tsv or .txt.",
+        ),
+    ] = None,
+    precision: Annotated[
+        int,
+        typer.Option(min=1, help="Number of significant digits in the output file."),
+    ] = DEFAULT_PRECISION,
+) -> None:
+    """Monitor the integrated intensity of wavelength bands over time.
+
+    Spectra are acquired continuously and reduced to a single value per band,
+    at the full frame rate of the device. A pixel which lies partly inside a
+    band contributes in proportion to its overlap with the band. The latest
+    values are shown in a table. Monitoring stops after the given number of
+    spectra or when pressing Ctrl-C.
+    """
+    from rich.live import Live
+
+    try:
+        band_list = [Band.parse(text) for text in band_definitions]
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="BANDS")
+    experiment = open_experiment()
+    experiment.set_integration_time(int_time)
+    experiment.set_measurement_mode(mode)
+    set_processing(experiment, process)
+    timestamps: list[float] = []
+    rows: list[np.ndarray] = []
+
+    def band_table() -> Table:
+        table = Table("Band", MODE_LABELS[mode], title=f"Spectrum {len(rows)}")
+        for band, value in zip(band_list, rows[-1]):
+            table.add_row(band.name, f"{value:.6g}")
+        return table
+
+    last_refresh = 0.0
+    try:
+        with Live(auto_refresh=False) as live:
+            try:
+                for timestamp, band_values in experiment.track_bands(
+                    band_list, count, average
+                ):
+                    timestamps.append(timestamp)
+                    rows.append(band_values)
+                    if timestamp - last_refresh >= LIVE_REFRESH_INTERVAL:
+                        last_refresh = timestamp
+                        live.update(band_table(), refresh=True)
+            except KeyboardInterrupt:
+                pass
+            if rows:
+                live.update(band_table(), refresh=True)
+    except (ValueError, ReferenceNotAvailableError) as exc:
+        print(f"[red]{exc}")
+        raise typer.Abort()
+
+    if not rows:
+        return
+    times = np.array(timestamps) - timestamps[0]
+    values = np.array(rows)
+    if graph:
+        import plotext
+
+        plotext.theme("clear")
+        for band, column in zip(band_list, values.T):
+            plotext.plot(times, column, marker="braille", label=band.name)
+        plotext.xlabel("Time (s)")
+        plotext.ylabel(MODE_LABELS[mode])
+        plotext.show()
+
+    if output:
+        write_bands(output, [band.name for band in band_list], times, values, precision)
+        print(f"Data written to [bold]{output.name}[/] successfully.")
+
+
+@app.command()
+def record(
+    output: Annotated[
+        pathlib.Path,
+        typer.Option("--output", "-o", help="Write the recording to this file."),
+    ],
+    int_time: Annotated[
+        int,
+        typer.Option(
+            "--int-time",
+            "-t",
+            help="Set the integration time of the device in microseconds.",
+        ),
+    ] = 100_000,
+    count: Annotated[
+        int | None,
+        typer.Option("--count", "-c", help="Number of spectra to record."),
+    ] = None,
+    duration: Annotated[
+        float | None,
+        typer.Option("--duration", "-d", help="Duration of the recording in seconds."),
+    ] = None,
+    stats: Annotated[
+        bool,
+        typer.Option(
+            "--stats", help="Show timing statistics of the acquisition afterwards."
+        ),
+    ] = False,
+) -> None:
+    """Record a series of raw spectra to a binary file.
+
+    Spectra are acquired continuously at the full frame rate of the device and
+    streamed to disk, together with a timestamp and the integration time of
+    each spectrum. Recording stops after the given number of spectra or
+    duration, or when pressing Ctrl-C.
+    """
+    from rich.progress import Progress
+
+    experiment = open_experiment()
+    experiment.set_integration_time(int_time)
+    if stats:
+        experiment.device.stats = AcquisitionStats()
+    # convert monotonic timestamps of the frames to UNIX time
+    time_offset = time.time() - time.monotonic()
+
+    engine = AcquisitionEngine(experiment.device)
+    with (
+        RecordingWriter(output, experiment.device.config) as writer,
+        Progress(transient=True) as progress,
+    ):
+        task = progress.add_task("Recording...", total=count)
+        engine.start()
+        t_stop = time.monotonic() + duration if duration is not None else None
+        try:
+            while count is None or writer.frames_written < count:
+                frame = engine.next_frame()
+                writer.append(frame.data, frame.timestamp + time_offset, int_time)
+                progress.advance(task)
+                if t_stop is not None and frame.timestamp >= t_stop:
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            engine.stop()
+
+    print(
+        f"Recorded {writer.frames_written} spectra to [bold]{output.name}[/], "
+        f"{engine.dropped_frames} spectra were dropped."
+    )
+    if stats:
+        print_stats(experiment.device.stats)
+
+
+@app.command()
+def export(
+    recording: Annotated[
+        pathlib.Path, typer.Argument(help="The recording file to export.")
+    ],
+    output: Annotated[
+        pathlib.Path,
+        typer.Option(
+            "--output",
+            "-o",
+            help="Write the spectra to a CSV file, or a TSV file if the name "
+            "ends in .tsv or .txt.",
+        ),
+    ],
+    precision: Annotated[
+        int,
+        typer.Option(min=1, help="Number of significant digits in the output file."),
+    ] = DEFAULT_PRECISION,
+) -> None:
+    """Export a recording as a table of calibrated spectra.
+
+    The first column contains the wavelengths, followed by one column for each
+    spectrum in the recording.
+    """
+    data = Recording(recording)
+    # label columns with the time since the start of the recording
+    timestamps = data.timestamps - data.timestamps[:1].sum()
+    write_time_series(output, data.wavelengths, data.spectra(), timestamps, precision)
+    print(f"{len(data)} spectra written to [bold]{output.name}[/] successfully.")
+
+
+@app.command()
+def serve(
+    host: Annotated[
+        str, typer.Option(help="The host name or IP address to listen on.")
+    ] = "127.0.0.1",
+    port: Annotated[
+        int | None,
+        typer.Option(help="The TCP port to listen on.", show_default="7417"),
+    ] = None,
+    unix: Annotated[
+        pathlib.Path | None,
+        typer.Option(help="Listen on this Unix socket instead of a TCP port."),
+    ] = None,
+    int_time: Annotated[
+        int,
+        typer.Option(
+            "--int-time",
+            "-t",
+            help="Set the initial integration time of the device in microseconds.",
+        ),
+    ] = 100_000,
+) -> None:
+    """Publish spectra to other processes over a local socket.
+
+    The device is read continuously and the raw spectra are sent to all
+    connected clients, e.g. other instances of this program using the --connect
+    option. Slow clients receive fewer spectra instead of stalling the
+    acquisition. Stop the server by pressing Ctrl-C.
+    """
+    import asyncio
+
+    from ocean_optics.streaming import DEFAULT_PORT, SpectrumServer
+
+    if port is None:
+        port = DEFAULT_PORT
+    experiment = open_experiment()
+    experiment.set_integration_time(int_time)
+    server = SpectrumServer(experiment.device)
+    address = unix if unix is not None else f"{host}:{port}"
+    print(
+        f"Serving spectra of {experiment.device.config.serial_number} on "
+        f"[bold]{address}[/]. Press Ctrl-C to stop."
+    )
+    try:
+        asyncio.run(server.serve(host, port, unix))
+    except KeyboardInterrupt:
+        pass
+    print(f"Stopped, {server.dropped_frames} spectra were dropped for slow clients.")
+
+
+@app.command()
+def gui() -> None:
     """Run the GUI spectroscopy application."""
-    ocean_optics.gui.main()
+    import ocean_optics.gui
+
+    if options.serial == "all":
+        raise typer.BadParameter(
+            "The GUI requires a single device.", param_hint="--serial"
+        )
+    ocean_optics.gui.main(
+        simulate=options.simulate,
+        connect=options.connect,
+        replay=options.replay,
+        replay_speed=options.replay_speed or None,
+        serial_number=options.serial,
+        refresh_config=options.refresh_config,
+    )
+
+
+def set_processing(experiment: SpectroscopyExperiment, specs: list[str] | None) -> None:
+    """Set the processing stages given by the --process options.
 
+    Raises:
+        typer.BadParameter: a stage is invalid.
+    """
+    try:
+        experiment.set_processing_stages([parse_stage(spec) for spec in specs or []])
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="--process")
 
-def open_experiment():
+
+def open_experiment() -> SpectroscopyExperiment:
     """Open the spectroscopy experiment.
 
     Connect to an available spectropy device.
@@ -195,28 +1142,122 @@ def open_experiment():
     Returns:
         An `ocean_optics.Spectroscopy` instance.
     """
+    if options.serial == "all":
+        raise typer.BadParameter(
+            "This command requires a single device.", param_hint="--serial"
+        )
+    return open_experiments()[0]
+
+
+def open_experiments() -> list[SpectroscopyExperiment]:
+    """Open the spectroscopy experiments of the selected devices.
+
+    Raises:
+        typer.Abort: An error occured opening the experiments.
+    """
     try:
-        experiment = SpectroscopyExperiment()
+        experiments = create_experiments()
     except DeviceNotFoundError:
         print("[red]No compatible device found.")
         raise typer.Abort()
-    return experiment
+    return experiments
+
+
+def create_experiments() -> list[SpectroscopyExperiment]:
+    """Create the spectroscopy experiments of the selected devices.
+
+    Opens the device with the serial number given by the --serial option, all
+    connected devices if it is 'all', or else the first connected device. Uses
+    a simulated device if the --simulate option was given, a server if the
+    --connect option was given, a replay of saved spectra if the --replay
+    option was given, and ignores the cached device configuration if
+    --refresh-config was given.
+
+    Raises:
+        DeviceNotFoundError: no (matching) compatible device is connected.
+    """
+    serial = options.serial
+    if options.connect:
+        from ocean_optics.streaming import SpectrumClient
+
+        try:
+            client = SpectrumClient(options.connect)
+        except OSError as exc:
+            print(f"[red]Can't connect to server: {exc}")
+            raise typer.Abort()
+        devices = [OceanOpticsUSB2000Plus(client, use_cache=False)]
+    elif options.replay:
+        from ocean_optics.replay import ReplayDevice
+
+        try:
+            replay = ReplayDevice.from_file(
+                options.replay, options.replay_speed or None
+            )
+        except ValueError as exc:
+            print(f"[red]Can't replay {options.replay}: {exc}")
+            raise typer.Abort()
+        devices = [OceanOpticsUSB2000Plus(replay, use_cache=False)]
+    elif options.simulate:
+        devices = [
+            OceanOpticsUSB2000Plus(
+                SimulatedDevice()
+                if serial in (None, "all")
+                else SimulatedDevice(serial_number=serial),
+                refresh_cache=options.refresh_config,
+            )
+        ]
+    else:
+        serials = list_devices() if serial == "all" else [serial]
+        if not serials:
+            raise DeviceNotFoundError()
+        devices = [
+            OceanOpticsUSB2000Plus(
+                serial_number=serial, refresh_cache=options.refresh_config
+            )
+            for serial in serials
+        ]
+    return [SpectroscopyExperiment(device) for device in devices]
+
+
+def print_stats(stats: AcquisitionStats | None, title: str | None = None) -> None:
+    """Print the timing statistics of the acquisition.
+
+    Args:
+        stats: the statistics, or None if they were not recorded.
+        title: an optional title of the table.
+    """
+    if stats is None:
+        return
+    columns = ["mean", "p50", "p90", "p99", "max"]
+    table = Table(
+        "Stage", "Count", *(f"{column} (ms)" for column in columns), title=title
+    )
+    for stage, summary in stats.summary().items():
+        table.add_row(
+            stage,
+            str(summary["count"]),
+            *(f"{summary[column] * 1e3:.3f}" for column in columns),
+        )
+    print(table)
+    counters = "".join(f", {count} {name}" for name, count in stats.counters.items())
+    print(f"{stats.frames} frames read at {stats.frame_rate:.1f} frames/s{counters}.")
 
 
 def save_spectrum(
-    path: pathlib.Path, wavelengths: np.ndarray, intensities: np.ndarray
+    path: typer.FileTextWrite | pathlib.Path,
+    wavelengths: np.ndarray,
+    columns: dict[str, np.ndarray],
+    precision: int = DEFAULT_PRECISION,
 ) -> None:
-    """Save spectrum data to a file as CSV.
+    """Save spectrum data to a file as CSV or TSV.
 
     Args:
-        path: The path of the output file.
+        path: The output file.
         wavelengths: The wavelength values.
-        intensities: The intensity data.
+        columns: The names and values of the intensity data columns.
+        precision: The number of significant digits.
     """
-    writer = csv.writer(path)
-    writer.writerow(["Wavelength (nm)", "Intensity"])
-    for wavelength, intensity in zip(wavelengths, intensities):
-        writer.writerow([wavelength, intensity])
+    write_spectra(path, wavelengths, columns, precision)
     print(f"Data written to [bold]{path.name}[/] successfully.")
 
 
@@ -0,0 +1,118 @@
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from ocean_optics.usb2000plus import DeviceConfiguration
+
+__all__ = ["SpectrumCorrection"]
+
+
+class SpectrumCorrection:
+    """Nonlinearity and stray light correction of raw spectra.
+
+    The detector response is not perfectly linear. The device stores the
+    coefficients of a polynomial which gives the ratio of measured to true
+    counts as a function of the measured counts, after subtracting the
+    baseline. The baseline is estimated from the optically masked dark pixels
+    of each spectrum. The stray light correction subtracts a fraction, given
+    by the stray light constant, of the mean signal from every pixel.
+
+    All coefficients are prepared once and the correction is calculated in
+    place in preallocated buffers, so it can be applied to every frame at the
+    full frame rate of the device.
+    """
+
+    def __init__(
+        self,
+        nonlinearity_coefficients: Sequence[float] | None,
+        stray_light_constant: float | None,
+        num_pixels: int,
+        num_dark_pixels: int,
+    ) -> None:
+        """Initialize the correction.
+
+        Args:
+            nonlinearity_coefficients: the nonlinearity polynomial coefficients,
+                lowest order first, or None to disable the nonlinearity
+                correction.
+            stray_light_constant: the stray light constant, or None to disable
+                the stray light correction.
+            num_pixels: the number of pixels in a raw spectrum.
+            num_dark_pixels: the number of dark pixels at the start of a raw
+                spectrum, which are not part of the corrected spectrum.
+        """
+        self.num_dark_pixels = num_dark_pixels
+        # highest order first, for evaluation using Horner's method
+        self._coefficients = (
+            None
+            if nonlinearity_coefficients is None
+            else [float(c) for c in reversed(nonlinearity_coefficients)]
+        )
+        self._stray_light = stray_light_constant or None
+        size = num_pixels - num_dark_pixels
+        self._factor = np.empty(size)
+
+    @classmethod
+    def from_configuration(
+        cls,
+        config: "DeviceConfiguration",
+        num_pixels: int,
+        num_dark_pixels: int,
+        nonlinearity: bool = True,
+        stray_light: bool = True,
+    ) -> "SpectrumCorrection":
+        """Create a correction from a device configuration.
+
+        Args:
+            config: the `DeviceConfiguration` of the device.
+            num_pixels: the number of pixels in a raw spectrum.
+            num_dark_pixels: the number of dark pixels in a raw spectrum.
+            nonlinearity: whether to correct for nonlinearity.
+            stray_light: whether to correct for stray light.
+        """
+        order = config.polynomial_order_nonlinearity_calibration
+        coefficients = config.nonlinearity_correction_coefficients[: order + 1]
+        return cls(
+            nonlinearity_coefficients=coefficients if nonlinearity else None,
+            stray_light_constant=config.stray_light_constant if stray_light else None,
+            num_pixels=num_pixels,
+            num_dark_pixels=num_dark_pixels,
+        )
+
+    def apply(
+        self, data: np.ndarray, out: np.ndarray | None = None, scans: int = 1
+    ) -> np.ndarray:
+        """Correct a raw spectrum.
+
+        Args:
+            data: the raw spectrum including dark pixels, or the sum of several
+                raw spectra.
+            out: an optional float array to store the corrected counts in,
+                excluding dark pixels.
+            scans: the number of raw spectra summed in `data`.
+
+        Returns:
+            The corrected counts per scan, excluding dark pixels.
+        """
+        baseline = data[: self.num_dark_pixels].mean() / scans
+        counts: np.ndarray = np.multiply(
+            data[self.num_dark_pixels :], 1 / scans, out=out
+        )
+        counts -= baseline
+
+        if self._coefficients is not None:
+            # evaluate the polynomial in place using Horner's method
+            factor = self._factor
+            factor.fill(self._coefficients[0])
+            for coefficient in self._coefficients[1:]:
+                factor *= counts
+                factor += coefficient
+            counts /= factor
+
+        if self._stray_light is not None:
+            counts -= self._stray_light * counts.mean()
+
+        counts += baseline
+        return counts
@@ -0,0 +1,191 @@
+import contextlib
+import csv
+import pathlib
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from typing import TextIO
+
+import numpy as np
+
+from ocean_optics.peaks import Peaks
+
+__all__ = ["write_bands", "write_peaks", "write_spectra", "write_time_series"]
+
+DEFAULT_PRECISION = 10
+# Number of rows formatted at once. Limits memory use for large tables.
+CHUNK_ROWS = 1024
+
+
+def write_spectra(
+    file: TextIO | pathlib.Path | str,
+    wavelengths: np.ndarray,
+    columns: Mapping[str, np.ndarray],
+    precision: int = DEFAULT_PRECISION,
+    delimiter: str | None = None,
+) -> None:
+    """Write spectra to a CSV or TSV file.
+
+    The first column contains the wavelengths, followed by one column for each
+    item in `columns`, e.g. intensities, a dark reference or the standard
+    error. All values are formatted in a single vectorized pass per block of
+    rows instead of one call per value.
+
+    Args:
+        file: an open text file or the path of the output file.
+        wavelengths: the wavelength values.
+        columns: the column names and their values, which must have the same
+            length as `wavelengths`.
+        precision: the number of significant digits.
+        delimiter: the column delimiter. By default, a tab is used for files
+            ending in '.tsv' or '.txt' and a comma otherwise.
+    """
+    data = [np.asarray(wavelengths), *(np.asarray(v) for v in columns.values())]
+    blocks = (
+        np.column_stack([column[start : start + CHUNK_ROWS] for column in data])
+        for start in range(0, len(wavelengths), CHUNK_ROWS)
+    )
+    _write_table(file, ["Wavelength (nm)", *columns], blocks, precision, delimiter)
+
+
+def write_time_series(
+    file: TextIO | pathlib.Path | str,
+    wavelengths: np.ndarray,
+    spectra: np.ndarray,
+    timestamps: np.ndarray | None = None,
+    precision: int = DEFAULT_PRECISION,
+    delimiter: str | None = None,
+) -> None:
+    """Write a series of spectra to a CSV or TSV file.
+
+    The first column contains the wavelengths, followed by one column for each
+    spectrum. Large series, e.g. memory-mapped recordings, are processed in
+    blocks of rows, so they are never converted to text all at once.
+
+    Args:
+        file: an open text file or the path of the output file.
+        wavelengths: the wavelength values.
+        spectra: a (frames, pixels) array of intensities.
+        timestamps: the timestamps of the spectra, used as column names. By
+            default, the columns are numbered.
+        precision: the number of significant digits.
+        delimiter: the column delimiter, see `write_spectra()`.
+    """
+    if timestamps is None:
+        header = [f"Spectrum {idx}" for idx in range(len(spectra))]
+    else:
+        header = [f"t = {timestamp:.6f} s" for timestamp in timestamps]
+    blocks = (
+        np.column_stack(
+            (
+                wavelengths[start : start + CHUNK_ROWS],
+                spectra[:, start : start + CHUNK_ROWS].T,
+            )
+        )
+        for start in range(0, len(wavelengths), CHUNK_ROWS)
+    )
+    _write_table(file, ["Wavelength (nm)", *header], blocks, precision, delimiter)
+
+
+def write_peaks(
+    file: TextIO | pathlib.Path | str,
+    peaks: Iterable[Peaks],
+    precision: int = DEFAULT_PRECISION,
+    delimiter: str | None = None,
+) -> None:
+    """Write the peaks of a series of spectra to a CSV or TSV file.
+
+    Each row contains the time of the spectrum since the first spectrum, the
+    identity of the peak and its wavelength, height and FWHM.
+
+    Args:
+        file: an open text file or the path of the output file.
+        peaks: the peaks of each spectrum, e.g. from
+            `SpectroscopyExperiment.track_peaks()`.
+        precision: the number of significant digits.
+        delimiter: the column delimiter, see `write_spectra()`.
+    """
+
+    def blocks() -> Iterator[np.ndarray]:
+        start = None
+        for frame in peaks:
+            if start is None:
+                start = frame.timestamp
+            yield np.column_stack(
+                (
+                    np.full(len(frame), frame.timestamp - start),
+                    frame.ids,
+                    frame.wavelengths,
+                    frame.heights,
+                    frame.fwhms,
+                )
+            )
+
+    header = ["Time (s)", "Peak", "Wavelength (nm)", "Height", "FWHM (nm)"]
+    _write_table(file, header, blocks(), precision, delimiter)
+
+
+def write_bands(
+    file: TextIO | pathlib.Path | str,
+    names: Sequence[str],
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    precision: int = DEFAULT_PRECISION,
+    delimiter: str | None = None,
+) -> None:
+    """Write a time series of band values to a CSV or TSV file.
+
+    The first column contains the time since the first spectrum, followed by
+    one column for each band.
+
+    Args:
+        file: an open text file or the path of the output file.
+        names: the names of the bands.
+        timestamps: the timestamps of the spectra.
+        values: a (frames, bands) array of band values, e.g. from
+            `SpectroscopyExperiment.track_bands()`.
+        precision: the number of significant digits.
+        delimiter: the column delimiter, see `write_spectra()`.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if len(timestamps):
+        timestamps = timestamps - timestamps[0]
+    values = np.asarray(values).reshape(len(timestamps), len(names))
+    blocks = (
+        np.column_stack(
+            (timestamps[start : start + CHUNK_ROWS], values[start : start + CHUNK_ROWS])
+        )
+        for start in range(0, len(timestamps), CHUNK_ROWS)
+    )
+    _write_table(file, ["Time (s)", *names], blocks, precision, delimiter)
+
+
+def _write_table(
+    file: TextIO | pathlib.Path | str,
+    header: list[str],
+    blocks: Iterable[np.ndarray],
+    precision: int,
+    delimiter: str | None,
+) -> None:
+    """Write a table, given as 2D blocks of rows, to a text file."""
+    if delimiter is None:
+        delimiter = _default_delimiter(file)
+    row_format = delimiter.join([f"%.{precision}g"] * len(header)) + "\n"
+    with _open(file) as f:
+        # quote column names which contain the delimiter, e.g. band names
+        csv.writer(f, delimiter=delimiter, lineterminator="\n").writerow(header)
+        for block in blocks:
+            f.write((row_format * len(block)) % tuple(block.ravel().tolist()))
+
+
+def _default_delimiter(file: TextIO | pathlib.Path | str) -> str:
+    name = file if isinstance(file, (str, pathlib.Path)) else getattr(file, "name", "")
+    return "\t" if pathlib.Path(str(name)).suffix in (".tsv", ".txt") else ","
+
+
+@contextlib.contextmanager
+def _open(file: TextIO | pathlib.Path | str) -> Iterator[TextIO]:
+    """Open a path for writing, or use an already opened file."""
+    if isinstance(file, (str, pathlib.Path)):
+        with open(file, "w", newline="") as f:
+            yield f
+    else:
+        yield file
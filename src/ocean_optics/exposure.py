@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from ocean_optics.usb2000plus import (
+    MAX_INTEGRATION_TIME,
+    MIN_INTEGRATION_TIME,
+    NUM_DARK_PIXELS,
+    OceanOpticsUSB2000Plus,
+)
+
+__all__ = ["ExposureResult", "auto_exposure", "peak_fraction"]
+
+# Below this peak fraction the signal is too weak to scale the integration time
+# linearly, since the peak may be just noise.
+MIN_SIGNAL_FRACTION = 0.01
+# Maximum factor by which the integration time is changed in a single step.
+MAX_STEP = 10.0
+
+
+@dataclass
+class ExposureResult:
+    """The result of an auto-exposure run.
+
+    Attributes:
+        integration_time: the final integration time in microseconds.
+        peak_fraction: the peak height of the last spectrum as a fraction of
+            the saturation level, after subtracting the dark level.
+        iterations: the number of spectra used.
+        converged: whether the peak fraction is within the tolerance of the
+            target.
+    """
+
+    integration_time: int
+    peak_fraction: float
+    iterations: int
+    converged: bool
+
+
+def peak_fraction(raw: np.ndarray, saturation_level: float) -> float:
+    """Return the peak height of a raw spectrum as a fraction of saturation.
+
+    The dark level is estimated from the optically masked dark pixels and
+    subtracted from both the peak and the saturation level.
+
+    Args:
+        raw: a raw spectrum, including the dark pixels.
+        saturation_level: the maximum raw count of a pixel.
+    """
+    baseline = float(raw[:NUM_DARK_PIXELS].mean())
+    peak = float(raw[NUM_DARK_PIXELS:].max())
+    return (peak - baseline) / (saturation_level - baseline)
+
+
+def auto_exposure(
+    device: OceanOpticsUSB2000Plus,
+    target: float = 0.8,
+    tolerance: float = 0.05,
+    max_iterations: int = 10,
+) -> ExposureResult:
+    """Find the integration time for which the peak reaches a target level.
+
+    The detector response is linear in the integration time, so as long as the
+    spectrum is not saturated the next integration time follows from scaling
+    the current one, which usually converges in two or three spectra. A
+    saturated spectrum only gives a lower bound on the signal, so then the
+    integration time is reduced by a fixed factor. A spectrum without
+    significant signal is handled likewise by increasing it.
+
+    Spectra which were integrated using a previous integration time are
+    discarded by the driver, so every spectrum used to adjust the integration
+    time was measured at the integration time it is attributed to.
+
+    Args:
+        device: the spectrometer. Its integration time is left at the final
+            value.
+        target: the desired peak height as a fraction of the saturation level.
+        tolerance: the accepted absolute deviation from the target fraction.
+        max_iterations: the maximum number of spectra to measure.
+
+    Returns:
+        The final integration time and whether it converged.
+    """
+    if not 0 < target < 1:
+        raise ValueError("The target must be between 0 and 1.")
+    saturation_level = float(device.config.saturation_level)
+    integration_time = device.get_integration_time()
+    for iteration in range(1, max_iterations + 1):
+        raw = device.get_raw_spectrum()
+        fraction = peak_fraction(raw, saturation_level)
+        if abs(fraction - target) <= tolerance:
+            return ExposureResult(integration_time, fraction, iteration, True)
+        if iteration == max_iterations:
+            break
+
+        if raw[NUM_DARK_PIXELS:].max() >= saturation_level:
+            scale = 1 / MAX_STEP**0.5
+        elif fraction < MIN_SIGNAL_FRACTION:
+            scale = MAX_STEP
+        else:
+            scale = min(target / fraction, MAX_STEP)
+        new_integration_time = int(
+            np.clip(
+                round(integration_time * scale),
+                MIN_INTEGRATION_TIME,
+                MAX_INTEGRATION_TIME,
+            )
+        )
+        if new_integration_time == integration_time:
+            # the target can't be reached within the range of the device
+            break
+        integration_time = new_integration_time
+        device.set_integration_time(integration_time)
+    return ExposureResult(integration_time, fraction, iteration, False)
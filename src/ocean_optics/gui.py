@@ -1,23 +1,55 @@
-import csv
+import pathlib
 import sys
+import threading
+import time
 
 import numpy as np
 import pyqtgraph as pg
-from PySide6 import QtCore, QtWidgets
+from PySide6 import QtCore, QtGui, QtWidgets
 from PySide6.QtCore import Slot
 
+from ocean_optics.acquisition import AcquisitionEngine
+from ocean_optics.export import write_spectra
+from ocean_optics.instrumentation import AcquisitionStats
+from ocean_optics.peaks import PeakFinder, PeakTracker
+from ocean_optics.pipeline import parse_stages
+from ocean_optics.replay import ReplayDevice
+from ocean_optics.simulation import SimulatedDevice
 from ocean_optics.spectroscopy import SpectroscopyExperiment
+from ocean_optics.streaming import SpectrumClient
 from ocean_optics.ui_main_window import Ui_MainWindow
+from ocean_optics.usb2000plus import OceanOpticsUSB2000Plus
 
 # PyQtGraph global options
 pg.setConfigOption("background", "w")
 pg.setConfigOption("foreground", "k")
 
+# Refresh rate of the plot if the refresh rate of the display is unknown
+DEFAULT_REFRESH_RATE = 60.0
+
 
 class MeasurementWorker(QtCore.QThread):
-    new_data = QtCore.Signal(np.ndarray, np.ndarray)
+    """Base class of the measurement workers.
+
+    Workers publish their latest data in a shared slot, available from
+    `take_latest()`, and emit `new_data` only when the slot was empty. The data
+    itself is not sent with the signal, so signals can't pile up in the event
+    loop when the user interface is slower than the measurement. Data which is
+    replaced before it was taken is counted in `coalesced_frames`.
+    """
+
+    # notification that new data is available from take_latest()
+    new_data = QtCore.Signal()
     stopped = False
 
+    published_frames = 0
+    coalesced_frames = 0
+
+    def __init__(self, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._latest: tuple[np.ndarray, np.ndarray] | None = None
+
     def setup(self, experiment: SpectroscopyExperiment) -> None:
         self.experiment = experiment
 
@@ -26,6 +58,40 @@ class MeasurementWorker(QtCore.QThread):
     def stop(self) -> None:
         self.stopped = True
 
+    @property
+    def dropped_frames(self) -> int:
+        """The number of frames lost by the device before they were read."""
+        return 0
+
+    def reset(self) -> None:
+        """Reset the shared slot and the frame counters."""
+        self.stopped = False
+        with self._lock:
+            self._latest = None
+            self.published_frames = self.coalesced_frames = 0
+
+    def publish(self, wavelengths: np.ndarray, intensities: np.ndarray) -> None:
+        """Publish new data, replacing data which has not yet been taken."""
+        with self._lock:
+            notify = self._latest is None
+            if not notify:
+                self.coalesced_frames += 1
+            self._latest = wavelengths, intensities
+            self.published_frames += 1
+        if notify:
+            self.new_data.emit()
+
+    def take_latest(self) -> tuple[np.ndarray, np.ndarray] | None:
+        """Return the latest data and empty the slot.
+
+        Returns:
+            A tuple of wavelength, intensity data, or None if no new data has
+            been published since the last call.
+        """
+        with self._lock:
+            latest, self._latest = self._latest, None
+        return latest
+
 
 class IntegrateSpectrumWorker(MeasurementWorker):
     progress = QtCore.Signal(int)
@@ -33,37 +99,59 @@ class IntegrateSpectrumWorker(MeasurementWorker):
     def setup(
         self,
         experiment: SpectroscopyExperiment,
-        count: int,
+        count: int = 1,
     ) -> None:
         self.experiment = experiment
         self.count = count
 
     def run(self) -> None:
-        self.stopped = False
+        self.reset()
         for idx, (wavelengths, intensities) in enumerate(
             self.experiment.integrate_spectrum(self.count), start=1
         ):
-            self.new_data.emit(wavelengths, intensities)
+            # the running sum is updated in place, so publish a copy
+            self.publish(wavelengths, intensities.copy())
             self.progress.emit(idx)
             if self.stopped:
                 self.experiment.stopped = True
 
 
 class ContinuousSpectrumWorker(MeasurementWorker):
+    engine: AcquisitionEngine | None = None
+
+    @property
+    def dropped_frames(self) -> int:
+        return self.engine.dropped_frames if self.engine else 0
+
     def run(self) -> None:
-        self.stopped = False
-        while True:
-            wavelengths, intensities = self.experiment.get_spectrum()
-            self.new_data.emit(wavelengths, intensities)
-            if self.stopped:
-                break
+        self.reset()
+        # Acquire in the background so that the device keeps measuring while
+        # the previous spectrum is being plotted.
+        self.engine = AcquisitionEngine(self.experiment.device)
+        with self.engine as engine:
+            while not self.stopped:
+                frame = engine.next_frame()
+                wavelengths, intensities = engine.calibrate(frame)
+                self.experiment.process_spectrum(intensities, out=intensities)
+                self.publish(wavelengths, intensities)
 
 
 class UserInterface(QtWidgets.QMainWindow):
     _wavelengths: np.ndarray | None = None
     _intensities: np.ndarray | None = None
-
-    def __init__(self):
+    _peak_finder: PeakFinder | None = None
+
+    # new data which has not yet been plotted
+    _pending = False
+    # the worker of the current or last measurement
+    _worker: MeasurementWorker | None = None
+    # plot statistics since the last update of the status bar
+    _frames_drawn = 0
+    _frames_skipped = 0
+    _frames_published = 0
+    _coalesced_frames = 0
+
+    def __init__(self, experiment: SpectroscopyExperiment | None = None):
         super().__init__()
 
         # Load UI
@@ -72,14 +160,59 @@ class UserInterface(QtWidgets.QMainWindow):
 
         # Slots and signals
         self.ui.integration_time.valueChanged.connect(self.set_integration_time)
+        self.ui.nonlinearity_correction.toggled.connect(self.set_corrections)
+        self.ui.stray_light_correction.toggled.connect(self.set_corrections)
+        self.ui.processing.editingFinished.connect(self.set_processing)
+        self.ui.show_peaks.toggled.connect(self.set_peaks)
+        self.ui.show_statistics.toggled.connect(self.set_statistics)
         self.ui.single_button.clicked.connect(self.single_measurement)
         self.ui.integrate_button.clicked.connect(self.integrate_spectrum)
         self.ui.continuous_button.clicked.connect(self.continuous_spectrum)
         self.ui.stop_button.clicked.connect(self.stop_measurement)
         self.ui.save_button.clicked.connect(self.save_data)
 
+        # Plot
+        self.ui.plot_widget.setLabel("left", "Intensity")
+        self.ui.plot_widget.setLabel("bottom", "Wavelength (nm)")
+        self.ui.plot_widget.setLimits(yMin=0)
+        # A single curve is updated for each spectrum. Only the visible part of
+        # the spectrum is drawn, downsampled to the width of the plot in pixels
+        # while keeping the minimum and maximum of each group of pixels, so
+        # that narrow peaks remain visible.
+        self._curve = self.ui.plot_widget.plot(
+            pen={"color": "k", "width": 5},
+            autoDownsample=True,
+            downsampleMethod="peak",
+            clipToView=True,
+        )
+        # Markers at the top of the peaks, with the peak number and fitted
+        # parameters shown when hovering over a marker.
+        self._peak_markers = pg.ScatterPlotItem(
+            symbol="t",
+            size=12,
+            pen=None,
+            brush="r",
+            hoverable=True,
+            tip="Peak {data[0]:d}\n{x:.3f} nm, FWHM {data[1]:.3f} nm".format,
+        )
+        self.ui.plot_widget.addItem(self._peak_markers)
+        self._peak_tracker = PeakTracker()
+        # Spectra arriving faster than the display refresh rate are coalesced,
+        # so that only the latest spectrum is drawn.
+        screen = QtGui.QGuiApplication.primaryScreen()
+        refresh_rate = (screen.refreshRate() if screen else 0) or DEFAULT_REFRESH_RATE
+        self._redraw_timer = QtCore.QTimer(self)
+        self._redraw_timer.setInterval(round(1000 / refresh_rate))
+        self._redraw_timer.timeout.connect(self.redraw)
+        self._plot_stats = QtWidgets.QLabel()
+        self.ui.statusbar.addPermanentWidget(self._plot_stats)
+        self._stats_time = time.monotonic()
+        self.ui.statistics.setFont(
+            QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.SystemFont.FixedFont)
+        )
+
         # Open device
-        self.experiment = SpectroscopyExperiment()
+        self.experiment = experiment or SpectroscopyExperiment()
         self.experiment.set_integration_time(self.ui.integration_time.value())
 
         # Workers
@@ -95,11 +228,75 @@ class UserInterface(QtWidgets.QMainWindow):
     def set_integration_time(self, value: int) -> None:
         self.experiment.set_integration_time(value)
 
+    @Slot()
+    def set_corrections(self) -> None:
+        self.experiment.set_corrections(
+            nonlinearity=self.ui.nonlinearity_correction.isChecked(),
+            stray_light=self.ui.stray_light_correction.isChecked(),
+        )
+
+    @Slot()
+    def set_processing(self) -> None:
+        """Apply the processing stages entered by the user."""
+        try:
+            stages = parse_stages(self.ui.processing.text())
+            self.experiment.set_processing_stages(stages)
+        except ValueError as exc:
+            self.ui.statusbar.showMessage(str(exc))
+        else:
+            self.ui.statusbar.clearMessage()
+
+    @Slot()
+    def set_peaks(self, enabled: bool) -> None:
+        """Show or hide the markers of the peaks in the spectrum."""
+        self._peak_tracker.reset()
+        if enabled and self._wavelengths is not None:
+            self.update_peaks()
+        else:
+            self._peak_markers.clear()
+
+    def update_peaks(self) -> None:
+        """Find and track the peaks in the current data and mark them."""
+        if self._wavelengths is None or self._intensities is None:
+            return
+        finder = self._peak_finder
+        # the finder precalculates the dispersion of the wavelength axis
+        if finder is None or finder.wavelengths is not self._wavelengths:
+            finder = self._peak_finder = PeakFinder(self._wavelengths)
+        peaks = self._peak_tracker.update(finder.find(self._intensities))
+        self._peak_markers.setData(
+            x=peaks.wavelengths,
+            y=peaks.baseline + peaks.heights,
+            data=list(zip(peaks.ids, peaks.fwhms)),
+        )
+
+    @Slot()
+    def set_statistics(self, enabled: bool) -> None:
+        """Enable or disable the timing statistics of the acquisition."""
+        self.experiment.device.stats = AcquisitionStats() if enabled else None
+        self.update_statistics()
+
+    def update_statistics(self) -> None:
+        """Show the latency percentiles of each stage and the frame rate."""
+        stats = self.experiment.device.stats
+        if stats is None:
+            self.ui.statistics.clear()
+            return
+        lines = [f"{'stage':<10s} {'p50':>7s} {'p99':>7s} ms"]
+        for stage, summary in stats.summary(q=(50, 99)).items():
+            lines.append(
+                f"{stage:<10s} {summary['p50'] * 1e3:7.2f} {summary['p99'] * 1e3:7.2f}"
+            )
+        lines.append(f"{stats.frame_rate:.1f} frames/s")
+        lines.extend(f"{count} {name}" for name, count in stats.counters.items())
+        self.ui.statistics.setText("\n".join(lines))
+
     @Slot()
     def single_measurement(self) -> None:
         self.ui.progress_bar.setRange(0, 1)
         wavelengths, intensities = self.experiment.get_spectrum()
         self.plot_data(wavelengths, intensities)
+        self.update_statistics()
 
     @Slot()
     def integrate_spectrum(self) -> None:
@@ -108,6 +305,7 @@ class UserInterface(QtWidgets.QMainWindow):
         self.ui.progress_bar.setRange(0, count)
         self.ui.progress_bar.setValue(0)
         self.integrate_spectrum_worker.setup(experiment=self.experiment, count=count)
+        self.start_plot_updates(self.integrate_spectrum_worker)
         self.integrate_spectrum_worker.start()
 
     @Slot()
@@ -116,6 +314,7 @@ class UserInterface(QtWidgets.QMainWindow):
         self.ui.progress_bar.setMinimum(0)
         self.ui.progress_bar.setMaximum(0)
         self.continuous_spectrum_worker.setup(experiment=self.experiment)
+        self.start_plot_updates(self.continuous_spectrum_worker)
         self.continuous_spectrum_worker.start()
 
     @Slot()
@@ -138,21 +337,73 @@ class UserInterface(QtWidgets.QMainWindow):
         self.ui.integrate_button.setEnabled(True)
         self.ui.continuous_button.setEnabled(True)
         self.ui.stop_button.setEnabled(False)
+        self._redraw_timer.stop()
+        # draw the final spectrum, if it is still pending
+        self.redraw()
+        self.update_statistics()
 
-    def plot_data(self, wavelengths, intensities) -> None:
+    def plot_data(self, wavelengths: np.ndarray, intensities: np.ndarray) -> None:
         self._wavelengths = wavelengths
         self._intensities = intensities
-        self.ui.plot_widget.clear()
-        self.ui.plot_widget.plot(
-            wavelengths, intensities, symbol=None, pen={"color": "k", "width": 5}
-        )
-        self.ui.plot_widget.setLabel("left", "Intensity")
-        self.ui.plot_widget.setLabel("bottom", "Wavelength (nm)")
-        self.ui.plot_widget.setLimits(yMin=0)
+        self.update_curve()
+
+    def update_curve(self) -> None:
+        """Draw the current data, timing it if statistics are enabled."""
+        if (stats := self.experiment.device.stats) is not None:
+            t0 = time.perf_counter()
+            self._curve.setData(self._wavelengths, self._intensities)
+            stats.record("plot", t0)
+        else:
+            self._curve.setData(self._wavelengths, self._intensities)
+        if self.ui.show_peaks.isChecked():
+            self.update_peaks()
 
-    @Slot(tuple)
-    def plot_new_data(self, wavelengths: np.ndarray, intensities: np.ndarray) -> None:
-        self.plot_data(wavelengths, intensities)
+    @Slot()
+    def plot_new_data(self) -> None:
+        """Take new data from the worker, which is plotted on the next redraw."""
+        if self._worker is None or (data := self._worker.take_latest()) is None:
+            return
+        if self._pending:
+            self._frames_skipped += 1
+        self._wavelengths, self._intensities = data
+        self._pending = True
+
+    def start_plot_updates(self, worker: MeasurementWorker) -> None:
+        """Start redrawing the plot at the display refresh rate.
+
+        Args:
+            worker: the worker which publishes the data to plot.
+        """
+        self._worker = worker
+        self._frames_drawn = self._frames_skipped = self._frames_published = 0
+        self._coalesced_frames = 0
+        self._stats_time = time.monotonic()
+        self._redraw_timer.start()
+
+    @Slot()
+    def redraw(self) -> None:
+        """Plot the latest data, if new data has arrived since the last redraw."""
+        if self._pending:
+            self._pending = False
+            self.update_curve()
+            self._frames_drawn += 1
+
+        now = time.monotonic()
+        if self._worker is not None and (elapsed := now - self._stats_time) >= 1.0:
+            # spectra replaced in the worker or in the plot before being drawn
+            published = self._worker.published_frames
+            coalesced = self._worker.coalesced_frames
+            skipped = self._frames_skipped + coalesced - self._coalesced_frames
+            self._plot_stats.setText(
+                f"{(published - self._frames_published) / elapsed:.1f} spectra/s, "
+                f"{self._frames_drawn / elapsed:.1f} fps, "
+                f"{skipped} skipped, {self._worker.dropped_frames} dropped"
+            )
+            self._frames_drawn = self._frames_skipped = 0
+            self._frames_published = published
+            self._coalesced_frames = coalesced
+            self._stats_time = now
+            self.update_statistics()
 
     @Slot(int)
     def update_progress_bar(self, value: int) -> None:
@@ -160,25 +411,57 @@ class UserInterface(QtWidgets.QMainWindow):
 
     @Slot()
     def save_data(self) -> None:
-        if self._wavelengths is None:
+        if self._wavelengths is None or self._intensities is None:
             QtWidgets.QMessageBox.warning(
                 self, "No data", "Perform a measurement before saving."
             )
         else:
-            path, _ = QtWidgets.QFileDialog.getSaveFileName(filter="CSV Files (*.csv)")
-            with open(path, mode="w") as f:
-                writer = csv.writer(f)
-                writer.writerow(["Wavelength (nm)", "Intensity"])
-                for wavelength, intensity in zip(self._wavelengths, self._intensities):
-                    writer.writerow([wavelength, intensity])
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(
+                filter="CSV Files (*.csv);;TSV Files (*.tsv)"
+            )
+            if not path:
+                return
+            write_spectra(path, self._wavelengths, {"Intensity": self._intensities})
             QtWidgets.QMessageBox.information(
                 self, "Data saved", f"Data saved successfully to {path}."
             )
 
 
-def main():
+def main(
+    simulate: bool = False,
+    connect: str | None = None,
+    replay: pathlib.Path | str | None = None,
+    replay_speed: float | None = 1.0,
+    serial_number: str | None = None,
+    refresh_config: bool = False,
+) -> None:
     app = QtWidgets.QApplication(sys.argv)
-    ui = UserInterface()
+    if replay is not None:
+        experiment = SpectroscopyExperiment(
+            OceanOpticsUSB2000Plus(
+                ReplayDevice.from_file(replay, replay_speed), use_cache=False
+            )
+        )
+    elif connect:
+        experiment = SpectroscopyExperiment(
+            OceanOpticsUSB2000Plus(SpectrumClient(connect), use_cache=False)
+        )
+    elif simulate:
+        device = (
+            SimulatedDevice()
+            if serial_number is None
+            else SimulatedDevice(serial_number=serial_number)
+        )
+        experiment = SpectroscopyExperiment(
+            OceanOpticsUSB2000Plus(device, refresh_cache=refresh_config)
+        )
+    else:
+        experiment = SpectroscopyExperiment(
+            OceanOpticsUSB2000Plus(
+                serial_number=serial_number, refresh_cache=refresh_config
+            )
+        )
+    ui = UserInterface(experiment)
     ui.show()
     sys.exit(app.exec())
 
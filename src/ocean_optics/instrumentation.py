@@ -0,0 +1,210 @@
+import collections
+import time
+
+import numpy as np
+
+__all__ = ["AcquisitionStats", "LatencyHistogram"]
+
+DEFAULT_SIZE = 1024
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+class LatencyHistogram:
+    """Rolling record of the latencies of a processing stage.
+
+    The start timestamp and duration of the most recent `size` calls are kept
+    in ring buffers, so the memory used is fixed and adding a sample does not
+    allocate.
+    """
+
+    count: int = 0
+    """The total number of samples added."""
+
+    def __init__(self, size: int = DEFAULT_SIZE) -> None:
+        """Initialize the histogram.
+
+        Args:
+            size: the number of most recent samples to keep.
+        """
+        self.size = size
+        self._starts = np.zeros(size)
+        self._durations = np.zeros(size)
+
+    def add(self, start: float, end: float) -> None:
+        """Add a sample.
+
+        Args:
+            start: the `time.perf_counter()` value at the start of the stage.
+            end: the `time.perf_counter()` value at the end of the stage.
+        """
+        slot = self.count % self.size
+        self._starts[slot] = start
+        self._durations[slot] = end - start
+        self.count += 1
+
+    @property
+    def starts(self) -> np.ndarray:
+        """The start timestamps of the kept samples, oldest first."""
+        return self._ordered(self._starts)
+
+    @property
+    def durations(self) -> np.ndarray:
+        """The durations in seconds of the kept samples, oldest first."""
+        return self._ordered(self._durations)
+
+    def percentiles(self, q: tuple[float, ...] = DEFAULT_PERCENTILES) -> np.ndarray:
+        """Return percentiles of the durations of the kept samples.
+
+        Args:
+            q: the percentiles to calculate, between 0 and 100.
+
+        Returns:
+            The durations in seconds, or NaN if there are no samples.
+        """
+        if not self.count:
+            return np.full(len(q), np.nan)
+        return np.percentile(self._durations[: min(self.count, self.size)], q)
+
+    def histogram(self, bins: int = 20) -> tuple[np.ndarray, np.ndarray]:
+        """Return a histogram of the durations of the kept samples.
+
+        The bins are logarithmically spaced, since latencies span several
+        orders of magnitude.
+
+        Args:
+            bins: the number of bins.
+
+        Returns:
+            A tuple of the counts and the bin edges in seconds.
+        """
+        durations = self._durations[: min(self.count, self.size)]
+        durations = durations[durations > 0]
+        if not len(durations):
+            return np.zeros(bins, dtype=int), np.zeros(bins + 1)
+        edges = np.geomspace(durations.min(), durations.max() * (1 + 1e-9), bins + 1)
+        counts, _ = np.histogram(durations, edges)
+        return counts, edges
+
+    def _ordered(self, samples: np.ndarray) -> np.ndarray:
+        if self.count <= self.size:
+            return samples[: self.count].copy()
+        slot = self.count % self.size
+        return np.concatenate((samples[slot:], samples[:slot]))
+
+
+class AcquisitionStats:
+    """Timing statistics of the acquisition and processing of spectra.
+
+    The driver, the experiment and the user interface record the duration of
+    each stage of each frame, in order of execution:
+
+        stale: discarding spectra integrated at a previous integration time
+        request: sending the spectrum request to the device
+        read: waiting for the integration and reading the spectrum
+        decode: copying the spectrum out of the transfer buffer
+        calibrate: calibration and corrections
+        accumulate: adding a spectrum to a running sum
+        process: calculating the quantity of the measurement mode
+        boxcar, baseline, ...: the stages of the processing pipeline
+        plot: updating the plot
+
+    The integration and the transfer of a spectrum happen in a single USB
+    transfer, so they can't be timed separately. Events like USB timeouts and
+    retries are counted in `counters`.
+
+    Instrumentation is disabled unless an instance is assigned to the `stats`
+    attribute of the driver, in which case the only cost is checking that
+    attribute for each frame.
+    """
+
+    def __init__(self, size: int = DEFAULT_SIZE) -> None:
+        """Initialize the statistics.
+
+        Args:
+            size: the number of most recent samples to keep for each stage and
+                for the frame rate.
+        """
+        self.size = size
+        self.stages: dict[str, LatencyHistogram] = {}
+        self.counters: collections.Counter[str] = collections.Counter()
+        # the end timestamps of each stage of the most recent frame
+        self.last_frame: dict[str, float] = {}
+        self._frames = LatencyHistogram(size)
+
+    def record(self, stage: str, start: float, end: float | None = None) -> None:
+        """Record the duration of a stage.
+
+        Args:
+            stage: the name of the stage.
+            start: the `time.perf_counter()` value at the start of the stage.
+            end: the `time.perf_counter()` value at the end of the stage. By
+                default, the current time.
+        """
+        if end is None:
+            end = time.perf_counter()
+        if (histogram := self.stages.get(stage)) is None:
+            histogram = self.stages[stage] = LatencyHistogram(self.size)
+        histogram.add(start, end)
+        self.last_frame[stage] = end
+
+    def count(self, counter: str, n: int = 1) -> None:
+        """Increment an event counter, e.g. 'timeouts' or 'retries'."""
+        self.counters[counter] += n
+
+    def frame_done(self, timestamp: float | None = None) -> None:
+        """Record the completion of a frame, for the frame rate.
+
+        Args:
+            timestamp: the `time.perf_counter()` value at which the frame was
+                read. By default, the current time.
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        self._frames.add(timestamp, timestamp)
+
+    @property
+    def frames(self) -> int:
+        """The total number of frames read."""
+        return self._frames.count
+
+    @property
+    def frame_rate(self) -> float:
+        """The frame rate in frames per second over the kept frames."""
+        timestamps = self._frames.starts
+        if len(timestamps) < 2 or timestamps[-1] == timestamps[0]:
+            return 0.0
+        return float((len(timestamps) - 1) / (timestamps[-1] - timestamps[0]))
+
+    def reset(self) -> None:
+        """Remove all samples and reset the counters."""
+        self.stages.clear()
+        self.counters.clear()
+        self.last_frame.clear()
+        self._frames = LatencyHistogram(self.size)
+
+    def summary(
+        self, q: tuple[float, ...] = DEFAULT_PERCENTILES
+    ) -> dict[str, dict[str, float]]:
+        """Summarize the durations of each stage.
+
+        Args:
+            q: the percentiles to include.
+
+        Returns:
+            For each stage, the number of samples and the mean, the requested
+            percentiles (as 'p50' etc.) and the maximum of the durations of the
+            kept samples, in seconds.
+        """
+        summary = {}
+        for stage, histogram in list(self.stages.items()):
+            durations = histogram.durations
+            summary[stage] = {
+                "count": histogram.count,
+                "mean": float(durations.mean()),
+                **{
+                    f"p{percentile:g}": float(value)
+                    for percentile, value in zip(q, histogram.percentiles(q))
+                },
+                "max": float(durations.max()),
+            }
+        return summary
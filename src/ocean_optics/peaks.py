@@ -0,0 +1,233 @@
+import math
+from dataclasses import dataclass, field
+
+import numpy as np
+
+__all__ = ["PeakFinder", "PeakTracker", "Peaks"]
+
+# FWHM of a Gaussian in units of its standard deviation
+GAUSSIAN_FWHM = 2 * math.sqrt(2 * math.log(2))
+# Relative height of the peaks found when no threshold is given
+DEFAULT_RELATIVE_THRESHOLD = 0.05
+# Offsets of the pixels used to fit a peak
+NEIGHBOURS = np.array([[-1], [0], [1]])
+
+
+@dataclass
+class Peaks:
+    """The peaks found in a spectrum.
+
+    The array attributes contain one element per peak, in order of increasing
+    wavelength.
+
+    Attributes:
+        wavelengths: the centers of the peaks in nanometers.
+        heights: the heights of the peaks above the baseline.
+        fwhms: the full widths at half maximum in nanometers.
+        ids: the identities assigned by a `PeakTracker`, or -1.
+        baseline: the baseline of the spectrum.
+        timestamp: the `time.monotonic()` value at which the spectrum was read,
+            if known.
+    """
+
+    wavelengths: np.ndarray
+    heights: np.ndarray
+    fwhms: np.ndarray
+    ids: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    baseline: float = 0.0
+    timestamp: float = math.nan
+
+    def __post_init__(self) -> None:
+        if len(self.ids) != len(self.wavelengths):
+            self.ids = np.full(len(self.wavelengths), -1, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.wavelengths)
+
+
+class PeakFinder:
+    """Find peaks in spectra with sub-pixel accuracy.
+
+    A peak is a pixel which is the maximum of the pixels within `window` pixels
+    on either side and which exceeds the baseline by more than the threshold.
+    The center, height and width of each peak are calculated from a parabola
+    through the peak pixel and its neighbours. With the 'gaussian' method the
+    parabola is fitted to the logarithm of the intensities, which is exact for
+    Gaussian line profiles. All peaks are found and fitted at once using array
+    operations on preallocated buffers, so the cost hardly depends on the
+    number of peaks.
+    """
+
+    def __init__(
+        self,
+        wavelengths: np.ndarray,
+        threshold: float | None = None,
+        baseline: float | None = None,
+        window: int = 2,
+        method: str = "gaussian",
+    ) -> None:
+        """Initialize the peak finder.
+
+        Args:
+            wavelengths: the wavelength axis of the spectra.
+            threshold: the minimum height of a peak above the baseline. By
+                default, 5% of the height of the highest pixel in each
+                spectrum.
+            baseline: the baseline of the spectra, e.g. 0 for dark-subtracted
+                spectra. By default, the median of each spectrum, which works
+                well for spectra of emission lines.
+            window: the number of pixels on either side of a peak which must
+                not be higher than the peak.
+            method: 'gaussian' or 'parabolic'.
+        """
+        if method not in ("gaussian", "parabolic"):
+            raise ValueError(f"Unknown method {method!r}.")
+        if window < 1:
+            raise ValueError("The window must be at least 1 pixel.")
+        self.wavelengths = np.asarray(wavelengths, dtype=np.float64)
+        self.threshold = threshold
+        self.baseline = baseline
+        self.window = window
+        self.method = method
+        # local dispersion in nanometers per pixel
+        self._dispersion = np.gradient(self.wavelengths)
+        size = len(self.wavelengths)
+        self._heights = np.empty(size)
+        self._maxima = np.empty(size)
+        self._is_peak = np.empty(size, dtype=bool)
+        self._above = np.empty(size, dtype=bool)
+
+    def find(self, intensities: np.ndarray, timestamp: float = math.nan) -> Peaks:
+        """Find the peaks in a spectrum.
+
+        Args:
+            intensities: the intensities of the spectrum.
+            timestamp: the time at which the spectrum was read.
+
+        Returns:
+            The peaks.
+        """
+        baseline = self.baseline
+        if baseline is None:
+            # the median, without the cost of averaging the middle two values
+            middle = len(intensities) // 2
+            baseline = float(np.partition(intensities, middle)[middle])
+        y = np.subtract(intensities, baseline, out=self._heights)
+        threshold = self.threshold
+        if threshold is None:
+            threshold = DEFAULT_RELATIVE_THRESHOLD * float(y.max())
+
+        # maximum of the pixels within the window, calculated in place
+        maxima = self._maxima
+        maxima[:] = y
+        for shift in range(1, self.window + 1):
+            np.maximum(maxima[shift:], y[:-shift], out=maxima[shift:])
+            np.maximum(maxima[:-shift], y[shift:], out=maxima[:-shift])
+        is_peak = np.equal(y, maxima, out=self._is_peak)
+        is_peak &= np.greater(y, threshold, out=self._above)
+        # the fit requires a neighbour on either side
+        is_peak[0] = is_peak[-1] = False
+        indices = np.flatnonzero(is_peak)
+        if len(indices) > 1:
+            # pixels of equal height within a window are a single peak
+            indices = indices[np.diff(indices, prepend=-self.window - 1) > self.window]
+
+        # the peak pixels and their neighbours, as a (3, peaks) array
+        points = y[indices + NEIGHBOURS]
+        if self.method == "gaussian":
+            # the logarithm of a Gaussian is a parabola
+            np.maximum(points, np.finfo(np.float64).tiny, out=points)
+            np.log(points, out=points)
+        left, center, right = points
+        # parabola through the three points, relative to the center pixel
+        curvature = left - 2 * center + right
+        # a flat top, e.g. due to saturation, has no curvature
+        curvature = np.minimum(curvature, -1e-12)
+        offsets = np.clip((left - right) / (2 * curvature), -0.5, 0.5)
+        vertices = center - (right - left) ** 2 / (8 * curvature)
+        if self.method == "gaussian":
+            heights = np.exp(vertices)
+            widths = GAUSSIAN_FWHM * np.sqrt(-1 / curvature)
+        else:
+            heights = vertices
+            widths = 2 * np.sqrt(-vertices / curvature)
+        dispersion = self._dispersion[indices]
+        return Peaks(
+            wavelengths=self.wavelengths[indices] + offsets * dispersion,
+            heights=heights,
+            fwhms=widths * dispersion,
+            baseline=baseline,
+            timestamp=timestamp,
+        )
+
+
+class PeakTracker:
+    """Track the identities of peaks across spectra.
+
+    A peak in a new spectrum gets the identity of a tracked peak if they are
+    each other's nearest neighbour and their wavelengths differ by at most
+    `max_shift`. Other peaks start a new track. A track is dropped when it has
+    not been matched in `max_missed` consecutive spectra.
+    """
+
+    def __init__(self, max_shift: float = 1.0, max_missed: int = 10) -> None:
+        """Initialize the tracker.
+
+        Args:
+            max_shift: the maximum change in wavelength of a peak between
+                spectra, in nanometers.
+            max_missed: the number of consecutive spectra in which a peak may
+                be missing before its track is dropped.
+        """
+        self.max_shift = max_shift
+        self.max_missed = max_missed
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop all tracks."""
+        self._next_id = 0
+        self._wavelengths = np.empty(0)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._missed = np.empty(0, dtype=np.int64)
+
+    def update(self, peaks: Peaks) -> Peaks:
+        """Assign identities to the peaks of a new spectrum.
+
+        Args:
+            peaks: the peaks, which are updated in place.
+
+        Returns:
+            The peaks.
+        """
+        num_peaks, num_tracks = len(peaks), len(self._ids)
+        matched = np.zeros(num_peaks, dtype=bool)
+        nearest_track = np.zeros(num_peaks, dtype=np.intp)
+        if num_peaks and num_tracks:
+            distances = abs(peaks.wavelengths[:, np.newaxis] - self._wavelengths)
+            nearest_track = distances.argmin(axis=1)
+            nearest_peak = distances.argmin(axis=0)
+            peak_indices = np.arange(num_peaks)
+            matched = (nearest_peak[nearest_track] == peak_indices) & (
+                distances[peak_indices, nearest_track] <= self.max_shift
+            )
+
+        tracks = nearest_track[matched]
+        ids = np.empty(num_peaks, dtype=np.int64)
+        ids[matched] = self._ids[tracks]
+        num_new = num_peaks - int(matched.sum())
+        ids[~matched] = np.arange(self._next_id, self._next_id + num_new)
+        self._next_id += num_new
+        peaks.ids = ids
+
+        self._missed += 1
+        self._missed[tracks] = 0
+        self._wavelengths[tracks] = peaks.wavelengths[matched]
+        kept = self._missed <= self.max_missed
+        self._wavelengths = np.concatenate(
+            (self._wavelengths[kept], peaks.wavelengths[~matched])
+        )
+        self._ids = np.concatenate((self._ids[kept], ids[~matched]))
+        self._missed = np.concatenate(
+            (self._missed[kept], np.zeros(num_new, dtype=np.int64))
+        )
+        return peaks
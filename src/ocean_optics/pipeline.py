@@ -0,0 +1,354 @@
+import abc
+import time
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, ClassVar
+
+import numpy as np
+
+from ocean_optics import smoothing
+from ocean_optics.bands import Band, BandChannels
+
+if TYPE_CHECKING:
+    from ocean_optics.instrumentation import AcquisitionStats
+
+__all__ = [
+    "STAGES",
+    "Baseline",
+    "Boxcar",
+    "Gaussian",
+    "Normalize",
+    "Pipeline",
+    "SavitzkyGolay",
+    "Stage",
+    "parse_stage",
+    "parse_stages",
+]
+
+
+class Stage(abc.ABC):
+    """A processing step which is applied in place to calibrated spectra.
+
+    A stage is prepared once for the wavelength axis of the spectra, which
+    validates its parameters and allocates the buffers it needs, after which
+    applying it to a spectrum should not allocate new arrays.
+
+    Subclasses are registered in `STAGES` under their `name`, so that they can
+    be created from a text specification, see `parse_stage()`.
+    """
+
+    name: ClassVar[str]
+    """The name of the stage, used in specifications and timing statistics."""
+
+    def prepare(self, wavelengths: np.ndarray) -> None:
+        """Validate the stage and allocate buffers for the spectra.
+
+        Args:
+            wavelengths: the wavelength axis of the spectra.
+
+        Raises:
+            ValueError: the stage can't be applied to these spectra.
+        """
+
+    @abc.abstractmethod
+    def apply(self, intensities: np.ndarray) -> None:
+        """Process a spectrum in place.
+
+        Args:
+            intensities: the spectrum, which is overwritten with the result.
+        """
+
+    @classmethod
+    @abc.abstractmethod
+    def parse(cls, argument: str | None) -> "Stage":
+        """Create the stage from the argument of a specification.
+
+        Args:
+            argument: the text after the '=' in the specification, or None.
+        """
+
+
+class Boxcar(Stage):
+    """Average each pixel with its neighbours, see `smoothing.Boxcar`."""
+
+    name = "boxcar"
+
+    def __init__(self, width: int) -> None:
+        """Initialize the stage.
+
+        Args:
+            width: the number of neighbouring pixels on either side.
+        """
+        if width < 1:
+            raise ValueError("The boxcar width must be at least 1.")
+        self.width = width
+
+    @classmethod
+    def parse(cls, argument: str | None) -> "Boxcar":
+        """Parse 'boxcar=WIDTH'."""
+        return cls(_parse_int(cls.name, argument))
+
+    def prepare(self, wavelengths: np.ndarray) -> None:
+        self._boxcar = smoothing.Boxcar(self.width, len(wavelengths))
+
+    def apply(self, intensities: np.ndarray) -> None:
+        self._boxcar.apply(intensities, out=intensities)
+
+
+class SavitzkyGolay(Stage):
+    """Smooth spectra with a Savitzky-Golay filter, see `smoothing.savitzky_golay()`."""
+
+    name = "savgol"
+
+    def __init__(self, window: int, order: int = 2) -> None:
+        """Initialize the stage.
+
+        Args:
+            window: the number of pixels in the window, which must be odd.
+            order: the order of the fitted polynomial.
+        """
+        self.smoother = smoothing.savitzky_golay(window, order)
+        self.window = window
+        self.order = order
+
+    @classmethod
+    def parse(cls, argument: str | None) -> "SavitzkyGolay":
+        """Parse 'savgol=WINDOW' or 'savgol=WINDOW,ORDER'."""
+        window, _, order = (argument or "").partition(",")
+        return cls(
+            _parse_int(cls.name, window, "11,3"),
+            _parse_int(cls.name, order, "11,3") if order else 2,
+        )
+
+    def prepare(self, wavelengths: np.ndarray) -> None:
+        _check_window(self.smoother, wavelengths)
+
+    def apply(self, intensities: np.ndarray) -> None:
+        self.smoother.apply(intensities, out=intensities)
+
+
+class Gaussian(Stage):
+    """Smooth spectra with a Gaussian filter, see `smoothing.gaussian()`."""
+
+    name = "gaussian"
+
+    def __init__(self, sigma: float) -> None:
+        """Initialize the stage.
+
+        Args:
+            sigma: the standard deviation of the Gaussian in pixels.
+        """
+        self.smoother = smoothing.gaussian(sigma)
+        self.sigma = sigma
+
+    @classmethod
+    def parse(cls, argument: str | None) -> "Gaussian":
+        """Parse 'gaussian=SIGMA'."""
+        try:
+            sigma = float(argument or "")
+        except ValueError:
+            raise ValueError(
+                "The gaussian stage requires a number, e.g. gaussian=1.5."
+            ) from None
+        return cls(sigma)
+
+    def prepare(self, wavelengths: np.ndarray) -> None:
+        _check_window(self.smoother, wavelengths)
+
+    def apply(self, intensities: np.ndarray) -> None:
+        self.smoother.apply(intensities, out=intensities)
+
+
+class Baseline(Stage):
+    """Subtract the mean value in a wavelength band without signal."""
+
+    name = "baseline"
+
+    def __init__(self, band: Band) -> None:
+        """Initialize the stage.
+
+        Args:
+            band: the wavelength band containing only the baseline.
+        """
+        self.band = band
+
+    @classmethod
+    def parse(cls, argument: str | None) -> "Baseline":
+        """Parse 'baseline=START-STOP'."""
+        if argument is None:
+            raise ValueError(
+                "The baseline stage requires a band, e.g. baseline=340-360."
+            )
+        return cls(Band.parse(argument))
+
+    def prepare(self, wavelengths: np.ndarray) -> None:
+        self._channels = BandChannels(wavelengths, [self.band], average=True)
+        self._value = np.empty(1)
+
+    def apply(self, intensities: np.ndarray) -> None:
+        intensities -= self._channels.compute(intensities, out=self._value)[0]
+
+
+class Normalize(Stage):
+    """Divide by the maximum, optionally within a wavelength band."""
+
+    name = "normalize"
+
+    def __init__(self, band: Band | None = None) -> None:
+        """Initialize the stage.
+
+        Args:
+            band: the wavelength band in which to look for the maximum. By
+                default, the whole spectrum.
+        """
+        self.band = band
+
+    @classmethod
+    def parse(cls, argument: str | None) -> "Normalize":
+        """Parse 'normalize' or 'normalize=START-STOP'."""
+        return cls(None if argument is None else Band.parse(argument))
+
+    def prepare(self, wavelengths: np.ndarray) -> None:
+        if self.band is None:
+            self._pixels = slice(None)
+        else:
+            self._pixels = BandChannels(wavelengths, [self.band]).pixels
+
+    def apply(self, intensities: np.ndarray) -> None:
+        maximum = intensities[self._pixels].max()
+        if maximum:
+            intensities *= 1 / maximum
+
+
+# The stages which can be created from a specification, by name
+STAGES: dict[str, type[Stage]] = {
+    stage.name: stage
+    for stage in (Boxcar, SavitzkyGolay, Gaussian, Baseline, Normalize)
+}
+
+
+def parse_stage(spec: str) -> Stage:
+    """Create a stage from a specification like 'boxcar=2' or 'normalize'.
+
+    Args:
+        spec: the name of the stage, optionally followed by '=' and its
+            argument.
+
+    Raises:
+        ValueError: the specification is invalid.
+    """
+    name, _, argument = spec.strip().partition("=")
+    if (stage := STAGES.get(name.strip())) is None:
+        raise ValueError(
+            f"Unknown processing stage {name!r}, choose from {', '.join(STAGES)}."
+        )
+    return stage.parse(argument.strip() or None)
+
+
+def parse_stages(text: str) -> list[Stage]:
+    """Create stages from whitespace-separated specifications.
+
+    Args:
+        text: the specifications, e.g. 'baseline=340-360 boxcar=2'.
+
+    Raises:
+        ValueError: a specification is invalid.
+    """
+    return [parse_stage(spec) for spec in text.split()]
+
+
+class Pipeline:
+    """An ordered sequence of processing stages.
+
+    Stages are prepared for the wavelength axis when they are added, so any
+    invalid parameters are reported at that time instead of while processing
+    spectra. All stages operate in place on the same spectrum, so running the
+    pipeline does not allocate intermediate arrays.
+    """
+
+    def __init__(self, wavelengths: np.ndarray, stages: Iterable[Stage] = ()) -> None:
+        """Initialize the pipeline.
+
+        Args:
+            wavelengths: the wavelength axis of the spectra.
+            stages: the initial stages, in order of execution.
+
+        Raises:
+            ValueError: a stage can't be applied to these spectra.
+        """
+        self.wavelengths = wavelengths
+        self._stages: list[Stage] = []
+        self.set_stages(stages)
+
+    @property
+    def stages(self) -> tuple[Stage, ...]:
+        """The stages, in order of execution."""
+        return tuple(self._stages)
+
+    def __len__(self) -> int:
+        return len(self._stages)
+
+    def set_stages(self, stages: Iterable[Stage]) -> None:
+        """Replace all stages.
+
+        The stages are only replaced if all of them are valid, and running the
+        pipeline in another thread is safe while they are replaced.
+
+        Args:
+            stages: the new stages, in order of execution.
+
+        Raises:
+            ValueError: a stage can't be applied to these spectra.
+        """
+        stages = list(stages)
+        for stage in stages:
+            stage.prepare(self.wavelengths)
+        self._stages = stages
+
+    def append(self, stage: Stage) -> None:
+        """Add a stage at the end of the pipeline.
+
+        Raises:
+            ValueError: the stage can't be applied to these spectra.
+        """
+        self.set_stages([*self._stages, stage])
+
+    def run(
+        self, intensities: np.ndarray, stats: "AcquisitionStats | None" = None
+    ) -> np.ndarray:
+        """Process a spectrum in place.
+
+        Args:
+            intensities: the spectrum, which is overwritten with the result.
+            stats: if given, the duration of each stage is recorded under the
+                name of the stage.
+
+        Returns:
+            The processed spectrum, i.e. `intensities`.
+        """
+        if stats is None:
+            for stage in self._stages:
+                stage.apply(intensities)
+        else:
+            for stage in self._stages:
+                t0 = time.perf_counter()
+                stage.apply(intensities)
+                stats.record(stage.name, t0)
+        return intensities
+
+
+def _parse_int(name: str, argument: str | None, example: str = "2") -> int:
+    """Parse an integer argument of a stage specification."""
+    try:
+        return int(argument or "")
+    except ValueError:
+        raise ValueError(
+            f"The {name} stage requires integers, e.g. {name}={example}."
+        ) from None
+
+
+def _check_window(smoother: smoothing.Smoother, wavelengths: np.ndarray) -> None:
+    """Check that the window of a filter fits in the spectra."""
+    if smoother.window > len(wavelengths):
+        raise ValueError(
+            f"The window of {smoother.window} pixels is larger than the spectra."
+        )
@@ -0,0 +1,201 @@
+import json
+import pathlib
+import struct
+from types import TracebackType
+from typing import Self
+
+import numpy as np
+
+from ocean_optics.usb2000plus import NUM_DARK_PIXELS, NUM_PIXELS, DeviceConfiguration
+
+__all__ = ["Recording", "RecordingWriter", "frame_dtype"]
+
+MAGIC = b"OOSPECTR"
+VERSION = 1
+# The frame data starts at a multiple of this offset, so that it can be memory
+# mapped efficiently.
+ALIGNMENT = 4096
+
+
+def frame_dtype(num_pixels: int = NUM_PIXELS) -> np.dtype:
+    """Return the data type of a single frame in a recording.
+
+    Args:
+        num_pixels: the number of pixels in a frame.
+    """
+    return np.dtype(
+        [
+            ("timestamp", "<f8"),
+            ("integration_time", "<u4"),
+            ("intensities", "<u2", (num_pixels,)),
+        ]
+    )
+
+
+class RecordingWriter:
+    """Write raw spectra to a binary recording file.
+
+    A recording consists of a header, which contains the device configuration
+    as JSON, followed by frames with a timestamp, the integration time and the
+    raw intensities of all pixels. Frames are collected in a preallocated chunk
+    and written to disk when the chunk is full, so that long acquisition runs
+    can be recorded at the full frame rate of the device.
+
+    The writer can be used as a context manager, which closes the file.
+    """
+
+    frames_written: int = 0
+    """The number of frames added to the recording."""
+
+    def __init__(
+        self,
+        path: pathlib.Path | str,
+        config: DeviceConfiguration,
+        num_pixels: int = NUM_PIXELS,
+        chunk_size: int = 256,
+    ) -> None:
+        """Create a new recording.
+
+        Args:
+            path: the path of the recording file, which is overwritten if it
+                exists.
+            config: the configuration of the device, needed to calibrate the
+                spectra.
+            num_pixels: the number of pixels in a frame.
+            chunk_size: the number of frames to collect before writing them to
+                disk.
+        """
+        # the file stays open until close(), so it can't be opened in a with block
+        self._file = open(path, "wb")  # noqa: SIM115
+        self._chunk = np.zeros(chunk_size, dtype=frame_dtype(num_pixels))
+        self._num_buffered = 0
+
+        header = json.dumps(
+            {"num_pixels": num_pixels, "configuration": json.loads(config.to_json())}
+        ).encode()
+        self._file.write(MAGIC + struct.pack("<II", VERSION, len(header)) + header)
+        # pad header to alignment
+        self._file.write(b"\x00" * (-self._file.tell() % ALIGNMENT))
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def append(
+        self, intensities: np.ndarray, timestamp: float, integration_time: int
+    ) -> None:
+        """Add a frame to the recording.
+
+        Args:
+            intensities: the raw intensities of all pixels.
+            timestamp: the time at which the frame was taken, in seconds.
+            integration_time: the integration time in microseconds.
+        """
+        frame = self._chunk[self._num_buffered]
+        frame["timestamp"] = timestamp
+        frame["integration_time"] = integration_time
+        frame["intensities"] = intensities
+        self._num_buffered += 1
+        self.frames_written += 1
+        if self._num_buffered == len(self._chunk):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all buffered frames to disk."""
+        self._file.write(self._chunk[: self._num_buffered].tobytes())
+        self._file.flush()
+        self._num_buffered = 0
+
+    def close(self) -> None:
+        """Write all buffered frames and close the file."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class Recording:
+    """Read a recording made by `RecordingWriter`.
+
+    The frames are memory mapped, so even very long recordings can be opened
+    instantly and only the data that is accessed is read from disk.
+    """
+
+    def __init__(self, path: pathlib.Path | str) -> None:
+        """Open a recording.
+
+        Args:
+            path: the path of the recording file.
+
+        Raises:
+            ValueError: the file is not a valid recording.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a spectrum recording.")
+            if len(data := f.read(8)) != 8:
+                raise ValueError(f"{path} is not a complete spectrum recording.")
+            version, header_size = struct.unpack("<II", data)
+            if version != VERSION:
+                raise ValueError(f"Unsupported recording version {version}.")
+            if len(data := f.read(header_size)) != header_size:
+                raise ValueError(f"{path} is not a complete spectrum recording.")
+            header = json.loads(data)
+            offset = f.tell() + (-f.tell() % ALIGNMENT)
+            file_size = f.seek(0, 2)
+
+        self.num_pixels: int = header["num_pixels"]
+        self.config = DeviceConfiguration.from_json(json.dumps(header["configuration"]))
+        dtype = frame_dtype(self.num_pixels)
+        # ignore an incomplete frame at the end of an interrupted recording
+        num_frames = max(file_size - offset, 0) // dtype.itemsize
+        self._frames: np.ndarray
+        if num_frames:
+            self._frames = np.memmap(
+                path, dtype=dtype, mode="r", offset=offset, shape=(num_frames,)
+            )
+        else:
+            self._frames = np.zeros(0, dtype=dtype)
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """The timestamps of the frames in seconds."""
+        return self._frames["timestamp"]
+
+    @property
+    def integration_times(self) -> np.ndarray:
+        """The integration times of the frames in microseconds."""
+        return self._frames["integration_time"]
+
+    @property
+    def frames(self) -> np.ndarray:
+        """The raw intensities as a (frames, pixels) array."""
+        return self._frames["intensities"]
+
+    @property
+    def wavelengths(self) -> np.ndarray:
+        """The calibrated wavelength axis, excluding dark pixels."""
+        return self.config.wavelength_axis()[NUM_DARK_PIXELS:]
+
+    def spectra(self, index: int | slice = slice(None)) -> np.ndarray:
+        """Return calibrated intensities.
+
+        Args:
+            index: the frame or frames to calibrate. By default, all frames
+                are calibrated, which reads the full recording into memory.
+
+        Returns:
+            The calibrated intensities, excluding dark pixels, like
+            `OceanOpticsUSB2000Plus.get_spectrum()`.
+        """
+        scale = 65535 / float(self.config.saturation_level)
+        return self.frames[index, NUM_DARK_PIXELS:] * scale
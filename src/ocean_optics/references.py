@@ -0,0 +1,115 @@
+import collections
+import pathlib
+import zipfile
+
+import numpy as np
+
+__all__ = ["ReferenceStore"]
+
+
+class ReferenceStore:
+    """Dark and reference spectra, keyed by integration time.
+
+    The dark current, and therefore the dark spectrum, depends on the
+    integration time. The store keeps the most recently used dark and
+    reference spectra for each integration time, up to `maxsize` of each, so
+    that changing the integration time picks up the matching spectra without
+    having to measure them again. Optionally, the spectra are saved to a file
+    so that they are available in later sessions.
+    """
+
+    def __init__(self, maxsize: int = 32, path: pathlib.Path | None = None) -> None:
+        """Initialize the store.
+
+        Args:
+            maxsize: the maximum number of dark spectra and the maximum number
+                of reference spectra to keep.
+            path: the file to save the spectra in. If the file exists, the
+                spectra are loaded from it.
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self._darks: collections.OrderedDict[int, np.ndarray] = (
+            collections.OrderedDict()
+        )
+        self._references: collections.OrderedDict[int, np.ndarray] = (
+            collections.OrderedDict()
+        )
+        if path is not None:
+            self.load()
+
+    def get_dark(self, integration_time: int) -> np.ndarray | None:
+        """Return the dark spectrum for an integration time, if available."""
+        return self._get(self._darks, integration_time)
+
+    def set_dark(self, integration_time: int, spectrum: np.ndarray) -> None:
+        """Store the dark spectrum for an integration time."""
+        self._set(self._darks, integration_time, spectrum)
+
+    def get_reference(self, integration_time: int) -> np.ndarray | None:
+        """Return the reference spectrum for an integration time, if available."""
+        return self._get(self._references, integration_time)
+
+    def set_reference(self, integration_time: int, spectrum: np.ndarray) -> None:
+        """Store the reference spectrum for an integration time."""
+        self._set(self._references, integration_time, spectrum)
+
+    def clear(self) -> None:
+        """Remove all spectra."""
+        self._darks.clear()
+        self._references.clear()
+        self.save()
+
+    def load(self) -> None:
+        """Load the spectra from the file, if it exists."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with np.load(self.path) as data:
+                for key in data.files:
+                    kind, _, integration_time = key.partition("_")
+                    spectra = self._darks if kind == "dark" else self._references
+                    spectra[int(integration_time)] = data[key]
+        except (OSError, ValueError, zipfile.BadZipFile):
+            # an unreadable file only means the spectra have to be measured again
+            return
+        for spectra in self._darks, self._references:
+            while len(spectra) > self.maxsize:
+                spectra.popitem(last=False)
+
+    def save(self) -> None:
+        """Save the spectra to the file."""
+        if self.path is None:
+            return
+        arrays = {f"dark_{t}": spectrum for t, spectrum in self._darks.items()}
+        arrays |= {
+            f"reference_{t}": spectrum for t, spectrum in self._references.items()
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "wb") as f:
+                np.savez(f, allow_pickle=False, **arrays)
+        except OSError:
+            pass
+
+    def _get(
+        self, spectra: collections.OrderedDict[int, np.ndarray], integration_time: int
+    ) -> np.ndarray | None:
+        spectrum = spectra.get(integration_time)
+        if spectrum is not None:
+            spectra.move_to_end(integration_time)
+        return spectrum
+
+    def _set(
+        self,
+        spectra: collections.OrderedDict[int, np.ndarray],
+        integration_time: int,
+        spectrum: np.ndarray,
+    ) -> None:
+        spectrum = np.array(spectrum, dtype=np.float64)
+        spectrum.flags.writeable = False
+        spectra[integration_time] = spectrum
+        spectra.move_to_end(integration_time)
+        while len(spectra) > self.maxsize:
+            spectra.popitem(last=False)
+        self.save()
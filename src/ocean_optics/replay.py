@@ -0,0 +1,235 @@
+import csv
+import pathlib
+import re
+import time
+
+import numpy as np
+
+from ocean_optics.recording import Recording
+from ocean_optics.simulation import SimulatedDevice
+from ocean_optics.usb2000plus import NUM_DARK_PIXELS, NUM_PIXELS, DeviceConfiguration
+
+__all__ = ["ReplayDevice"]
+
+# Column names of exported time series, see `write_time_series()`
+TIMESTAMP_PATTERN = re.compile(r"^t = (?P<timestamp>[-+\d.eE]+) s$")
+# Columns of exported spectra which do not contain a spectrum
+IGNORED_COLUMNS = ("Wavelength (nm)", "Standard error")
+
+
+class ReplayDevice(SimulatedDevice):
+    """A virtual spectrometer which replays previously measured spectra.
+
+    The replay device has the same interface as `SimulatedDevice`, so it can be
+    used in place of a real device:
+
+        device = OceanOpticsUSB2000Plus(
+            ReplayDevice.from_file("spectra.csv"), use_cache=False
+        )
+
+    Each spectrum request is answered with the next frame of the stack, after
+    the recorded time between the frames divided by `speed`. Without recorded
+    timestamps the current integration time is used instead. If `speed` is
+    None, the frames are served as fast as they are requested. The frames are
+    replayed as measured, regardless of the integration time set by the
+    driver, and replay starts over after the last frame.
+
+    The device configuration is reported as given, so don't use the cached
+    configuration of the serial number when opening the device.
+    """
+
+    position: int = 0
+    """The index of the next frame to replay."""
+
+    def __init__(
+        self,
+        frames: np.ndarray,
+        config: DeviceConfiguration | None = None,
+        timestamps: np.ndarray | None = None,
+        speed: float | None = 1.0,
+        transfer_latency: float = 0.0,
+    ) -> None:
+        """Initialize the replay device.
+
+        Args:
+            frames: a (frames, NUM_PIXELS) array of raw spectra, including the
+                dark pixels, e.g. `Recording.frames`. Memory-mapped arrays are
+                read one frame at a time.
+            config: the configuration of the device which measured the
+                spectra. By default, the configuration of a `SimulatedDevice`.
+            timestamps: the times at which the frames were measured, in
+                seconds.
+            speed: the replay speed relative to real time, or None to replay
+                as fast as possible.
+            transfer_latency: the time in seconds each read or write takes,
+                see `SimulatedDevice`.
+        """
+        if frames.ndim != 2 or frames.shape[1] != NUM_PIXELS or not len(frames):
+            raise ValueError(f"Expected a (frames, {NUM_PIXELS}) array of spectra.")
+        if speed is not None and speed <= 0:
+            raise ValueError("The replay speed must be positive.")
+        if config is None:
+            super().__init__(latency_factor=0, transfer_latency=transfer_latency)
+        else:
+            super().__init__(
+                serial_number=config.serial_number,
+                saturation_level=int(config.saturation_level),
+                wavelength_calibration_coefficients=tuple(
+                    config.wavelength_calibration_coefficients
+                ),
+                latency_factor=0,
+                transfer_latency=transfer_latency,
+            )
+        self.frames = frames
+        self.config = config
+        self.speed = speed
+        self._intervals = None
+        if timestamps is not None and len(timestamps) > 1:
+            # the first frame follows the last one when replay starts over
+            intervals = np.diff(timestamps, prepend=np.nan)
+            intervals[0] = np.median(intervals[1:])
+            self._intervals = np.clip(intervals, 0, None)
+
+    @classmethod
+    def from_recording(
+        cls, recording: Recording | pathlib.Path | str, speed: float | None = 1.0
+    ) -> "ReplayDevice":
+        """Replay a recording made by `RecordingWriter`.
+
+        Args:
+            recording: the recording or the path of the recording file.
+            speed: the replay speed, see `ReplayDevice`.
+        """
+        if not isinstance(recording, Recording):
+            recording = Recording(recording)
+        if recording.num_pixels != NUM_PIXELS:
+            raise ValueError(f"Expected a recording of {NUM_PIXELS} pixels.")
+        return cls(recording.frames, recording.config, recording.timestamps, speed)
+
+    @classmethod
+    def from_csv(
+        cls, path: pathlib.Path | str, speed: float | None = 1.0
+    ) -> "ReplayDevice":
+        """Replay spectra saved as a CSV or TSV file.
+
+        The file must contain a wavelength column followed by one or more
+        columns of calibrated intensities of all pixels, as written by the
+        `spectrum` command or `write_time_series()`. Columns with the
+        standard error are ignored. The timestamps are taken from the column
+        names of exported time series.
+
+        The wavelength calibration is recovered by fitting the wavelengths
+        and the intensities are converted back to raw counts, with the
+        optically masked dark pixels set to the lowest intensity of each
+        spectrum.
+
+        Args:
+            path: the path of the file.
+            speed: the replay speed, see `ReplayDevice`.
+
+        Raises:
+            ValueError: the file does not contain complete spectra.
+        """
+        delimiter = "\t" if pathlib.Path(path).suffix in (".tsv", ".txt") else ","
+        with open(path, newline="") as f:
+            header = next(csv.reader([f.readline()], delimiter=delimiter))
+            data = np.loadtxt(f, delimiter=delimiter, ndmin=2)
+        if len(data) != NUM_PIXELS - NUM_DARK_PIXELS:
+            raise ValueError(
+                f"Expected spectra of {NUM_PIXELS - NUM_DARK_PIXELS} pixels, "
+                f"found {len(data)}. Spectra with limited wavelengths can't be "
+                "replayed."
+            )
+        columns = [
+            idx
+            for idx, name in enumerate(header)
+            if idx and not name.startswith(IGNORED_COLUMNS)
+        ]
+        if not columns:
+            raise ValueError(f"No spectra found in {path}.")
+
+        coefficients = np.polynomial.polynomial.polyfit(
+            np.arange(NUM_DARK_PIXELS, NUM_PIXELS), data[:, 0], 3
+        )
+        config = DeviceConfiguration(
+            serial_number="REPLAY",
+            wavelength_calibration_coefficients=coefficients.tolist(),
+            stray_light_constant=0.0,
+            nonlinearity_correction_coefficients=[1.0] + [0.0] * 7,
+            polynomial_order_nonlinearity_calibration=7,
+            optical_bench="REPLAY",
+            device_configuration="USB2000+",
+            # calibrated intensities are scaled to 65535 at saturation
+            saturation_level=np.uint16(65535),
+        )
+        frames = np.empty((len(columns), NUM_PIXELS), dtype=np.uint16)
+        intensities = np.clip(np.rint(data[:, columns].T), 0, 65535)
+        frames[:, NUM_DARK_PIXELS:] = intensities
+        frames[:, :NUM_DARK_PIXELS] = intensities.min(axis=1, keepdims=True)
+
+        matches = [TIMESTAMP_PATTERN.match(header[idx]) for idx in columns]
+        timestamps = None
+        if all(matches):
+            timestamps = np.array(
+                [float(match["timestamp"]) for match in matches if match is not None]
+            )
+        return cls(frames, config, timestamps, speed)
+
+    @classmethod
+    def from_file(
+        cls, path: pathlib.Path | str, speed: float | None = 1.0
+    ) -> "ReplayDevice":
+        """Replay a recording or a CSV or TSV file of spectra.
+
+        Args:
+            path: the path of the file.
+            speed: the replay speed, see `ReplayDevice`.
+        """
+        try:
+            recording = Recording(path)
+        except ValueError:
+            return cls.from_csv(path, speed)
+        return cls.from_recording(recording, speed)
+
+    def _query(self, index: int) -> bytes:
+        """Return the value of a configuration parameter."""
+        config = self.config
+        if config is None or index in (0, 0x11):
+            return super()._query(index)
+        match index:
+            case 1 | 2 | 3 | 4:
+                coefficient = config.wavelength_calibration_coefficients[index - 1]
+                value = f"{coefficient:.8g}"
+            case 5:
+                value = f"{config.stray_light_constant:.8g}"
+            case 6 | 7 | 8 | 9 | 10 | 11 | 12 | 13:
+                coefficient = config.nonlinearity_correction_coefficients[index - 6]
+                value = f"{coefficient:.8g}"
+            case 14:
+                value = str(config.polynomial_order_nonlinearity_calibration)
+            case 15:
+                value = config.optical_bench
+            case 16:
+                value = config.device_configuration
+            case _:
+                value = ""
+        return value.encode() + b"\x00"
+
+    def _queue_spectrum(self) -> None:
+        """Queue the next frame on endpoint 0x82."""
+        index = self.position % len(self.frames)
+        available = time.monotonic()
+        if self._stale_spectra:
+            # the driver discards the spectra requested after a change of the
+            # integration time, so serve the next frame again afterwards
+            self._stale_spectra -= 1
+        else:
+            self.position += 1
+            if self.speed is not None:
+                if self._intervals is None:
+                    interval = self.integration_time / 1e6
+                else:
+                    interval = self._intervals[index]
+                available += interval / self.speed
+        data = np.asarray(self.frames[index], dtype="<u2").tobytes()
+        self._queue_frame(data, available)
@@ -0,0 +1,327 @@
+import array
+import collections
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import usb.core
+
+from ocean_optics.usb2000plus import (
+    NUM_DARK_PIXELS,
+    NUM_PIXELS,
+    STALE_SPECTRA,
+    SYNC_BYTE,
+    TriggerMode,
+)
+
+__all__ = ["EmissionLine", "SimulatedDevice"]
+
+PACKET_SIZE = 512
+DEFAULT_INTEGRATION_TIME = 100_000
+
+
+@dataclass
+class EmissionLine:
+    """A Gaussian emission line in a simulated spectrum.
+
+    Attributes:
+        wavelength: the center of the line in nanometers.
+        intensity: the peak height in raw counts per second of integration.
+        width: the standard deviation of the line profile in nanometers.
+    """
+
+    wavelength: float
+    intensity: float
+    width: float = 1.0
+
+
+# Mercury-argon calibration lamp, roughly
+DEFAULT_LINES = [
+    EmissionLine(404.7, 20_000),
+    EmissionLine(435.8, 60_000),
+    EmissionLine(546.1, 100_000),
+    EmissionLine(577.0, 30_000),
+    EmissionLine(579.1, 30_000),
+    EmissionLine(696.5, 15_000),
+    EmissionLine(763.5, 40_000),
+    EmissionLine(811.5, 25_000),
+]
+
+
+class SimulatedDevice:
+    """A software USB2000+ spectrometer.
+
+    The simulated device has the same `write()` and `read()` interface as a
+    PyUSB device and implements the commands used by `OceanOpticsUSB2000Plus`,
+    so the driver can be used without hardware:
+
+        device = OceanOpticsUSB2000Plus(SimulatedDevice())
+
+    Commands are written to endpoint 0x01. Answers to queries are read from
+    endpoint 0x81 and spectra are read from endpoint 0x82 as eight 512-byte
+    packets followed by the 0x69 sync byte. A spectrum becomes available after
+    the integration time has passed, multiplied by `latency_factor`. Reading
+    from an endpoint without pending data raises `usb.core.USBTimeoutError`
+    immediately, since no data will arrive while waiting.
+
+    In the external trigger modes, requested spectra are only acquired after
+    calling `trigger()`, which simulates an external trigger pulse.
+
+    Like the real device, which keeps acquiring spectra in the background, the
+    first `STALE_SPECTRA` spectra after changing the integration time were
+    integrated using the previous integration time. They are available
+    immediately, since they were acquired before they were requested.
+    """
+
+    def __init__(
+        self,
+        serial_number: str = "SIM00001",
+        lines: list[EmissionLine] | None = None,
+        noise: float = 10.0,
+        dark_level: float = 1_500.0,
+        saturation_level: int = 62_500,
+        wavelength_calibration_coefficients: tuple[float, ...] = (
+            339.1,
+            0.3728,
+            -1.58e-5,
+            -1.93e-9,
+        ),
+        latency_factor: float = 1.0,
+        transfer_latency: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        """Initialize the simulated device.
+
+        Args:
+            serial_number: the serial number reported by the device.
+            lines: the emission lines in the spectrum. Defaults to a
+                mercury-argon lamp.
+            noise: the standard deviation of the noise in raw counts.
+            dark_level: the dark current in raw counts.
+            saturation_level: the maximum raw count of a pixel.
+            wavelength_calibration_coefficients: the coefficients of the
+                third-order wavelength calibration polynomial.
+            latency_factor: the time it takes to acquire a spectrum, relative
+                to the integration time. Use 0 to acquire as fast as possible.
+            transfer_latency: the time in seconds each read or write takes,
+                which models the USB round-trip time.
+            seed: seed for the random number generator.
+        """
+        self.serial_number = serial_number
+        self.noise = noise
+        self.dark_level = dark_level
+        self.saturation_level = saturation_level
+        self.wavelength_calibration_coefficients = wavelength_calibration_coefficients
+        self.lines = DEFAULT_LINES if lines is None else lines
+        self.latency_factor = latency_factor
+        self.transfer_latency = transfer_latency
+        self.integration_time = DEFAULT_INTEGRATION_TIME
+        self.trigger_mode = TriggerMode.NORMAL
+        self.shutdown = False
+        self._pending_requests = 0
+        self._stale_spectra = 0
+        self._stale_integration_time = DEFAULT_INTEGRATION_TIME
+        self._rng = np.random.default_rng(seed)
+        # pending packets per endpoint as (time available, data) tuples
+        self._queues: dict[int, collections.deque[tuple[float, bytes]]] = {
+            0x81: collections.deque(),
+            0x82: collections.deque(),
+        }
+
+    @property
+    def lines(self) -> list[EmissionLine]:
+        """The emission lines in the spectrum.
+
+        Assigning new lines changes the light falling on the simulated detector,
+        e.g. to switch between a dark, reference and sample measurement.
+        """
+        return self._lines
+
+    @lines.setter
+    def lines(self, lines: list[EmissionLine]) -> None:
+        self._lines = list(lines)
+        self._signal = self._calculate_signal()
+
+    def _calculate_signal(self) -> np.ndarray:
+        """Calculate the noiseless signal in counts per microsecond."""
+        wavelengths = np.polynomial.polynomial.polyval(
+            np.arange(NUM_PIXELS), self.wavelength_calibration_coefficients
+        )
+        signal = np.zeros(NUM_PIXELS)
+        for line in self.lines:
+            signal += line.intensity * np.exp(
+                -0.5 * ((wavelengths - line.wavelength) / line.width) ** 2
+            )
+        # dark pixels are optically masked
+        signal[:NUM_DARK_PIXELS] = 0
+        return signal / 1e6
+
+    def write(self, endpoint: int, data: bytes, timeout: int | None = None) -> int:
+        """Write a command to the device.
+
+        Args:
+            endpoint: the endpoint address, must be 0x01.
+            data: the command bytes.
+            timeout: ignored.
+
+        Returns:
+            The number of bytes written.
+        """
+        if endpoint != 0x01:
+            raise usb.core.USBError(f"Invalid endpoint {endpoint:#04x}")
+        if self.transfer_latency:
+            time.sleep(self.transfer_latency)
+        command, payload = data[0], bytes(data[1:])
+        match command:
+            case 0x01:
+                self.integration_time = DEFAULT_INTEGRATION_TIME
+                self.trigger_mode = TriggerMode.NORMAL
+                self.shutdown = False
+                self._pending_requests = 0
+                self._stale_spectra = 0
+                for queue in self._queues.values():
+                    queue.clear()
+            case 0x02:
+                integration_time = int.from_bytes(payload[:4], "little")
+                if integration_time != self.integration_time:
+                    if not self._stale_spectra:
+                        self._stale_integration_time = self.integration_time
+                    self._stale_spectra = STALE_SPECTRA
+                self.integration_time = integration_time
+            case 0x04:
+                self.shutdown = payload[:2] == b"\x00\x00"
+            case 0x05:
+                self._queue_answer(bytes(data[:2]), self._query(payload[0]))
+            case 0x09:
+                if self.trigger_mode in (TriggerMode.NORMAL, TriggerMode.SOFTWARE):
+                    self._queue_spectrum()
+                else:
+                    self._pending_requests += 1
+            case 0x0A:
+                self.trigger_mode = TriggerMode(int.from_bytes(payload[:2], "little"))
+            case _:
+                raise usb.core.USBError(f"Unsupported command {command:#04x}")
+        return len(data)
+
+    def read(
+        self,
+        endpoint: int,
+        size_or_buffer: "int | array.array[int]",
+        timeout: int | None = None,
+    ) -> "array.array[int] | int":
+        """Read data from the device.
+
+        Like PyUSB, consecutive packets are read until the requested size is
+        reached or a short packet is read.
+
+        Args:
+            endpoint: the endpoint address, 0x81 or 0x82.
+            size_or_buffer: the number of bytes to read, or a buffer to read
+                into.
+            timeout: the timeout in milliseconds.
+
+        Returns:
+            The data that was read or, if a buffer was passed, the number of
+            bytes read into it.
+
+        Raises:
+            usb.core.USBTimeoutError: no data became available in time.
+        """
+        if self.transfer_latency:
+            time.sleep(self.transfer_latency)
+        queue = self._queues[endpoint]
+        if not queue:
+            raise usb.core.USBTimeoutError("Operation timed out")
+        delay = queue[0][0] - time.monotonic()
+        if delay > 0:
+            if timeout is not None and delay > timeout / 1_000:
+                time.sleep(timeout / 1_000)
+                raise usb.core.USBTimeoutError("Operation timed out")
+            time.sleep(delay)
+
+        size = (
+            len(size_or_buffer)
+            if isinstance(size_or_buffer, array.array)
+            else size_or_buffer
+        )
+        data = bytearray()
+        while queue and len(data) + len(queue[0][1]) <= size:
+            _, packet = queue.popleft()
+            data += packet
+            if len(packet) < PACKET_SIZE:
+                break
+
+        if isinstance(size_or_buffer, array.array):
+            size_or_buffer[: len(data)] = array.array("B", data)
+            return len(data)
+        return array.array("B", data)
+
+    def trigger(self) -> None:
+        """Simulate an external trigger pulse.
+
+        In the external trigger modes, this acquires a spectrum for each
+        pending spectrum request.
+        """
+        if self.trigger_mode in (TriggerMode.NORMAL, TriggerMode.SOFTWARE):
+            return
+        for _ in range(self._pending_requests):
+            self._queue_spectrum()
+        self._pending_requests = 0
+
+    def _queue_answer(self, command: bytes, value: bytes) -> None:
+        """Queue the answer to a query on endpoint 0x81."""
+        answer = (command + value).ljust(17, b"\x00")
+        self._queues[0x81].append((time.monotonic(), answer))
+
+    def _query(self, index: int) -> bytes:
+        """Return the value of a configuration parameter."""
+        coefficients = self.wavelength_calibration_coefficients
+        match index:
+            case 0:
+                value = self.serial_number
+            case 1 | 2 | 3 | 4:
+                value = f"{coefficients[index - 1]:.7g}"
+            case 5:
+                value = "0"
+            case 6:
+                value = "1"
+            case 7 | 8 | 9 | 10 | 11 | 12 | 13:
+                value = "0"
+            case 14:
+                value = "7"
+            case 15:
+                value = "SIMULATED"
+            case 16:
+                value = "USB2000+"
+            case 0x11:
+                return b"\x00\x00\x00\x00" + self.saturation_level.to_bytes(2, "little")
+            case _:
+                value = ""
+        return value.encode() + b"\x00"
+
+    def _queue_spectrum(self) -> None:
+        """Acquire a spectrum and queue it on endpoint 0x82."""
+        integration_time = self.integration_time
+        available = time.monotonic() + integration_time / 1e6 * self.latency_factor
+        if self._stale_spectra:
+            integration_time = self._stale_integration_time
+            available = time.monotonic()
+            self._stale_spectra -= 1
+        intensities = self._rng.normal(
+            self.dark_level + self._signal * integration_time, self.noise
+        )
+        data = np.clip(intensities, 0, self.saturation_level).astype("<u2").tobytes()
+        self._queue_frame(data, available)
+
+    def _queue_frame(self, data: bytes, available: float) -> None:
+        """Queue the packets of a raw spectrum on endpoint 0x82.
+
+        Args:
+            data: the raw little-endian pixel data.
+            available: the `time.monotonic()` value at which the spectrum can
+                be read.
+        """
+        queue = self._queues[0x82]
+        for start in range(0, len(data), PACKET_SIZE):
+            queue.append((available, data[start : start + PACKET_SIZE]))
+        queue.append((available, bytes([SYNC_BYTE])))
@@ -0,0 +1,196 @@
+import functools
+import math
+
+import numpy as np
+
+__all__ = ["Boxcar", "Smoother", "gaussian", "savitzky_golay"]
+
+
+class Smoother:
+    """A linear smoothing filter with precomputed weights.
+
+    Away from the ends of the spectrum, each pixel is the weighted sum of the
+    `window` pixels centered on it, calculated as a single convolution. The
+    first and last `window // 2` pixels have no full window, so they are
+    calculated from the first and last `window` pixels using separate,
+    precomputed edge weights, which depend on the filter.
+
+    Use the factory functions `savitzky_golay()` and `gaussian()`, which cache
+    the filters, so that the weights are only calculated once for each set of
+    parameters.
+    """
+
+    def __init__(
+        self, kernel: np.ndarray, left_edge: np.ndarray, right_edge: np.ndarray
+    ) -> None:
+        """Initialize the filter.
+
+        Args:
+            kernel: the weights of the pixels in a window, which must have an
+                odd length.
+            left_edge: the (window // 2, window) weights of the first pixels of
+                a spectrum for calculating the first window // 2 pixels.
+            right_edge: likewise, for the last pixels.
+        """
+        # np.convolve() reverses the kernel, so store it reversed
+        self._kernel = np.ascontiguousarray(kernel[::-1], dtype=np.float64)
+        self._left_edge = np.ascontiguousarray(left_edge, dtype=np.float64)
+        self._right_edge = np.ascontiguousarray(right_edge, dtype=np.float64)
+        for weights in (self._kernel, self._left_edge, self._right_edge):
+            weights.flags.writeable = False
+
+    @property
+    def window(self) -> int:
+        """The number of pixels in the window."""
+        return len(self._kernel)
+
+    @property
+    def kernel(self) -> np.ndarray:
+        """The weights of the pixels in a window (read-only)."""
+        return self._kernel[::-1]
+
+    def apply(
+        self, intensities: np.ndarray, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Smooth a spectrum.
+
+        Args:
+            intensities: the spectrum, which must be at least `window` pixels
+                long.
+            out: an optional float array to store the result in, which may be
+                `intensities` itself.
+
+        Returns:
+            The smoothed spectrum.
+        """
+        window = self.window
+        half = window // 2
+        if len(intensities) < window:
+            raise ValueError(f"The spectrum must be at least {window} pixels long.")
+        # calculate everything before writing, since out may be intensities
+        left = self._left_edge @ intensities[:window]
+        right = self._right_edge @ intensities[-window:]
+        center = np.convolve(intensities, self._kernel, mode="valid")
+        if out is None:
+            out = np.empty(len(intensities))
+        out[half : len(out) - half] = center
+        out[:half] = left
+        out[len(out) - half :] = right
+        return out
+
+
+class Boxcar:
+    """Average each pixel with `width` pixels on either side.
+
+    Near the ends of the spectrum fewer pixels are available and the average
+    is taken over the pixels that are. The average is calculated from a
+    cumulative sum, so the cost does not depend on the width, and all buffers
+    are allocated once for the length of the spectra.
+    """
+
+    def __init__(self, width: int, size: int) -> None:
+        """Initialize the filter.
+
+        Args:
+            width: the number of neighbouring pixels on either side.
+            size: the number of pixels in the spectra.
+        """
+        if width < 1:
+            raise ValueError("The boxcar width must be at least 1.")
+        if width >= size:
+            raise ValueError(f"The boxcar width must be smaller than {size}.")
+        self.width = width
+        # Precompute the window boundaries so that the average can be
+        # calculated from a cumulative sum without temporary arrays.
+        pixels = np.arange(size)
+        self._start = np.maximum(pixels - width, 0)
+        self._end = np.minimum(pixels + width + 1, size)
+        self._norm = 1 / (self._end - self._start)
+        self._cumsum = np.zeros(size + 1)
+        self._tmp = np.empty(size)
+
+    def apply(
+        self, intensities: np.ndarray, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Smooth a spectrum.
+
+        Args:
+            intensities: the spectrum.
+            out: an optional float array to store the result in, which may be
+                `intensities` itself.
+
+        Returns:
+            The smoothed spectrum.
+        """
+        if out is None:
+            out = np.empty(len(intensities))
+        cumsum = self._cumsum
+        np.cumsum(intensities, out=cumsum[1:])
+        # the indices are valid, and unlike the default mode, 'clip' writes
+        # directly into the output array instead of into a temporary buffer
+        np.take(cumsum, self._end, out=out, mode="clip")
+        np.take(cumsum, self._start, out=self._tmp, mode="clip")
+        out -= self._tmp
+        out *= self._norm
+        return out
+
+
+def _truncated_edges(kernel: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return edge weights which use the part of the kernel inside the spectrum.
+
+    The truncated kernel is renormalized, so the edge pixels are weighted
+    averages of the pixels that are available.
+    """
+    window = len(kernel)
+    half = window // 2
+    left = np.zeros((half, window))
+    for pixel in range(half):
+        left[pixel, : pixel + half + 1] = kernel[half - pixel :]
+    left /= left.sum(axis=1, keepdims=True)
+    return left, left[::-1, ::-1]
+
+
+@functools.cache
+def gaussian(sigma: float, truncate: float = 4.0) -> Smoother:
+    """Return a filter which convolves the spectrum with a Gaussian.
+
+    Near the ends of the spectrum the Gaussian is truncated and renormalized.
+
+    Args:
+        sigma: the standard deviation of the Gaussian in pixels.
+        truncate: the half width of the window in standard deviations.
+    """
+    if sigma <= 0:
+        raise ValueError("The standard deviation must be positive.")
+    half = max(math.ceil(truncate * sigma), 1)
+    pixels = np.arange(-half, half + 1)
+    kernel = np.exp(-0.5 * (pixels / sigma) ** 2)
+    kernel /= kernel.sum()
+    return Smoother(kernel, *_truncated_edges(kernel))
+
+
+@functools.cache
+def savitzky_golay(window: int, order: int = 2) -> Smoother:
+    """Return a Savitzky-Golay filter.
+
+    Each pixel is replaced by the value of a polynomial fitted to the window
+    of pixels centered on it, which preserves the height and width of peaks
+    much better than a boxcar average of the same width. Near the ends of the
+    spectrum, the polynomial fitted to the first or last window of pixels is
+    used.
+
+    Args:
+        window: the number of pixels in the window, which must be odd.
+        order: the order of the polynomial, smaller than the window.
+    """
+    if window < 3 or window % 2 == 0:
+        raise ValueError("The window must be an odd number of at least 3 pixels.")
+    if not 0 <= order < window:
+        raise ValueError("The order must be at least 0 and smaller than the window.")
+    half = window // 2
+    # the least-squares fit of a polynomial to the window, as a linear map from
+    # the pixel values to the polynomial coefficients
+    fit = np.linalg.pinv(np.vander(np.arange(window), order + 1, increasing=True))
+    # the fitted values at the center and at the edges of the window
+    evaluate = np.vander(np.arange(window), order + 1, increasing=True) @ fit
+    return Smoother(evaluate[half], evaluate[:half], evaluate[window - half :])
@@ -1,17 +1,88 @@
-from typing import Iterator
+import enum
+import time
+from collections.abc import Generator, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 
-from ocean_optics.usb2000plus import DeviceNotFoundError, OceanOpticsUSB2000Plus
+from ocean_optics.accumulator import SpectrumAccumulator
+from ocean_optics.acquisition import AcquisitionEngine
+from ocean_optics.bands import Band, BandChannels
+from ocean_optics.cache import user_cache_dir
+from ocean_optics.exposure import ExposureResult, auto_exposure
+from ocean_optics.peaks import PeakFinder, Peaks, PeakTracker
+from ocean_optics.pipeline import Pipeline, Stage
+from ocean_optics.references import ReferenceStore
+from ocean_optics.usb2000plus import (
+    DeviceNotFoundError,
+    OceanOpticsUSB2000Plus,
+    TriggerMode,
+    list_devices,
+)
 
-__all__ = ["DeviceNotFoundError", "SpectroscopyExperiment"]
+__all__ = [
+    "DeviceNotFoundError",
+    "MeasurementMode",
+    "ReferenceNotAvailableError",
+    "SpectroscopyExperiment",
+    "get_spectra",
+    "open_experiments",
+]
+
+
+class ReferenceNotAvailableError(Exception):
+    """Raised when a dark or reference spectrum is needed but not available."""
+
+
+class MeasurementMode(enum.Enum):
+    """The quantity calculated from the measured spectra."""
+
+    INTENSITY = "intensity"
+    DARK_SUBTRACTED = "dark-subtracted"
+    TRANSMITTANCE = "transmittance"
+    ABSORBANCE = "absorbance"
 
 
 class SpectroscopyExperiment:
     stopped = True
+    accumulator: SpectrumAccumulator | None = None
+
+    _mode = MeasurementMode.INTENSITY
+    _dark: np.ndarray | None = None
+    _inverse_reference: np.ndarray | None = None
+    _references_integration_time: int | None = None
+
+    def __init__(
+        self,
+        device: OceanOpticsUSB2000Plus | None = None,
+        use_cache: bool = True,
+        serial_number: str | None = None,
+    ) -> None:
+        """Open the spectroscopy experiment.
 
-    def __init__(self) -> None:
-        self.device = OceanOpticsUSB2000Plus()
+        Dark and reference spectra are stored per integration time and, by
+        default, saved in the user cache directory, keyed by serial number, so
+        that they are available in later sessions.
+
+        Args:
+            device: the spectrometer to use. By default, the device with the
+                given serial number or the first connected device is opened.
+            use_cache: load and save dark and reference spectra in the user
+                cache directory.
+            serial_number: the serial number of the device to open, if
+                `device` is not given.
+        """
+        if device is None:
+            device = OceanOpticsUSB2000Plus(serial_number=serial_number)
+        self.device = device
+        path = (
+            user_cache_dir() / "references" / f"{device.config.serial_number}.npz"
+            if use_cache
+            else None
+        )
+        self.references = ReferenceStore(path=path)
+        self.pipeline = Pipeline(device.wavelengths)
+        self._processed = np.empty(len(device.wavelengths))
 
     def get_spectrum(self) -> tuple[np.ndarray, np.ndarray]:
         """Record a spectrum.
@@ -22,9 +93,12 @@ class SpectroscopyExperiment:
             units (but should be calibrated so that different devices yield the
             same output).
         """
-        return self.device.get_spectrum()
+        wavelengths, intensities = self.device.get_spectrum()
+        return wavelengths, self.process_spectrum(intensities, out=intensities)
 
-    def integrate_spectrum(self, count: int) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    def integrate_spectrum(
+        self, count: int, track_variance: bool = False
+    ) -> Generator[tuple[np.ndarray, np.ndarray], None, None]:
         """Record a spectrum by integrating over multiple measurements.
 
         Record an integrated spectrum using the spectrometer. This method acts
@@ -32,12 +106,23 @@ class SpectroscopyExperiment:
         increase the signal to noise ratio. After each measurement, the current
         dataset is yielded. The unit of intensity is arbitrary.
 
+        The measurements are summed in a running sum, available as the
+        `accumulator` attribute of the class instance. The yielded intensity
+        array is that running sum, which is updated in place by the next
+        measurement, so make a copy if you want to keep intermediate results.
+        In the dark-subtracted measurement mode the dark-subtracted sum is
+        yielded instead, and in the transmittance and absorbance modes the
+        quantity calculated from the mean spectrum. These are also updated in
+        place.
+
         If the `stopped` attribute of the class instance is set to `True` during
         the measurement, no further measurements are taken and the iterator will
         finish executing.
 
         Args:
             count: The number of measurements to perform.
+            track_variance: Also track the per-pixel variance, which is
+                available from the `accumulator` attribute.
 
         Yields:
             A tuple of `np.ndarrays` with wavelength, intensity data. The
@@ -46,14 +131,337 @@ class SpectroscopyExperiment:
             same output).
         """
         self.stopped = False
-        all_spectra = []
+        wavelengths = self.device.wavelengths
+        self.accumulator = SpectrumAccumulator(len(wavelengths), track_variance)
+        intensities = np.empty(len(wavelengths))
+        out = (
+            None
+            if self._mode is MeasurementMode.INTENSITY and not self.pipeline
+            else self._processed
+        )
         for _ in range(count):
-            wavelengths, intensities = self.device.get_spectrum()
-            all_spectra.append(intensities)
-            yield wavelengths, np.sum(all_spectra, axis=0)
+            wavelengths, _ = self.device.get_spectrum(out=intensities)
+            if (stats := self.device.stats) is not None:
+                t0 = time.perf_counter()
+                self.accumulator.add(intensities)
+                stats.record("accumulate", t0)
+            else:
+                self.accumulator.add(intensities)
+            yield (
+                wavelengths,
+                self.process_spectrum(
+                    self.accumulator.sum, self.accumulator.count, out=out
+                ),
+            )
             if self.stopped:
                 break
 
+    def set_measurement_mode(self, mode: MeasurementMode) -> None:
+        """Set the quantity calculated from the measured spectra.
+
+        Dark-subtracted spectra require a dark spectrum, transmittance and
+        absorbance also require a reference spectrum, measured at the current
+        integration time.
+
+        Args:
+            mode: the measurement mode.
+        """
+        self._mode = MeasurementMode(mode)
+
+    def get_measurement_mode(self) -> MeasurementMode:
+        """Return the quantity calculated from the measured spectra."""
+        return self._mode
+
+    def set_processing_stages(self, stages: Sequence[Stage]) -> None:
+        """Set the processing stages applied after the measurement mode.
+
+        Args:
+            stages: the stages, in order of execution, e.g. from
+                `ocean_optics.pipeline.parse_stages()`.
+
+        Raises:
+            ValueError: a stage can't be applied to the spectra of the device.
+        """
+        self.pipeline.set_stages(stages)
+
+    def get_processing_stages(self) -> tuple[Stage, ...]:
+        """Return the processing stages applied after the measurement mode."""
+        return self.pipeline.stages
+
+    def capture_dark(self, count: int = 10) -> np.ndarray:
+        """Measure and store the dark spectrum for the current integration time.
+
+        Block the light path to the spectrometer before calling this method.
+
+        Args:
+            count: the number of spectra to average.
+
+        Returns:
+            The dark spectrum.
+        """
+        dark = self._measure_mean(count)
+        self.references.set_dark(self.device.get_integration_time(), dark)
+        self._update_references()
+        return dark
+
+    def capture_reference(self, count: int = 10) -> np.ndarray:
+        """Measure and store the reference spectrum for the current integration time.
+
+        The reference is the spectrum of the light source without the sample.
+        It is stored without subtracting the dark spectrum, so a dark spectrum
+        can be measured before or after the reference spectrum.
+
+        Args:
+            count: the number of spectra to average.
+
+        Returns:
+            The reference spectrum.
+        """
+        reference = self._measure_mean(count)
+        self.references.set_reference(self.device.get_integration_time(), reference)
+        self._update_references()
+        return reference
+
+    def track_peaks(
+        self,
+        count: int | None = None,
+        threshold: float | None = None,
+        baseline: float | None = None,
+        max_shift: float = 1.0,
+        method: str = "gaussian",
+    ) -> Iterator[Peaks]:
+        """Continuously find and track the peaks in the spectra.
+
+        Spectra are acquired in the background at the full frame rate of the
+        device and processed according to the measurement mode. The peaks are
+        found by a `PeakFinder` and their identities are tracked across
+        spectra by a `PeakTracker`.
+
+        If the `stopped` attribute of the class instance is set to `True`, no
+        further spectra are processed and the iterator will finish executing.
+
+        Args:
+            count: the number of spectra to process. By default, until stopped.
+            threshold: the minimum height of a peak above the baseline, see
+                `PeakFinder`.
+            baseline: the baseline of the spectra, see `PeakFinder`.
+            max_shift: the maximum change in wavelength of a peak between
+                spectra, in nanometers.
+            method: the method used to fit the peaks, 'gaussian' or
+                'parabolic'.
+
+        Yields:
+            The peaks of each spectrum.
+        """
+        self.stopped = False
+        finder = PeakFinder(self.device.wavelengths, threshold, baseline, method=method)
+        tracker = PeakTracker(max_shift)
+        with AcquisitionEngine(self.device) as engine:
+            num_spectra = 0
+            while count is None or num_spectra < count:
+                frame = engine.next_frame()
+                _, intensities = engine.calibrate(frame)
+                self.process_spectrum(intensities, out=intensities)
+                yield tracker.update(finder.find(intensities, frame.timestamp))
+                num_spectra += 1
+                if self.stopped:
+                    break
+
+    def track_bands(
+        self, bands: Sequence[Band], count: int | None = None, average: bool = False
+    ) -> Iterator[tuple[float, np.ndarray]]:
+        """Continuously calculate the values of wavelength bands.
+
+        Spectra are acquired in the background at the full frame rate of the
+        device and processed according to the measurement mode, after which
+        the values of all bands are calculated by a `BandChannels` instance.
+
+        If the `stopped` attribute of the class instance is set to `True`, no
+        further spectra are processed and the iterator will finish executing.
+
+        Args:
+            bands: the wavelength bands.
+            count: the number of spectra to process. By default, until stopped.
+            average: calculate the mean value in each band instead of the
+                integral over wavelength.
+
+        Yields:
+            The `time.monotonic()` value at which each spectrum was read and a
+            new array of the values of the bands.
+        """
+        self.stopped = False
+        channels = BandChannels(self.device.wavelengths, bands, average)
+        with AcquisitionEngine(self.device) as engine:
+            num_spectra = 0
+            while count is None or num_spectra < count:
+                frame = engine.next_frame()
+                _, intensities = engine.calibrate(frame)
+                self.process_spectrum(intensities, out=intensities)
+                yield frame.timestamp, channels.compute(intensities)
+                num_spectra += 1
+                if self.stopped:
+                    break
+
+    def sweep_integration_time(
+        self, integration_times: Iterable[int], count: int = 1
+    ) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+        """Record spectra over a range of integration times.
+
+        The integration times are visited in ascending order. After changing
+        the integration time, the spectra that were still integrated using the
+        previous integration time are discarded, and in ascending order those
+        are the shortest ones. When the sweep is done or stopped, the original
+        integration time is restored.
+
+        If the `stopped` attribute of the class instance is set to `True` during
+        the sweep, no further integration times are visited.
+
+        Args:
+            integration_times: the integration times in microseconds.
+            count: the number of spectra to average for each integration time.
+
+        Yields:
+            A tuple of the integration time and `np.ndarrays` with wavelength
+            and mean intensity data, processed according to the measurement
+            mode.
+        """
+        self.stopped = False
+        original_integration_time = self.device.get_integration_time()
+        try:
+            for integration_time in sorted(set(integration_times)):
+                self.set_integration_time(integration_time)
+                intensities = self._measure_mean(count)
+                yield (
+                    integration_time,
+                    self.device.wavelengths,
+                    self.process_spectrum(intensities, out=intensities),
+                )
+                if self.stopped:
+                    break
+        finally:
+            self.set_integration_time(original_integration_time)
+
+    def auto_exposure(
+        self, target: float = 0.8, tolerance: float = 0.05, max_iterations: int = 10
+    ) -> ExposureResult:
+        """Adjust the integration time so the peak reaches a target level.
+
+        See `ocean_optics.exposure.auto_exposure()`. Note that dark and
+        reference spectra are stored per integration time, so they may have to
+        be measured again afterwards.
+
+        Args:
+            target: the desired peak height as a fraction of the saturation
+                level.
+            tolerance: the accepted absolute deviation from the target fraction.
+            max_iterations: the maximum number of spectra to measure.
+
+        Returns:
+            The final integration time and whether it converged.
+        """
+        result = auto_exposure(self.device, target, tolerance, max_iterations)
+        self._update_references()
+        return result
+
+    def _measure_mean(self, count: int) -> np.ndarray:
+        """Return the mean of a number of spectra, as measured by the device."""
+        accumulator = SpectrumAccumulator(len(self.device.wavelengths))
+        intensities = np.empty(len(self.device.wavelengths))
+        for _ in range(count):
+            self.device.get_spectrum(out=intensities)
+            accumulator.add(intensities)
+        return accumulator.mean
+
+    def _update_references(self) -> None:
+        """Select the dark and reference spectra for the integration time.
+
+        The denominator of the transmittance only depends on the dark and
+        reference spectra, so its inverse is calculated once.
+        """
+        integration_time = self.device.get_integration_time()
+        self._dark = self.references.get_dark(integration_time)
+        reference = self.references.get_reference(integration_time)
+        if self._dark is not None and reference is not None:
+            difference = reference - self._dark
+            with np.errstate(divide="ignore"):
+                self._inverse_reference = np.where(
+                    difference > 0, 1 / difference, np.nan
+                )
+        else:
+            self._inverse_reference = None
+        self._references_integration_time = integration_time
+
+    def process_spectrum(
+        self,
+        intensities: np.ndarray,
+        count: int = 1,
+        out: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Calculate the quantity of the current measurement mode.
+
+        The stages of the processing pipeline are applied to the result.
+
+        Args:
+            intensities: the calibrated intensities of a spectrum, or the sum of
+                `count` spectra.
+            count: the number of spectra summed in `intensities`.
+            out: an optional array to store the result in, which may be
+                `intensities` itself.
+
+        Returns:
+            The intensities, the dark-subtracted intensities, the transmittance
+            or the absorbance, depending on the measurement mode.
+
+        Raises:
+            ReferenceNotAvailableError: the dark or reference spectrum for the
+                current integration time is not available.
+        """
+        if (stats := self.device.stats) is not None:
+            t0 = time.perf_counter()
+            result = self._process_spectrum(intensities, count, out)
+            stats.record("process", t0)
+        else:
+            result = self._process_spectrum(intensities, count, out)
+        if self.pipeline:
+            if result is intensities and out is None:
+                # don't overwrite the spectrum of the caller
+                result = intensities.copy()
+            self.pipeline.run(result, stats)
+        return result
+
+    def _process_spectrum(
+        self, intensities: np.ndarray, count: int, out: np.ndarray | None
+    ) -> np.ndarray:
+        if self._references_integration_time != self.device.get_integration_time():
+            self._update_references()
+        mode = self._mode
+        if mode is MeasurementMode.INTENSITY:
+            if out is None:
+                return intensities
+            out[...] = intensities
+            return out
+
+        if self._dark is None:
+            raise ReferenceNotAvailableError(
+                "No dark spectrum available for the current integration time."
+            )
+        result: np.ndarray = np.multiply(intensities, 1 / count, out=out)
+        result -= self._dark
+        if mode is MeasurementMode.DARK_SUBTRACTED:
+            result *= count
+            return result
+
+        if self._inverse_reference is None:
+            raise ReferenceNotAvailableError(
+                "No reference spectrum available for the current integration time."
+            )
+        result *= self._inverse_reference
+        if mode is MeasurementMode.ABSORBANCE:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                np.log10(result, out=result)
+            np.negative(result, out=result)
+        return result
+
     def set_integration_time(self, integration_time: int) -> None:
         """Set device integration time.
 
@@ -64,3 +472,76 @@ class SpectroscopyExperiment:
             integration_time: The desired integration time in microseconds.
         """
         self.device.set_integration_time(integration_time)
+        self._update_references()
+
+    def set_scans_to_average(self, scans_to_average: int) -> None:
+        """Set the number of scans to average for each spectrum.
+
+        Args:
+            scans_to_average: the number of scans to average, at least 1.
+        """
+        self.device.set_scans_to_average(scans_to_average)
+
+    def set_boxcar_width(self, boxcar_width: int) -> None:
+        """Set the boxcar width for smoothing spectra.
+
+        Args:
+            boxcar_width: the number of neighbouring pixels on either side to
+                average, or 0 to disable the boxcar average.
+        """
+        self.device.set_boxcar_width(boxcar_width)
+
+    def set_trigger_mode(self, trigger_mode: TriggerMode) -> None:
+        """Set the trigger mode of the device.
+
+        Args:
+            trigger_mode: the trigger mode.
+        """
+        self.device.set_trigger_mode(trigger_mode)
+
+    def set_corrections(
+        self, nonlinearity: bool = False, stray_light: bool = False
+    ) -> None:
+        """Enable or disable corrections of the spectra.
+
+        Args:
+            nonlinearity: correct for the nonlinear response of the detector.
+            stray_light: correct for stray light.
+        """
+        self.device.set_corrections(nonlinearity, stray_light)
+
+
+def open_experiments(serial_number: str | None = "all") -> list[SpectroscopyExperiment]:
+    """Open spectroscopy experiments for one or all connected devices.
+
+    Args:
+        serial_number: the serial number of the device to open, "all" to open
+            all connected devices or None to open the first connected device.
+
+    Raises:
+        DeviceNotFoundError: no (matching) device is connected.
+    """
+    if serial_number != "all":
+        return [SpectroscopyExperiment(serial_number=serial_number)]
+    serial_numbers = list_devices()
+    if not serial_numbers:
+        raise DeviceNotFoundError()
+    return [SpectroscopyExperiment(serial_number=serial) for serial in serial_numbers]
+
+
+def get_spectra(
+    experiments: Sequence[SpectroscopyExperiment],
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Record a spectrum with each experiment, concurrently.
+
+    Each device is read in a separate thread, so recording spectra with several
+    devices takes about as long as recording a single spectrum.
+
+    Returns:
+        A tuple of wavelength, intensity data for each experiment, like
+        `SpectroscopyExperiment.get_spectrum()`.
+    """
+    if len(experiments) == 1:
+        return [experiments[0].get_spectrum()]
+    with ThreadPoolExecutor(max_workers=len(experiments)) as executor:
+        return list(executor.map(SpectroscopyExperiment.get_spectrum, experiments))
@@ -0,0 +1,400 @@
+"""Stream spectra to other processes over a local socket.
+
+Only one process can own the USB device. `SpectrumServer` acquires spectra and
+publishes them to any number of clients over a TCP or Unix socket.
+`SpectrumClient` receives the spectra and acts as the transport of an
+`OceanOpticsUSB2000Plus`, so a remote device can be used in place of a local
+one.
+
+All messages consist of a one-byte message type and the payload size as a
+little-endian 32-bit integer, followed by the payload:
+
+- ``H`` (header, server to client): the size of the device configuration as a
+  32-bit integer, the device configuration as JSON and the wavelengths of all
+  pixels as 64-bit floats. This is sent once, when a client connects.
+- ``F`` (frame, server to client): the sequence number as a 64-bit integer,
+  the UNIX timestamp as a 64-bit float and the integration time in
+  microseconds as a 32-bit integer, followed by the raw 16-bit intensities of
+  all pixels.
+- ``I`` (integration time, client to server): the integration time in
+  microseconds as a 32-bit integer.
+"""
+
+import array
+import asyncio
+import collections
+import pathlib
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+import usb.core
+
+from ocean_optics.acquisition import AcquisitionEngine
+from ocean_optics.usb2000plus import (
+    FRAME_SIZE,
+    SYNC_BYTE,
+    DeviceConfiguration,
+    OceanOpticsUSB2000Plus,
+)
+
+__all__ = ["DEFAULT_PORT", "SpectrumClient", "SpectrumServer", "parse_address"]
+
+DEFAULT_PORT = 7417
+
+MESSAGE_HEADER = struct.Struct("<cI")
+FRAME_HEADER = struct.Struct("<qdI")
+CONFIG_SIZE = struct.Struct("<I")
+INTEGRATION_TIME = struct.Struct("<I")
+
+HEADER = b"H"
+FRAME = b"F"
+SET_INTEGRATION_TIME = b"I"
+
+
+def encode_message(message_type: bytes, payload: bytes) -> bytes:
+    """Prefix a payload with the message type and size."""
+    return MESSAGE_HEADER.pack(message_type, len(payload)) + payload
+
+
+def parse_address(address: str) -> tuple[str, int] | pathlib.Path:
+    """Parse a server address.
+
+    Args:
+        address: 'HOST:PORT', 'HOST' to use the default port, or the path of a
+            Unix socket, which must contain a '/'.
+
+    Returns:
+        A (host, port) tuple or the path of the Unix socket.
+    """
+    if "/" in address:
+        return pathlib.Path(address)
+    host, _, port = address.rpartition(":")
+    if not host:
+        return address, DEFAULT_PORT
+    return host, int(port)
+
+
+class SpectrumServer:
+    """Publish spectra of a device to clients over a local socket.
+
+    Spectra are acquired continuously by an `AcquisitionEngine` and every raw
+    frame is encoded once and queued for all clients. Each client has a small
+    queue: when a client can't keep up, its oldest queued frames are dropped,
+    so slow clients receive fewer frames instead of stalling the acquisition.
+    Clients which don't accept any data for `client_timeout` seconds are
+    disconnected.
+    """
+
+    def __init__(
+        self,
+        device: OceanOpticsUSB2000Plus,
+        queue_size: int = 4,
+        client_timeout: float = 10.0,
+    ) -> None:
+        """Initialize the server.
+
+        Args:
+            device: the spectrometer to publish the spectra of.
+            queue_size: the maximum number of frames queued for each client.
+            client_timeout: the time in seconds after which a client which
+                doesn't accept data is disconnected.
+        """
+        self.device = device
+        self.queue_size = queue_size
+        self.client_timeout = client_timeout
+        self._clients: set[asyncio.Queue[bytes]] = set()
+        self._handlers: set[asyncio.Task[None]] = set()
+        self.dropped_frames = 0
+        """The total number of frames dropped for slow clients."""
+        config = device.config.to_json().encode()
+        self._header = encode_message(
+            HEADER,
+            CONFIG_SIZE.pack(len(config))
+            + config
+            + device.config.wavelength_axis().astype("<f8").tobytes(),
+        )
+
+    @property
+    def num_clients(self) -> int:
+        """The number of connected clients."""
+        return len(self._clients)
+
+    async def serve(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        path: pathlib.Path | None = None,
+        started: asyncio.Future[asyncio.Server] | None = None,
+    ) -> None:
+        """Acquire and publish spectra until cancelled.
+
+        Args:
+            host: the host name or IP address to listen on.
+            port: the TCP port to listen on, or 0 to pick a free port.
+            path: the path of a Unix socket to listen on instead of TCP.
+            started: an optional future which is set to the `asyncio.Server`
+                once the server is listening.
+        """
+        if path is not None:
+            server = await asyncio.start_unix_server(self._handle_client, path)
+        else:
+            server = await asyncio.start_server(self._handle_client, host, port)
+        if started is not None:
+            started.set_result(server)
+        engine = AcquisitionEngine(self.device)
+        engine.start()
+        try:
+            async with server:
+                await self._publish(engine)
+        finally:
+            for handler in self._handlers:
+                handler.cancel()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            if path is not None:
+                pathlib.Path(path).unlink(missing_ok=True)
+            await asyncio.get_running_loop().run_in_executor(None, engine.stop)
+
+    async def _publish(self, engine: AcquisitionEngine) -> None:
+        """Queue all frames of the acquisition engine for the clients."""
+        loop = asyncio.get_running_loop()
+        # convert monotonic timestamps of the frames to UNIX time
+        time_offset = time.time() - time.monotonic()
+        while True:
+            try:
+                frame = await loop.run_in_executor(None, engine.next_frame, 0.1)
+            except TimeoutError:
+                continue
+            payload = (
+                FRAME_HEADER.pack(
+                    frame.sequence,
+                    frame.timestamp + time_offset,
+                    self.device.get_integration_time(),
+                )
+                + frame.data.astype("<u2", copy=False).tobytes()
+            )
+            message = encode_message(FRAME, payload)
+            for queue in self._clients:
+                if queue.full():
+                    queue.get_nowait()
+                    self.dropped_frames += 1
+                queue.put_nowait(message)
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        queue: asyncio.Queue[bytes] = asyncio.Queue(self.queue_size)
+        self._clients.add(queue)
+        if (handler := asyncio.current_task()) is not None:
+            self._handlers.add(handler)
+        commands = asyncio.create_task(self._read_commands(reader))
+        try:
+            writer.write(self._header)
+            while not commands.done():
+                writer.write(await queue.get())
+                await asyncio.wait_for(writer.drain(), self.client_timeout)
+        except (ConnectionError, TimeoutError):
+            pass
+        finally:
+            self._clients.discard(queue)
+            self._handlers.discard(handler)
+            commands.cancel()
+            writer.close()
+
+    async def _read_commands(self, reader: asyncio.StreamReader) -> None:
+        """Handle commands sent by a client, until it disconnects."""
+        try:
+            while True:
+                message_type, size = MESSAGE_HEADER.unpack(
+                    await reader.readexactly(MESSAGE_HEADER.size)
+                )
+                payload = await reader.readexactly(size)
+                if message_type == SET_INTEGRATION_TIME:
+                    (integration_time,) = INTEGRATION_TIME.unpack(payload)
+                    self.device.set_integration_time(integration_time)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+
+class SpectrumClient:
+    """Receive spectra from a `SpectrumServer`.
+
+    The client implements the transport interface of `OceanOpticsUSB2000Plus`,
+    so that a remote device can be used like a local one, e.g.
+    `OceanOpticsUSB2000Plus(SpectrumClient("localhost"))`. Spectrum requests
+    return the next frame published by the server and configuration queries
+    are answered from the configuration sent by the server. Setting the
+    integration time, which the driver also does when it is initialized, is
+    forwarded to the server and affects all clients, unless the client is
+    created with `control=False`. Other settings, like the trigger mode, are
+    ignored.
+    """
+
+    config: DeviceConfiguration
+    """The configuration of the remote device."""
+    wavelengths: np.ndarray
+    """The wavelengths of all pixels of the remote device, including dark pixels."""
+
+    def __init__(
+        self, address: str, timeout: float = 5.0, control: bool = True
+    ) -> None:
+        """Connect to a server.
+
+        Args:
+            address: the address of the server, see `parse_address()`.
+            timeout: the time in seconds to wait for the connection.
+            control: forward changes of the integration time to the server.
+
+        Raises:
+            OSError: the server can't be reached.
+        """
+        self.control = control
+        match parse_address(address):
+            case pathlib.Path() as path:
+                self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._socket.settimeout(timeout)
+                self._socket.connect(str(path))
+            case (host, port):
+                self._socket = socket.create_connection((host, port), timeout)
+        self._file = self._socket.makefile("rb")
+        message_type, payload = self._receive()
+        if message_type != HEADER:
+            raise ConnectionError("Unexpected message from server.")
+        (config_size,) = CONFIG_SIZE.unpack_from(payload)
+        offset = CONFIG_SIZE.size + config_size
+        self.config = DeviceConfiguration.from_json(
+            payload[CONFIG_SIZE.size : offset].decode()
+        )
+        self.wavelengths = np.frombuffer(payload, dtype="<f8", offset=offset)
+        self._socket.settimeout(None)
+
+        self.timestamp = 0.0
+        """The UNIX time at which the most recent frame was read by the server."""
+        self._frame = bytearray(FRAME_SIZE)
+        self._sequence = -1
+        self._requests: collections.deque[int] = collections.deque()
+        self._answers: collections.deque[bytes] = collections.deque()
+        self._closed = False
+        self._new_frame = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Disconnect from the server."""
+        self._closed = True
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+        self._thread.join()
+
+    def write(self, endpoint: int, data: bytes, timeout: int | None = None) -> int:
+        """Handle a command of the driver, see `Transport.write()`."""
+        match data[0]:
+            case 0x02 if self.control:
+                integration_time = int.from_bytes(data[1:5], "little")
+                self._socket.sendall(
+                    encode_message(
+                        SET_INTEGRATION_TIME, INTEGRATION_TIME.pack(integration_time)
+                    )
+                )
+            case 0x05:
+                self._answers.append(bytes(data[:2]) + self._query(data[1]))
+            case 0x09:
+                # only frames acquired after this request are returned
+                self._requests.append(self._sequence)
+        return len(data)
+
+    def read(
+        self,
+        endpoint: int,
+        size_or_buffer: "int | array.array[int]",
+        timeout: int | None = None,
+    ) -> "array.array[int] | int":
+        """Return an answer or a spectrum, see `Transport.read()`.
+
+        Raises:
+            usb.core.USBTimeoutError: no data became available in time.
+        """
+        if endpoint == 0x81:
+            if not self._answers:
+                raise usb.core.USBTimeoutError("Operation timed out")
+            data = self._answers.popleft().ljust(17, b"\x00")
+        else:
+            if not self._requests:
+                raise usb.core.USBTimeoutError("Operation timed out")
+            requested = self._requests[0]
+            with self._new_frame:
+                if not self._new_frame.wait_for(
+                    lambda: self._sequence > requested or self._closed,
+                    None if timeout is None else timeout / 1_000,
+                ):
+                    raise usb.core.USBTimeoutError("Operation timed out")
+                if self._closed:
+                    raise usb.core.USBError("Connection to server closed")
+                self._requests.popleft()
+                data = bytes(self._frame) + bytes([SYNC_BYTE])
+
+        if isinstance(size_or_buffer, array.array):
+            size = min(len(size_or_buffer), len(data))
+            size_or_buffer[:size] = array.array("B", data[:size])
+            return size
+        return array.array("B", data[:size_or_buffer])
+
+    def _query(self, index: int) -> bytes:
+        """Return the value of a configuration parameter, like the device."""
+        config = self.config
+        match index:
+            case 0:
+                value = config.serial_number
+            case 1 | 2 | 3 | 4:
+                value = repr(config.wavelength_calibration_coefficients[index - 1])
+            case 5:
+                value = repr(config.stray_light_constant)
+            case 6 | 7 | 8 | 9 | 10 | 11 | 12 | 13:
+                value = repr(config.nonlinearity_correction_coefficients[index - 6])
+            case 14:
+                value = str(config.polynomial_order_nonlinearity_calibration)
+            case 15:
+                value = config.optical_bench
+            case 16:
+                value = config.device_configuration
+            case 0x11:
+                return bytes(4) + int(config.saturation_level).to_bytes(2, "little")
+            case _:
+                value = ""
+        return value.encode() + b"\x00"
+
+    def _receive(self) -> tuple[bytes, bytes]:
+        """Receive a message from the server."""
+        header = self._file.read(MESSAGE_HEADER.size)
+        if len(header) < MESSAGE_HEADER.size:
+            raise ConnectionError("Connection to server closed.")
+        message_type, size = MESSAGE_HEADER.unpack(header)
+        payload = self._file.read(size)
+        if len(payload) < size:
+            raise ConnectionError("Connection to server closed.")
+        return message_type, payload
+
+    def _run(self) -> None:
+        """Receive frames from the server in the background."""
+        try:
+            while not self._closed:
+                message_type, payload = self._receive()
+                if message_type != FRAME:
+                    continue
+                sequence, timestamp, _ = FRAME_HEADER.unpack_from(payload)
+                with self._new_frame:
+                    self._frame[:] = payload[FRAME_HEADER.size :]
+                    self.timestamp = timestamp
+                    self._sequence = sequence
+                    self._new_frame.notify_all()
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            with self._new_frame:
+                self._closed = True
+                self._new_frame.notify_all()
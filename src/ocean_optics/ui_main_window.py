@@ -3,16 +3,18 @@
 ################################################################################
 ## Form generated from reading UI file 'main_window.ui'
 ##
-## Created by: Qt User Interface Compiler version 6.8.1
+## Created by: Qt User Interface Compiler version 6.12.0
 ##
 ## WARNING! All changes made in this file will be lost when recompiling UI file!
 ################################################################################
 
-from PySide6.QtCore import QCoreApplication, QMetaObject, QRect
+from PySide6.QtCore import QCoreApplication, QMetaObject, QRect, Qt
 from PySide6.QtWidgets import (
+    QCheckBox,
     QFormLayout,
     QHBoxLayout,
     QLabel,
+    QLineEdit,
     QMenuBar,
     QProgressBar,
     QPushButton,
@@ -83,7 +85,9 @@ class Ui_MainWindow(object):
         self.integrationTimeSLabel = QLabel(self.centralwidget)
         self.integrationTimeSLabel.setObjectName("integrationTimeSLabel")
 
-        self.formLayout.setWidget(0, QFormLayout.LabelRole, self.integrationTimeSLabel)
+        self.formLayout.setWidget(
+            0, QFormLayout.ItemRole.LabelRole, self.integrationTimeSLabel
+        )
 
         self.integration_time = QSpinBox(self.centralwidget)
         self.integration_time.setObjectName("integration_time")
@@ -92,12 +96,16 @@ class Ui_MainWindow(object):
         self.integration_time.setSingleStep(1000)
         self.integration_time.setValue(100000)
 
-        self.formLayout.setWidget(0, QFormLayout.FieldRole, self.integration_time)
+        self.formLayout.setWidget(
+            0, QFormLayout.ItemRole.FieldRole, self.integration_time
+        )
 
         self.integrationsLabel = QLabel(self.centralwidget)
         self.integrationsLabel.setObjectName("integrationsLabel")
 
-        self.formLayout.setWidget(1, QFormLayout.LabelRole, self.integrationsLabel)
+        self.formLayout.setWidget(
+            1, QFormLayout.ItemRole.LabelRole, self.integrationsLabel
+        )
 
         self.num_integrations = QSpinBox(self.centralwidget)
         self.num_integrations.setObjectName("num_integrations")
@@ -105,7 +113,58 @@ class Ui_MainWindow(object):
         self.num_integrations.setMaximum(1000)
         self.num_integrations.setValue(20)
 
-        self.formLayout.setWidget(1, QFormLayout.FieldRole, self.num_integrations)
+        self.formLayout.setWidget(
+            1, QFormLayout.ItemRole.FieldRole, self.num_integrations
+        )
+
+        self.nonlinearity_correction = QCheckBox(self.centralwidget)
+        self.nonlinearity_correction.setObjectName("nonlinearity_correction")
+
+        self.formLayout.setWidget(
+            2, QFormLayout.ItemRole.SpanningRole, self.nonlinearity_correction
+        )
+
+        self.stray_light_correction = QCheckBox(self.centralwidget)
+        self.stray_light_correction.setObjectName("stray_light_correction")
+
+        self.formLayout.setWidget(
+            3, QFormLayout.ItemRole.SpanningRole, self.stray_light_correction
+        )
+
+        self.processingLabel = QLabel(self.centralwidget)
+        self.processingLabel.setObjectName("processingLabel")
+
+        self.formLayout.setWidget(
+            4, QFormLayout.ItemRole.LabelRole, self.processingLabel
+        )
+
+        self.processing = QLineEdit(self.centralwidget)
+        self.processing.setObjectName("processing")
+
+        self.formLayout.setWidget(4, QFormLayout.ItemRole.FieldRole, self.processing)
+
+        self.show_peaks = QCheckBox(self.centralwidget)
+        self.show_peaks.setObjectName("show_peaks")
+
+        self.formLayout.setWidget(5, QFormLayout.ItemRole.SpanningRole, self.show_peaks)
+
+        self.show_statistics = QCheckBox(self.centralwidget)
+        self.show_statistics.setObjectName("show_statistics")
+
+        self.formLayout.setWidget(
+            6, QFormLayout.ItemRole.SpanningRole, self.show_statistics
+        )
+
+        self.statistics = QLabel(self.centralwidget)
+        self.statistics.setObjectName("statistics")
+        self.statistics.setTextFormat(Qt.TextFormat.PlainText)
+        self.statistics.setAlignment(
+            Qt.AlignmentFlag.AlignLeading
+            | Qt.AlignmentFlag.AlignLeft
+            | Qt.AlignmentFlag.AlignTop
+        )
+
+        self.formLayout.setWidget(7, QFormLayout.ItemRole.SpanningRole, self.statistics)
 
         self.horizontalLayout_3.addLayout(self.formLayout)
 
@@ -147,5 +206,32 @@ class Ui_MainWindow(object):
         self.integrationsLabel.setText(
             QCoreApplication.translate("MainWindow", "# integrations", None)
         )
+        self.nonlinearity_correction.setText(
+            QCoreApplication.translate("MainWindow", "Nonlinearity correction", None)
+        )
+        self.stray_light_correction.setText(
+            QCoreApplication.translate("MainWindow", "Stray light correction", None)
+        )
+        self.processingLabel.setText(
+            QCoreApplication.translate("MainWindow", "Processing", None)
+        )
+        # if QT_CONFIG(tooltip)
+        self.processing.setToolTip(
+            QCoreApplication.translate(
+                "MainWindow",
+                "Processing stages applied to each spectrum, in order, e.g. baseline=340-360 savgol=11,3 normalize. Stages: boxcar=WIDTH, savgol=WINDOW,ORDER, gaussian=SIGMA, baseline=START-STOP, normalize[=START-STOP]",
+                None,
+            )
+        )
+        # endif // QT_CONFIG(tooltip)
+        self.processing.setPlaceholderText(
+            QCoreApplication.translate("MainWindow", "e.g. savgol=11,3 normalize", None)
+        )
+        self.show_peaks.setText(
+            QCoreApplication.translate("MainWindow", "Show peaks", None)
+        )
+        self.show_statistics.setText(
+            QCoreApplication.translate("MainWindow", "Timing statistics", None)
+        )
 
     # retranslateUi
@@ -1,16 +1,81 @@
+import array
+import dataclasses
+import enum
+import json
+import pathlib
+import time
 from dataclasses import dataclass
+from typing import Protocol
 
 import libusb_package
 import numpy as np
-import plotext as plt
 import usb.core
 import usb.util
 
+from ocean_optics.cache import user_cache_dir
+from ocean_optics.corrections import SpectrumCorrection
+from ocean_optics.instrumentation import AcquisitionStats
+from ocean_optics.smoothing import Boxcar
+
+# The USB2000+ has a 2048-pixel detector; the first pixels are optically masked
+# ('dark pixels') and are not part of the calibrated spectrum.
+NUM_PIXELS = 2048
+NUM_DARK_PIXELS = 20
+# A spectrum is transferred as little-endian 16-bit pixel values, followed by a
+# single sync byte.
+FRAME_SIZE = 2 * NUM_PIXELS
+SYNC_BYTE = 0x69
+# The device keeps acquiring spectra in the background, so after changing the
+# integration time this many spectra may still be integrated using the previous
+# integration time.
+STALE_SPECTRA = 2
+# Range of integration times supported by the device, in microseconds
+MIN_INTEGRATION_TIME = 1_000
+MAX_INTEGRATION_TIME = 65_535_000
+
+# USB vendor and product IDs of the USB2000+
+VENDOR_ID = 0x2457
+PRODUCT_ID = 0x101E
+
 
 class DeviceNotFoundError(Exception):
     """Raised when no compatible device is connected."""
 
 
+class Transport(Protocol):
+    """The interface used to communicate with a device.
+
+    PyUSB devices implement this interface, as does the software device in
+    `ocean_optics.simulation`.
+    """
+
+    def write(self, endpoint: int, data: bytes, timeout: int | None = None) -> int: ...
+
+    def read(
+        self,
+        endpoint: int,
+        size_or_buffer: "int | array.array[int]",
+        timeout: int | None = None,
+    ) -> "array.array[int] | int": ...
+
+
+class TriggerMode(enum.IntEnum):
+    """Trigger modes of the USB2000+."""
+
+    NORMAL = 0
+    SOFTWARE = 1
+    EXTERNAL_LEVEL = 2
+    EXTERNAL_SYNCHRONIZATION = 3
+    EXTERNAL_EDGE = 4
+
+
+@dataclass
+class AcquisitionSettings:
+    scans_to_average: int = 1
+    boxcar_width: int = 0
+    trigger_mode: TriggerMode = TriggerMode.NORMAL
+
+
 @dataclass
 class DeviceConfiguration:
     serial_number: str
@@ -22,16 +87,102 @@ class DeviceConfiguration:
     device_configuration: str
     saturation_level: np.uint16
 
+    def wavelength_axis(self) -> np.ndarray:
+        """Calculate the calibrated wavelengths of all pixels.
+
+        Returns:
+            The wavelengths in nanometers of all pixels, including the dark
+            pixels.
+        """
+        return np.polynomial.polynomial.polyval(
+            np.arange(NUM_PIXELS), self.wavelength_calibration_coefficients
+        )
+
+    def to_json(self) -> str:
+        """Serialize the configuration to JSON."""
+        data = dataclasses.asdict(self)
+        data["saturation_level"] = int(self.saturation_level)
+        return json.dumps(data, indent=4)
+
+    @classmethod
+    def from_json(cls, text: str) -> "DeviceConfiguration":
+        """Create a configuration from JSON, see `to_json()`.
+
+        Raises:
+            ValueError: the JSON data is not a valid configuration.
+        """
+        try:
+            config = cls(**json.loads(text))
+        except TypeError as exc:
+            raise ValueError("Invalid device configuration.") from exc
+        config.saturation_level = np.uint16(config.saturation_level)
+        return config
+
 
 class OceanOpticsUSB2000Plus:
     _integration_time: int = 100_000
+    _scans_to_average: int = 1
+    _boxcar_width: int = 0
+    _boxcar: Boxcar | None = None
+    _trigger_mode: TriggerMode = TriggerMode.NORMAL
+    _nonlinearity_correction: bool = False
+    _stray_light_correction: bool = False
+    _correction: SpectrumCorrection | None = None
+    # number of stale spectra to discard and the timeout for reading them
+    _stale_spectra: int = 0
+    _stale_timeout: int = 0
 
     _config: DeviceConfiguration
+    _wavelengths: np.ndarray
+    _scale: float
+
+    startup_time: float
+    """The time in seconds it took to open and initialize the device."""
+
+    stats: AcquisitionStats | None = None
+    """Timing statistics, recorded when set to an `AcquisitionStats` instance."""
+
+    def __init__(
+        self,
+        device: Transport | None = None,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        serial_number: str | None = None,
+    ) -> None:
+        """Open and initialize the device.
 
-    def __init__(self) -> None:
-        self.device = libusb_package.find(idVendor=0x2457, idProduct=0x101E)
-        if self.device is None:
-            raise DeviceNotFoundError()
+        Querying the configuration takes many round-trips to the device, so the
+        configuration is cached on disk, keyed by serial number. When a cached
+        configuration is available only the serial number is queried.
+
+        Args:
+            device: the device to communicate with. By default, the device
+                with the given serial number or the first connected USB2000+ is
+                used.
+            use_cache: use the cached device configuration, if available.
+            refresh_cache: always query the configuration from the device and
+                update the cache.
+            serial_number: the serial number of the device to open, if
+                `device` is not given.
+
+        Raises:
+            DeviceNotFoundError: no compatible device is connected.
+        """
+        t0 = time.perf_counter()
+        # Preallocated buffer for reading spectra, including the sync byte, and
+        # a read-only view of the pixel data in that buffer.
+        self._frame_buffer = array.array("B", bytes(FRAME_SIZE + 1))
+        self._frame = np.frombuffer(self._frame_buffer, dtype="<u2", count=NUM_PIXELS)
+        self._frame.flags.writeable = False
+
+        if device is None:
+            if serial_number is None:
+                device = libusb_package.find(idVendor=VENDOR_ID, idProduct=PRODUCT_ID)
+            else:
+                device = find_devices().get(serial_number)
+            if device is None:
+                raise DeviceNotFoundError()
+        self.device = device
 
         # Configuration is set automatically and setting it explicitly, as
         # required by the PyUSB documentation, messes up the device on Linux. On
@@ -50,7 +201,112 @@ class OceanOpticsUSB2000Plus:
         self.set_integration_time(self._integration_time)
 
         self.set_shutdown_mode()
-        self._config = self.get_configuration()
+        self.config = self._load_configuration(use_cache, refresh_cache)
+        self.startup_time = time.perf_counter() - t0
+
+    @property
+    def config(self) -> DeviceConfiguration:
+        """The device configuration used to calibrate spectra.
+
+        Assigning a new configuration recalculates the cached wavelength axis
+        and intensity scale factor. Modifying the fields of the configuration
+        in place does _not_ update the calibration.
+        """
+        return self._config
+
+    @config.setter
+    def config(self, config: DeviceConfiguration) -> None:
+        self._config = config
+        self._update_calibration()
+
+    def _load_configuration(
+        self, use_cache: bool, refresh_cache: bool
+    ) -> DeviceConfiguration:
+        """Load the device configuration from the cache or from the device.
+
+        Args:
+            use_cache: use the cached device configuration, if available.
+            refresh_cache: ignore the cached configuration, but do update it.
+
+        Returns:
+            DeviceConfiguration: the configuration parameters.
+        """
+        if not use_cache:
+            return self.get_configuration()
+
+        path = self._configuration_cache_path()
+        if not refresh_cache:
+            try:
+                config = DeviceConfiguration.from_json(path.read_text())
+            except (OSError, ValueError):
+                pass
+            else:
+                if config.serial_number == path.stem:
+                    return config
+
+        config = self.get_configuration()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(config.to_json())
+        except OSError:
+            # not being able to cache the configuration is not fatal
+            pass
+        return config
+
+    def _configuration_cache_path(self) -> pathlib.Path:
+        """Return the path of the cached configuration of this device."""
+        serial = self._query_configuration_parameter(0)
+        return user_cache_dir() / "configurations" / f"{serial}.json"
+
+    @property
+    def wavelengths(self) -> np.ndarray:
+        """The calibrated wavelength axis, excluding dark pixels (read-only)."""
+        return self._wavelengths
+
+    def _update_calibration(self) -> None:
+        """Calculate the wavelength axis and intensity scale factor.
+
+        These only depend on the device configuration, so they are calculated
+        once instead of for every spectrum.
+        """
+        self._wavelengths = self._config.wavelength_axis()[NUM_DARK_PIXELS:]
+        self._wavelengths.flags.writeable = False
+        # scale factor for data, described as 'autonulling' in the manual.
+        self._scale = 65535 / float(self._config.saturation_level)
+        self._update_correction()
+
+    def _update_correction(self) -> None:
+        """Prepare the nonlinearity and stray light correction."""
+        if self._nonlinearity_correction or self._stray_light_correction:
+            self._correction = SpectrumCorrection.from_configuration(
+                self._config,
+                num_pixels=NUM_PIXELS,
+                num_dark_pixels=NUM_DARK_PIXELS,
+                nonlinearity=self._nonlinearity_correction,
+                stray_light=self._stray_light_correction,
+            )
+        else:
+            self._correction = None
+
+    def set_corrections(
+        self, nonlinearity: bool = False, stray_light: bool = False
+    ) -> None:
+        """Enable or disable corrections of the spectra.
+
+        The corrections use the calibration coefficients stored in the device
+        configuration.
+
+        Args:
+            nonlinearity: correct for the nonlinear response of the detector.
+            stray_light: correct for stray light.
+        """
+        self._nonlinearity_correction = nonlinearity
+        self._stray_light_correction = stray_light
+        self._update_correction()
+
+    def get_corrections(self) -> tuple[bool, bool]:
+        """Return whether the nonlinearity and stray light corrections are on."""
+        return self._nonlinearity_correction, self._stray_light_correction
 
     def set_integration_time(self, integration_time: int) -> None:
         """Set device integration time.
@@ -58,10 +314,18 @@ class OceanOpticsUSB2000Plus:
         The integration time is how long the device collects photons to measure
         the spectrum.
 
+        Spectra which may still have been integrated using the previous
+        integration time are discarded by the next read.
+
         Args:
             integration_time: The desired integration time in microseconds.
         """
         self.device.write(0x01, b"\x02" + int(integration_time).to_bytes(4, "little"))
+        if integration_time != self._integration_time:
+            self._stale_spectra = STALE_SPECTRA
+            self._stale_timeout = (
+                max(integration_time, self._integration_time) // 1_000 + 100
+            )
         self._integration_time = integration_time
 
     def get_integration_time(self) -> int:
@@ -75,15 +339,94 @@ class OceanOpticsUSB2000Plus:
         """
         return self._integration_time
 
+    def set_scans_to_average(self, scans_to_average: int) -> None:
+        """Set the number of scans to average.
+
+        Each spectrum returned by `get_spectrum()` is the average of this
+        number of scans. The USB2000+ firmware has no command for averaging on
+        the device, so the scans are read back-to-back and summed in place in
+        a preallocated buffer by the driver.
+
+        Args:
+            scans_to_average: the number of scans to average, at least 1.
+        """
+        if scans_to_average < 1:
+            raise ValueError("The number of scans to average must be at least 1.")
+        if scans_to_average > 1:
+            self._scan_sum = np.zeros(NUM_PIXELS, dtype=np.uint32)
+        self._scans_to_average = scans_to_average
+
+    def get_scans_to_average(self) -> int:
+        """Return the number of scans to average."""
+        return self._scans_to_average
+
+    def set_boxcar_width(self, boxcar_width: int) -> None:
+        """Set the boxcar width.
+
+        Each calibrated pixel is averaged with `boxcar_width` pixels on either
+        side. Near the ends of the spectrum fewer pixels are available and the
+        average is taken over the pixels that are.
+
+        Args:
+            boxcar_width: the number of neighbouring pixels on either side, or
+                0 to disable the boxcar average.
+        """
+        if boxcar_width < 0:
+            raise ValueError("The boxcar width must not be negative.")
+        if boxcar_width > 0:
+            self._boxcar = Boxcar(boxcar_width, len(self._wavelengths))
+        else:
+            self._boxcar = None
+        self._boxcar_width = boxcar_width
+
+    def get_boxcar_width(self) -> int:
+        """Return the boxcar width."""
+        return self._boxcar_width
+
+    def set_trigger_mode(self, trigger_mode: TriggerMode) -> None:
+        """Set the trigger mode.
+
+        In the external trigger modes, a requested spectrum is only available
+        after a trigger pulse. Reading the spectrum times out if the trigger
+        does not arrive within the integration time plus 100 ms.
+
+        Args:
+            trigger_mode: the trigger mode.
+        """
+        trigger_mode = TriggerMode(trigger_mode)
+        self.device.write(0x01, b"\x0a" + int(trigger_mode).to_bytes(2, "little"))
+        self._trigger_mode = trigger_mode
+
+    def get_trigger_mode(self) -> TriggerMode:
+        """Return the trigger mode."""
+        return self._trigger_mode
+
+    def get_acquisition_settings(self) -> AcquisitionSettings:
+        """Get the settings for acquiring spectra.
+
+        Returns:
+            AcquisitionSettings: the acquisition settings.
+        """
+        return AcquisitionSettings(
+            scans_to_average=self._scans_to_average,
+            boxcar_width=self._boxcar_width,
+            trigger_mode=self._trigger_mode,
+        )
+
+    def set_acquisition_settings(self, settings: AcquisitionSettings) -> None:
+        """Apply settings for acquiring spectra.
+
+        Args:
+            settings: the acquisition settings.
+        """
+        self.set_scans_to_average(settings.scans_to_average)
+        self.set_boxcar_width(settings.boxcar_width)
+        if settings.trigger_mode != self._trigger_mode:
+            self.set_trigger_mode(settings.trigger_mode)
+
     def clear_buffers(self) -> None:
         """Clear buffers by reading from both IN endpoints."""
-        for endpoint in 0x81, 0x82:
-            try:
-                self.device.read(
-                    endpoint=endpoint, size_or_buffer=1_000_000, timeout=100
-                )
-            except usb.core.USBTimeoutError:
-                pass
+        _clear_buffers(self.device)
 
     def get_configuration(self) -> DeviceConfiguration:
         """Get all configuration parameters.
@@ -127,13 +470,7 @@ class OceanOpticsUSB2000Plus:
         Returns:
             A string with the configuration value.
         """
-        command = b"\x05" + index.to_bytes(1)
-        self.device.write(0x01, command)
-        value: bytes = self.device.read(0x81, 17).tobytes()
-        assert value[:2] == command
-        # ignore everything after the first \x00 byte in the data range
-        data = value[2 : value.find(b"\x00", 2)]
-        return data.decode()
+        return _query_configuration_parameter(self.device, index)
 
     def _get_saturation_level(self) -> int:
         """Get device saturation level.
@@ -143,13 +480,21 @@ class OceanOpticsUSB2000Plus:
         """
         command = b"\x05\x11"
         self.device.write(0x01, command)
-        data: bytes = self.device.read(0x81, 17).tobytes()
+        data = bytes(self.device.read(0x81, 17))
         assert data[:2] == command
         return np.frombuffer(data[6:8], dtype=np.uint16)[0]
 
-    def get_spectrum(self):
+    def get_spectrum(
+        self, out: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
         """Record a calibrated spectrum.
 
+        Args:
+            out: an optional float array to store the intensities in. Passing
+                the same array for every spectrum avoids allocating a new array
+                for each measurement. Its length must be `NUM_PIXELS -
+                NUM_DARK_PIXELS`.
+
         Returns:
             A tuple of `np.ndarrays` with wavelength, intensity data. The
             wavelengths are in nanometers but the intensity is in arbitrary
@@ -158,52 +503,186 @@ class OceanOpticsUSB2000Plus:
             that to see if the device was saturated. This does _not_mean that
             the resolution of the intensity 16 bits. The number of possible
             different intensity levels is the so-called 'saturation level'.
+            The wavelength array is a read-only view of the cached wavelength
+            axis. If `out` is given, the intensity array is `out`. If more than
+            one scan to average is set, the intensity is the average of that
+            number of scans.
         """
-        data = self.get_raw_spectrum()
-        x = np.arange(len(data))
-        c = self._config.wavelength_calibration_coefficients
-        x = c[0] + c[1] * x + c[2] * x**2 + c[3] * x**3
-        # scale data, described as 'autonulling' in the manual.
-        data = data * (65535 / self._config.saturation_level)
-        return x[20:], data[20:]
+        scans = self._scans_to_average
+        if scans == 1:
+            data = self.get_raw_spectrum()
+        else:
+            data = self._scan_sum
+            np.copyto(data, self.get_raw_spectrum())
+            for _ in range(scans - 1):
+                data += self.get_raw_spectrum()
+        return self.calibrate(data, out=out, scans=scans)
+
+    def calibrate(
+        self, data: np.ndarray, out: np.ndarray | None = None, scans: int = 1
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Calibrate a raw spectrum.
+
+        The nonlinearity and stray light corrections, if enabled, are applied
+        to the raw counts and the boxcar average, if set, is applied to the
+        calibrated spectrum.
 
-    def get_raw_spectrum(self):
+        Args:
+            data: the raw spectrum, as returned by `get_raw_spectrum()`, or the
+                sum of several raw spectra.
+            out: an optional float array to store the intensities in.
+            scans: the number of raw spectra summed in `data`.
+
+        Returns:
+            A tuple of `np.ndarrays` with wavelength, intensity data, like
+            `get_spectrum()`.
+        """
+        if (stats := self.stats) is not None:
+            t0 = time.perf_counter()
+        if self._correction is None:
+            intensities = np.multiply(
+                data[NUM_DARK_PIXELS:], self._scale / scans, out=out
+            )
+        else:
+            intensities = self._correction.apply(data, out=out, scans=scans)
+            intensities *= self._scale
+        if self._boxcar is not None:
+            self._boxcar.apply(intensities, out=intensities)
+        if stats is not None:
+            stats.record("calibrate", t0)
+        return self._wavelengths, intensities
+
+    def get_raw_spectrum(self, out: np.ndarray | None = None) -> np.ndarray:
         """Record a raw spectrum, including dark pixels.
 
+        The spectrum is read from the device in a single transfer into a
+        preallocated buffer, so no new objects are created for each spectrum.
+
+        Args:
+            out: an optional `np.uint16` array of length `NUM_PIXELS` to copy
+                the spectrum into.
+
         Returns:
-            A tuple of `np.ndarrays` with wavelength, intensity data. The
-            wavelengths are in pixels and the intensity is in arbitrary
-            uncalibrated units.
+            A `np.ndarray` with the intensity data of all pixels in arbitrary
+            uncalibrated units. If `out` is not given, this is a read-only view
+            of the internal buffer which is overwritten by the next spectrum, so
+            make a copy if you want to keep the data.
         """
-        self.device.write(0x01, b"\x09")
-        # Don't sleep, because the device will automatically acquire two
-        # additional spectra which will be available sooner than acquiring a
-        # fresh one.
+        stats = self.stats
+        # discard spectra integrated using a previous integration time
+        if self._stale_spectra:
+            if stats is not None:
+                t0 = time.perf_counter()
+            while self._stale_spectra:
+                self._read_frame(self._stale_timeout)
+                self._stale_spectra -= 1
+            if stats is not None:
+                stats.record("stale", t0)
         # Set timeout for measurement to complete, integration time is in
         # microseconds, timeout is in milliseconds. Add 100 ms (default timeout)
         # to be sure.
-        timeout = self._integration_time // 1_000 + 100
-        packets = []
-        for _ in range(8):
+        self._read_frame(self._integration_time // 1_000 + 100, stats)
+
+        if out is None:
+            return self._frame
+        if stats is not None:
+            t0 = time.perf_counter()
+        np.copyto(out, self._frame)
+        if stats is not None:
+            stats.record("decode", t0)
+        return out
+
+    def _read_frame(self, timeout: int, stats: AcquisitionStats | None = None) -> None:
+        """Request a spectrum and read it into the frame buffer.
+
+        Args:
+            timeout: the timeout in milliseconds.
+            stats: record the timing of the request and the read, and count
+                timeouts.
+        """
+        if stats is None:
+            self.device.write(0x01, b"\x09")
+            # Don't sleep, because the device will automatically acquire two
+            # additional spectra which will be available sooner than acquiring
+            # a fresh one.
+            # Read all packets, including the trailing sync byte, in one
+            # transfer.
+            num_bytes = self.device.read(0x82, self._frame_buffer, timeout)
+        else:
+            t0 = time.perf_counter()
+            self.device.write(0x01, b"\x09")
+            t1 = time.perf_counter()
+            stats.record("request", t0, t1)
             try:
-                packets.append(self.device.read(0x82, 512, timeout).tobytes())
-                # after waiting for the first packet, next timeout can be short
-                timeout = 100
+                num_bytes = self.device.read(0x82, self._frame_buffer, timeout)
             except usb.core.USBTimeoutError:
-                break
-        else:
-            packets.append(self.device.read(0x82, 1, 100).tobytes())
-        assert packets[-1][-1] == 0x69
-
-        data = b"".join(packets[:-1])
-        return np.frombuffer(data, dtype=np.uint16)
+                stats.count("timeouts")
+                raise
+            t2 = time.perf_counter()
+            stats.record("read", t1, t2)
+            stats.frame_done(t2)
+        assert num_bytes == len(self._frame_buffer)
+        assert self._frame_buffer[-1] == SYNC_BYTE
 
     def set_shutdown_mode(self) -> None:
         """Set shutdown (low power) mode."""
         self.device.write(0x01, b"\x04\x00\x00")
 
 
+def find_devices() -> dict[str, Transport]:
+    """Find all connected USB2000+ devices.
+
+    Only the serial number of each device is queried, the devices are not
+    initialized.
+
+    Returns:
+        The devices, keyed by serial number.
+    """
+    devices: dict[str, Transport] = {}
+    for device in libusb_package.find(
+        find_all=True, idVendor=VENDOR_ID, idProduct=PRODUCT_ID
+    ):
+        _clear_buffers(device)
+        devices[_query_configuration_parameter(device, 0)] = device
+    return devices
+
+
+def list_devices() -> list[str]:
+    """Return the serial numbers of all connected USB2000+ devices."""
+    return sorted(find_devices())
+
+
+def _clear_buffers(device: Transport) -> None:
+    """Clear buffers by reading from both IN endpoints."""
+    for endpoint in 0x81, 0x82:
+        try:
+            device.read(endpoint=endpoint, size_or_buffer=1_000_000, timeout=100)
+        except usb.core.USBTimeoutError:
+            pass
+
+
+def _query_configuration_parameter(device: Transport, index: int) -> str:
+    """Query a configuration parameter of a device.
+
+    Args:
+        device: the device to query.
+        index: the requested configuration index.
+
+    Returns:
+        A string with the configuration value.
+    """
+    command = b"\x05" + index.to_bytes(1)
+    device.write(0x01, command)
+    value = bytes(device.read(0x81, 17))
+    assert value[:2] == command
+    # ignore everything after the first \x00 byte in the data range
+    data = value[2 : value.find(b"\x00", 2)]
+    return data.decode()
+
+
 if __name__ == "__main__":
+    import plotext as plt
+
     dev = OceanOpticsUSB2000Plus()
 
     x, data = dev.get_spectrum()
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep cached data of the tests out of the user cache directory."""
+    path = tmp_path / "cache"
+    monkeypatch.setenv("OCEAN_OPTICS_CACHE_DIR", str(path))
+    return path
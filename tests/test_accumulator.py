@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from ocean_optics.accumulator import SpectrumAccumulator
+
+
+def test_sum_and_variance():
+    spectra = np.random.default_rng(0).normal(1_000, 10, size=(50, 100))
+    accumulator = SpectrumAccumulator(100, track_variance=True)
+    for spectrum in spectra:
+        accumulator.add(spectrum)
+
+    assert accumulator.count == 50
+    np.testing.assert_allclose(accumulator.sum, spectra.sum(axis=0))
+    np.testing.assert_allclose(accumulator.mean, spectra.mean(axis=0))
+    np.testing.assert_allclose(accumulator.variance, spectra.var(axis=0, ddof=1))
+    np.testing.assert_allclose(
+        accumulator.standard_error, spectra.std(axis=0, ddof=1) / np.sqrt(50)
+    )
+
+
+def test_reset():
+    accumulator = SpectrumAccumulator(10, track_variance=True)
+    accumulator.add(np.ones(10))
+    accumulator.reset()
+    accumulator.add(np.full(10, 2.0))
+    accumulator.add(np.full(10, 4.0))
+
+    np.testing.assert_allclose(accumulator.sum, 6.0)
+    np.testing.assert_allclose(accumulator.variance, 2.0)
+
+
+def test_variance_not_tracked():
+    accumulator = SpectrumAccumulator(10)
+    accumulator.add(np.ones(10))
+    with pytest.raises(RuntimeError):
+        _ = accumulator.variance
@@ -0,0 +1,136 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+import usb.core
+
+from ocean_optics.acquisition import (
+    RETRY_DELAY,
+    AcquisitionEngine,
+    MultiAcquisitionEngine,
+)
+from ocean_optics.simulation import SimulatedDevice
+from ocean_optics.usb2000plus import NUM_PIXELS, OceanOpticsUSB2000Plus
+
+
+class CountingDevice:
+    """Device stand-in which returns frames filled with a frame counter."""
+
+    def __init__(self, delay: float = 0.001) -> None:
+        self.delay = delay
+        self.count = 0
+        self.proceed = threading.Event()
+        self.proceed.set()
+
+    def get_raw_spectrum(self, out: np.ndarray) -> np.ndarray:
+        self.proceed.wait()
+        time.sleep(self.delay)
+        out[:] = self.count
+        self.count += 1
+        return out
+
+
+def test_next_frame_returns_consecutive_frames():
+    with AcquisitionEngine(CountingDevice(), size=16) as engine:
+        frames = [engine.next_frame(timeout=1) for _ in range(5)]
+
+    assert [frame.sequence for frame in frames] == list(range(5))
+    assert all((frame.data == frame.sequence).all() for frame in frames)
+    assert frames[0].data.shape == (NUM_PIXELS,)
+    assert engine.dropped_frames == 0
+
+
+def test_slow_reader_drops_overwritten_frames():
+    device = CountingDevice(delay=0)
+    engine = AcquisitionEngine(device, size=4)
+    reader = engine.reader()
+    with engine:
+        while engine.latest_sequence < 20:
+            time.sleep(0.001)
+        device.proceed.clear()
+        frame = reader.next_frame(timeout=1)
+        device.proceed.set()
+
+    assert frame.sequence > 0
+    assert (frame.data == frame.sequence).all()
+    assert reader.dropped_frames == frame.sequence
+
+
+def test_latest_frame():
+    with AcquisitionEngine(CountingDevice()) as engine:
+        assert engine.next_frame(timeout=1) is not None
+        time.sleep(0.02)
+        frame = engine.latest_frame()
+
+    assert frame is not None
+    assert engine.dropped_frames == frame.sequence - 1
+
+
+class TimeoutDevice:
+    """Device stand-in which times out immediately on every request."""
+
+    stats = None
+
+    def get_raw_spectrum(self, out: np.ndarray) -> np.ndarray:
+        raise usb.core.USBTimeoutError("timeout")
+
+
+def test_timeouts_are_retried_after_a_delay():
+    with AcquisitionEngine(TimeoutDevice()) as engine:
+        time.sleep(0.1)
+        assert engine.is_running
+
+    assert 0 < engine.timeouts <= 0.1 / RETRY_DELAY + 1
+
+
+def test_next_frame_raises_when_not_running():
+    engine = AcquisitionEngine(CountingDevice())
+    with pytest.raises(RuntimeError):
+        engine.next_frame(timeout=1)
+
+
+def test_simulated_device():
+    device = OceanOpticsUSB2000Plus(SimulatedDevice(latency_factor=0))
+    with AcquisitionEngine(device) as engine:
+        frame = engine.next_frame(timeout=1)
+        wavelengths, intensities = engine.calibrate(frame)
+
+    assert len(wavelengths) == len(intensities)
+    assert engine.timeouts == 0
+
+
+def test_nearest_frame():
+    with AcquisitionEngine(CountingDevice(), size=16) as engine:
+        frames = [engine.next_frame(timeout=1) for _ in range(5)]
+
+    nearest = engine.nearest_frame(frames[2].timestamp + 1e-6)
+    assert nearest.sequence == 2
+    assert AcquisitionEngine(CountingDevice()).nearest_frame(0.0) is None
+
+
+def test_multiple_devices_are_time_aligned():
+    devices = [CountingDevice(delay=0.001), CountingDevice(delay=0.005)]
+    with MultiAcquisitionEngine(devices) as engine:
+        for _ in range(5):
+            fast, slow = engine.next_frames(timeout=1)
+            assert abs(fast.timestamp - slow.timestamp) < 0.003
+
+
+def test_throughput_scales_with_number_of_devices():
+    """Simulated devices wait for their integration time without the GIL."""
+
+    def frame_rate(num_devices: int, duration: float = 0.3) -> float:
+        devices = [
+            OceanOpticsUSB2000Plus(SimulatedDevice(serial_number=f"SIM{idx}"))
+            for idx in range(num_devices)
+        ]
+        for device in devices:
+            device.set_integration_time(10_000)
+        with MultiAcquisitionEngine(devices) as engine:
+            time.sleep(duration)
+            frames = sum(e.latest_sequence + 1 for e in engine.engines)
+        return frames / duration
+
+    single = frame_rate(1)
+    assert frame_rate(4) > 3 * single
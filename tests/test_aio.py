@@ -0,0 +1,89 @@
+import asyncio
+import contextlib
+
+import numpy as np
+import pytest
+
+from ocean_optics.aio import AsyncSpectroscopyExperiment
+from ocean_optics.simulation import SimulatedDevice
+from ocean_optics.spectroscopy import SpectroscopyExperiment
+from ocean_optics.usb2000plus import OceanOpticsUSB2000Plus
+
+
+@pytest.fixture
+def experiment():
+    device = OceanOpticsUSB2000Plus(SimulatedDevice(seed=0))
+    device.set_integration_time(5_000)
+    return SpectroscopyExperiment(device)
+
+
+def test_get_spectrum_does_not_block_event_loop(experiment):
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.001)
+                ticks += 1
+
+        async with AsyncSpectroscopyExperiment(experiment) as aexperiment:
+            await aexperiment.set_integration_time(50_000)
+            task = asyncio.create_task(ticker())
+            wavelengths, intensities = await aexperiment.get_spectrum()
+            task.cancel()
+        return wavelengths, intensities, ticks
+
+    wavelengths, intensities, ticks = asyncio.run(main())
+    assert len(wavelengths) == len(intensities)
+    assert ticks > 10
+
+
+def test_integrate_spectrum(experiment):
+    async def main():
+        async with AsyncSpectroscopyExperiment(experiment) as aexperiment:
+            return [
+                intensities.copy()
+                async for _, intensities in aexperiment.integrate_spectrum(3)
+            ]
+
+    results = asyncio.run(main())
+    assert len(results) == 3
+    np.testing.assert_allclose(results[-1], experiment.accumulator.sum)
+
+
+def test_cancel_integration_stops_acquisition(experiment):
+    async def main():
+        async with AsyncSpectroscopyExperiment(experiment) as aexperiment:
+
+            async def integrate():
+                async for _ in aexperiment.integrate_spectrum(1000):
+                    pass
+
+            task = asyncio.create_task(integrate())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    asyncio.run(main())
+    assert experiment.stopped
+    assert 0 < experiment.accumulator.count < 1000
+
+
+def test_stream(experiment):
+    async def main():
+        async with AsyncSpectroscopyExperiment(experiment) as aexperiment:
+            spectra = []
+            async with contextlib.aclosing(aexperiment.stream()) as stream:
+                async for spectrum in stream:
+                    spectra.append(spectrum)
+                    if len(spectra) == 5:
+                        break
+            # the device is available again after the stream has stopped
+            await aexperiment.get_spectrum()
+            return spectra
+
+    spectra = asyncio.run(main())
+    assert len(spectra) == 5
+    assert all(s[1] is not spectra[0][1] for s in spectra[1:])
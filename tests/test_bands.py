@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from ocean_optics.bands import Band, BandChannels
+from ocean_optics.simulation import SimulatedDevice
+from ocean_optics.spectroscopy import SpectroscopyExperiment
+from ocean_optics.usb2000plus import OceanOpticsUSB2000Plus
+
+# pixels 1 nm apart, centered on whole nanometers
+WAVELENGTHS = np.arange(400.0, 500.0)
+
+
+def test_parse_band():
+    assert Band.parse("Na=585-595") == Band("Na", 585, 595)
+    assert Band.parse("585.5 - 595") == Band("585.5-595 nm", 585.5, 595)
+    with pytest.raises(ValueError):
+        Band.parse("Na")
+    with pytest.raises(ValueError):
+        Band.parse("595-585")
+
+
+def test_band_channels():
+    bands = [Band("a", 410, 420), Band("b", 450.25, 451.75), Band("c", 300, 400)]
+    channels = BandChannels(WAVELENGTHS, bands)
+    intensities = np.ones_like(WAVELENGTHS)
+    intensities[50] = 3.0
+
+    values = channels.compute(intensities)
+
+    # the integral over the band, including half pixels at the edges
+    np.testing.assert_allclose(values, [10, 0.25 * 3 + 1 + 0.25, 0.5])
+    assert channels.names == ["a", "b", "c"]
+    assert channels.pixels == slice(0, 53)
+
+
+def test_band_channels_average_and_out():
+    channels = BandChannels(
+        WAVELENGTHS, [Band("a", 410, 420), Band("b", 430.3, 460.8)], average=True
+    )
+    out = np.empty(2)
+
+    values = channels.compute(np.full_like(WAVELENGTHS, 5.0), out=out)
+
+    assert values is out
+    np.testing.assert_allclose(values, [5, 5])
+
+
+def test_band_channels_outside_range():
+    with pytest.raises(ValueError, match="outside"):
+        BandChannels(WAVELENGTHS, [Band("a", 410, 420), Band("b", 600, 700)])
+
+
+def test_experiment_track_bands():
+    device = OceanOpticsUSB2000Plus(
+        SimulatedDevice(latency_factor=0, seed=0), use_cache=False
+    )
+    experiment = SpectroscopyExperiment(device, use_cache=False)
+    bands = [Band("a", 500, 510), Band("b", 600, 650)]
+
+    results = list(experiment.track_bands(bands, count=5))
+
+    assert len(results) == 5
+    timestamps = [timestamp for timestamp, _ in results]
+    assert timestamps == sorted(timestamps)
+    wavelengths, intensities = experiment.get_spectrum()
+    mask = (500 <= wavelengths) & (wavelengths <= 510)
+    dispersion = np.gradient(wavelengths)[mask].mean()
+    for _, values in results:
+        assert values.shape == (2,)
+        # the integral is close to the sum of the pixels times their width
+        expected = intensities[mask].sum() * dispersion
+        assert values[0] == pytest.approx(expected, rel=0.1)
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+import pytest
+
+# Generous upper bound of the time in seconds to import the command-line
+# interface, which is dominated by numpy.
+IMPORT_TIME_BUDGET = 0.5
+# Dependencies which are only imported by the commands that need them.
+HEAVY_MODULES = ["PySide6", "pyqtgraph", "matplotlib", "plotext", "asyncio"]
+
+
+def import_times(module: str) -> dict[str, float]:
+    """Return the cumulative import time in seconds of each imported module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+@pytest.mark.parametrize("module", ["ocean_optics.cli", "ocean_optics.usb2000plus"])
+def test_heavy_modules_are_not_imported(module):
+    times = import_times(module)
+
+    for heavy_module in HEAVY_MODULES:
+        assert heavy_module not in times
+
+
+def test_import_time_budget():
+    # the first import may have to compile bytecode
+    import_times("ocean_optics.cli")
+    times = import_times("ocean_optics.cli")
+
+    assert times["ocean_optics.cli"] < IMPORT_TIME_BUDGET
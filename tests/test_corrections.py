@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from ocean_optics.corrections import SpectrumCorrection
+from ocean_optics.simulation import SimulatedDevice
+from ocean_optics.usb2000plus import NUM_DARK_PIXELS, NUM_PIXELS, OceanOpticsUSB2000Plus
+
+
+@pytest.fixture
+def raw():
+    data = np.random.default_rng(0).integers(1_000, 60_000, NUM_PIXELS)
+    data[:NUM_DARK_PIXELS] = 1_000
+    return data.astype(np.uint16)
+
+
+def test_nonlinearity(raw):
+    correction = SpectrumCorrection([1.0, 1e-5], None, NUM_PIXELS, NUM_DARK_PIXELS)
+    counts = raw[NUM_DARK_PIXELS:] - 1_000.0
+    expected = counts / (1 + 1e-5 * counts) + 1_000
+    np.testing.assert_allclose(correction.apply(raw), expected)
+
+
+def test_stray_light(raw):
+    correction = SpectrumCorrection(None, 0.01, NUM_PIXELS, NUM_DARK_PIXELS)
+    counts = raw[NUM_DARK_PIXELS:] - 1_000.0
+    expected = counts - 0.01 * counts.mean() + 1_000
+    np.testing.assert_allclose(correction.apply(raw), expected)
+
+
+def test_summed_scans(raw):
+    correction = SpectrumCorrection([1.0, 1e-5], 0.01, NUM_PIXELS, NUM_DARK_PIXELS)
+    out = np.empty(NUM_PIXELS - NUM_DARK_PIXELS)
+    result = correction.apply(raw.astype(np.uint32) * 4, out=out, scans=4)
+    assert result is out
+    np.testing.assert_allclose(result, correction.apply(raw))
+
+
+def test_device_corrections():
+    device = OceanOpticsUSB2000Plus(SimulatedDevice(latency_factor=0, noise=0))
+    _, uncorrected = device.get_spectrum()
+    # the simulated device has a linear response
+    device.set_corrections(nonlinearity=True)
+    assert device.get_corrections() == (True, False)
+    _, corrected = device.get_spectrum()
+    np.testing.assert_allclose(corrected, uncorrected)
@@ -0,0 +1,99 @@
+import csv
+import io
+
+import numpy as np
+
+from ocean_optics.export import (
+    CHUNK_ROWS,
+    write_bands,
+    write_peaks,
+    write_spectra,
+    write_time_series,
+)
+from ocean_optics.peaks import Peaks
+
+
+def test_write_spectra(tmp_path):
+    wavelengths = np.linspace(400, 800, 2 * CHUNK_ROWS + 10)
+    intensities = np.random.default_rng(0).uniform(0, 65535, len(wavelengths))
+    path = tmp_path / "spectrum.csv"
+    write_spectra(path, wavelengths, {"Intensity": intensities, "Dark": intensities})
+
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["Wavelength (nm)", "Intensity", "Dark"]
+    data = np.array(rows[1:], dtype=float)
+    np.testing.assert_allclose(data[:, 0], wavelengths, rtol=1e-9)
+    np.testing.assert_allclose(data[:, 1], intensities, rtol=1e-9)
+
+
+def test_write_spectra_tsv(tmp_path):
+    path = tmp_path / "spectrum.tsv"
+    write_spectra(path, np.array([400.0]), {"Intensity": np.array([1.5])}, precision=3)
+    assert path.read_text() == "Wavelength (nm)\tIntensity\n400\t1.5\n"
+
+
+def test_write_time_series():
+    wavelengths = np.array([400.0, 500.0, 600.0])
+    spectra = np.arange(6).reshape(2, 3)
+    f = io.StringIO()
+    write_time_series(f, wavelengths, spectra, timestamps=np.array([0.0, 0.5]))
+
+    assert f.getvalue().splitlines() == [
+        "Wavelength (nm),t = 0.000000 s,t = 0.500000 s",
+        "400,0,3",
+        "500,1,4",
+        "600,2,5",
+    ]
+
+
+def test_write_peaks():
+    peaks = [
+        Peaks(
+            wavelengths=np.array([400.0, 500.0]),
+            heights=np.array([10.0, 20.0]),
+            fwhms=np.array([1.0, 2.0]),
+            ids=np.array([0, 1]),
+            timestamp=100.0,
+        ),
+        Peaks(
+            wavelengths=np.array([400.5]),
+            heights=np.array([11.0]),
+            fwhms=np.array([1.5]),
+            ids=np.array([0]),
+            timestamp=100.5,
+        ),
+    ]
+    f = io.StringIO()
+    write_peaks(f, peaks)
+
+    assert f.getvalue().splitlines() == [
+        "Time (s),Peak,Wavelength (nm),Height,FWHM (nm)",
+        "0,0,400,10,1",
+        "0,1,500,20,2",
+        "0.5,0,400.5,11,1.5",
+    ]
+
+
+def test_write_bands():
+    f = io.StringIO()
+    write_bands(
+        f,
+        ["Na", "400-450 nm"],
+        np.array([100.0, 100.5]),
+        np.array([[1.0, 2.0], [3.0, 4.0]]),
+    )
+
+    assert f.getvalue().splitlines() == [
+        "Time (s),Na,400-450 nm",
+        "0,1,2",
+        "0.5,3,4",
+    ]
+
+
+def test_header_with_delimiter():
+    f = io.StringIO()
+    write_bands(f, ["a, b", 'c "d"'], np.array([0.0]), np.array([[1.0, 2.0]]))
+
+    f.seek(0)
+    assert next(csv.reader(f)) == ["Time (s)", "a, b", 'c "d"']
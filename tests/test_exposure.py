@@ -0,0 +1,48 @@
+import pytest
+
+from ocean_optics.exposure import auto_exposure, peak_fraction
+from ocean_optics.simulation import EmissionLine, SimulatedDevice
+from ocean_optics.usb2000plus import MIN_INTEGRATION_TIME, OceanOpticsUSB2000Plus
+
+
+def make_device(intensity: float) -> OceanOpticsUSB2000Plus:
+    return OceanOpticsUSB2000Plus(
+        SimulatedDevice(
+            lines=[EmissionLine(546.1, intensity)], latency_factor=0, seed=0
+        ),
+        use_cache=False,
+    )
+
+
+@pytest.mark.parametrize("integration_time", [1_000, 100_000, 2_000_000])
+def test_auto_exposure_converges(integration_time):
+    device = make_device(100_000)
+    device.set_integration_time(integration_time)
+
+    result = auto_exposure(device, target=0.8, tolerance=0.02)
+
+    assert result.converged
+    assert result.peak_fraction == pytest.approx(0.8, abs=0.02)
+    assert device.get_integration_time() == result.integration_time
+    # the detector is linear, so scaling converges in a few spectra
+    assert result.iterations <= 4
+    # measure again to check that the result was not based on stale spectra
+    raw = device.get_raw_spectrum()
+    assert peak_fraction(raw, device.config.saturation_level) == pytest.approx(
+        0.8, abs=0.02
+    )
+
+
+def test_auto_exposure_out_of_range():
+    device = make_device(1e9)
+
+    result = auto_exposure(device)
+
+    assert not result.converged
+    assert result.integration_time == MIN_INTEGRATION_TIME
+    assert result.peak_fraction > 0.9
+
+
+def test_auto_exposure_invalid_target():
+    with pytest.raises(ValueError):
+        auto_exposure(make_device(100_000), target=1.5)
@@ -0,0 +1,23 @@
+import numpy as np
+
+from ocean_optics.gui import MeasurementWorker
+
+
+def test_worker_publishes_latest_frame():
+    worker = MeasurementWorker()
+    notifications = []
+    worker.new_data.connect(lambda: notifications.append(True))
+    wavelengths = np.arange(4.0)
+
+    for value in range(3):
+        worker.publish(wavelengths, np.full(4, value))
+
+    assert len(notifications) == 1
+    assert worker.published_frames == 3
+    assert worker.coalesced_frames == 2
+    _, intensities = worker.take_latest()
+    np.testing.assert_array_equal(intensities, np.full(4, 2))
+    assert worker.take_latest() is None
+
+    worker.publish(wavelengths, np.zeros(4))
+    assert len(notifications) == 2
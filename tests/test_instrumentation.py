@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+import usb.core
+
+from ocean_optics.instrumentation import AcquisitionStats, LatencyHistogram
+from ocean_optics.simulation import SimulatedDevice
+from ocean_optics.spectroscopy import SpectroscopyExperiment
+from ocean_optics.usb2000plus import OceanOpticsUSB2000Plus, TriggerMode
+
+
+@pytest.fixture
+def experiment():
+    device = OceanOpticsUSB2000Plus(SimulatedDevice(latency_factor=0, seed=0))
+    return SpectroscopyExperiment(device, use_cache=False)
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram(size=100)
+    for idx in range(150):
+        histogram.add(float(idx), idx + idx / 1000)
+
+    assert histogram.count == 150
+    # only the most recent samples are kept, oldest first
+    np.testing.assert_array_equal(histogram.starts, np.arange(50, 150))
+    assert histogram.percentiles((0, 50, 100)) == pytest.approx([0.050, 0.0995, 0.149])
+    counts, edges = histogram.histogram(bins=10)
+    assert counts.sum() == 100
+    assert edges[0] == pytest.approx(0.050)
+
+
+def test_stats_are_disabled_by_default(experiment):
+    assert experiment.device.stats is None
+    experiment.get_spectrum()
+
+
+def test_stage_timings(experiment):
+    stats = experiment.device.stats = AcquisitionStats()
+    experiment.set_integration_time(10_000)
+    for _ in experiment.integrate_spectrum(5):
+        pass
+
+    summary = stats.summary()
+    assert list(summary) == [
+        "stale",
+        "request",
+        "read",
+        "calibrate",
+        "accumulate",
+        "process",
+    ]
+    assert summary["read"]["count"] == 5
+    assert stats.frames == 5
+    assert stats.frame_rate > 0
+    # per-stage timestamps of the most recent frame, in order of execution
+    timestamps = [stats.last_frame[stage] for stage in summary if stage != "stale"]
+    assert timestamps == sorted(timestamps)
+
+
+def test_timeouts_are_counted(experiment):
+    stats = experiment.device.stats = AcquisitionStats()
+    experiment.set_trigger_mode(TriggerMode.EXTERNAL_EDGE)
+
+    with pytest.raises(usb.core.USBTimeoutError):
+        experiment.device.get_raw_spectrum()
+    assert stats.counters["timeouts"] == 1
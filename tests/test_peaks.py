@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from ocean_optics.peaks import PeakFinder, Peaks, PeakTracker
+from ocean_optics.simulation import EmissionLine, SimulatedDevice
+from ocean_optics.spectroscopy import SpectroscopyExperiment
+from ocean_optics.usb2000plus import OceanOpticsUSB2000Plus
+
+LINE_WAVELENGTHS = [404.73, 435.81, 546.07, 696.54, 763.51, 811.53]
+
+
+def measure_lines(wavelengths, width=1.0):
+    device = OceanOpticsUSB2000Plus(
+        SimulatedDevice(
+            lines=[
+                EmissionLine(wavelength, 100_000, width) for wavelength in wavelengths
+            ],
+            latency_factor=0,
+            seed=0,
+        ),
+        use_cache=False,
+    )
+    return device.get_spectrum()
+
+
+@pytest.mark.parametrize("method", ["gaussian", "parabolic"])
+def test_find_peaks(method):
+    wavelengths, intensities = measure_lines(LINE_WAVELENGTHS)
+
+    peaks = PeakFinder(wavelengths, method=method).find(intensities)
+
+    assert len(peaks) == len(LINE_WAVELENGTHS)
+    # sub-pixel accuracy, the pixels are about 0.37 nm apart
+    np.testing.assert_allclose(peaks.wavelengths, LINE_WAVELENGTHS, atol=0.03)
+    assert (peaks.ids == -1).all()
+    if method == "gaussian":
+        np.testing.assert_allclose(peaks.fwhms, 2.355, rtol=0.05)
+        heights = 100_000 * 0.1 * 65535 / 62500
+        np.testing.assert_allclose(peaks.heights, heights, rtol=0.02)
+
+
+def test_find_peaks_threshold():
+    wavelengths, intensities = measure_lines([500.0, 600.0])
+    intensities[1000] += 100_000
+
+    finder = PeakFinder(wavelengths, threshold=50_000, baseline=0)
+    peaks = finder.find(intensities)
+
+    assert len(peaks) == 1
+    assert peaks.baseline == 0
+
+
+def test_track_peaks():
+    tracker = PeakTracker(max_shift=1.0, max_missed=1)
+
+    def update(*wavelengths):
+        peaks = Peaks(
+            wavelengths=np.array(wavelengths),
+            heights=np.ones(len(wavelengths)),
+            fwhms=np.ones(len(wavelengths)),
+        )
+        return tracker.update(peaks).ids.tolist()
+
+    assert update(400.0, 500.0) == [0, 1]
+    # peaks drift and a new one appears
+    assert update(400.5, 450.0, 499.5) == [0, 2, 1]
+    # a peak which moved too far is a new peak
+    assert update(402.0, 450.0, 499.5) == [3, 2, 1]
+    # a missed peak keeps its identity for max_missed spectra
+    assert update(450.0) == [2]
+    assert update(450.0, 499.5) == [2, 1]
+    assert update(450.0) == [2]
+    assert update(450.0) == [2]
+    assert update(450.0, 499.5) == [2, 4]
+
+
+def test_experiment_track_peaks():
+    device = OceanOpticsUSB2000Plus(
+        SimulatedDevice(
+            lines=[
+                EmissionLine(wavelength, 100_000) for wavelength in LINE_WAVELENGTHS
+            ],
+            latency_factor=0,
+            seed=0,
+        ),
+        use_cache=False,
+    )
+    experiment = SpectroscopyExperiment(device, use_cache=False)
+
+    results = list(experiment.track_peaks(count=5))
+
+    assert len(results) == 5
+    for peaks in results:
+        assert peaks.ids.tolist() == list(range(len(LINE_WAVELENGTHS)))
+    timestamps = [peaks.timestamp for peaks in results]
+    assert timestamps == sorted(timestamps)
@@ -0,0 +1,131 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from ocean_optics.bands import Band
+from ocean_optics.instrumentation import AcquisitionStats
+from ocean_optics.pipeline import (
+    Baseline,
+    Boxcar,
+    Gaussian,
+    Normalize,
+    Pipeline,
+    SavitzkyGolay,
+    Stage,
+    parse_stage,
+    parse_stages,
+)
+from ocean_optics.simulation import SimulatedDevice
+from ocean_optics.spectroscopy import SpectroscopyExperiment
+from ocean_optics.usb2000plus import OceanOpticsUSB2000Plus
+
+# pixels 1 nm apart, centered on whole nanometers
+WAVELENGTHS = np.arange(400.0, 500.0)
+
+
+def test_stages():
+    intensities = np.arange(100.0) + 10
+    pipeline = Pipeline(WAVELENGTHS, [Baseline(Band("dark", 400, 410)), Boxcar(1)])
+
+    result = pipeline.run(intensities)
+
+    assert result is intensities
+    # the baseline is the mean of 10 pixels, of which two only half
+    expected = np.arange(100.0) - 5
+    expected[0] = (expected[0] + expected[1]) / 2
+    expected[-1] = (expected[-2] + expected[-1]) / 2
+    np.testing.assert_allclose(result, expected, atol=1e-12)
+
+    pipeline.append(Normalize(Band("", 440, 450)))
+    result = pipeline.run(np.arange(100.0) + 10)
+    assert result[50] == pytest.approx(1.0)
+
+
+def test_incomplete_stages_cannot_be_created():
+    class NoOp(Stage):
+        name = "noop"
+
+        def apply(self, intensities: np.ndarray) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        Stage()
+    with pytest.raises(TypeError):
+        NoOp()
+
+
+def test_invalid_stages_are_not_applied():
+    pipeline = Pipeline(WAVELENGTHS, [Boxcar(2)])
+
+    with pytest.raises(ValueError):
+        pipeline.set_stages([Normalize(), Boxcar(100)])
+    with pytest.raises(ValueError):
+        pipeline.set_stages([SavitzkyGolay(101)])
+    with pytest.raises(ValueError):
+        pipeline.append(Baseline(Band("", 600, 700)))
+
+    assert [stage.name for stage in pipeline.stages] == ["boxcar"]
+
+
+def test_parse_stages():
+    stages = parse_stages("baseline=340-360  boxcar=2 normalize")
+
+    assert [type(stage) for stage in stages] == [Baseline, Boxcar, Normalize]
+    assert stages[0].band == Band("340-360 nm", 340, 360)
+    assert stages[1].width == 2
+    assert stages[2].band is None
+    stages = parse_stages("savgol=11 savgol=7,3 gaussian=1.5")
+    assert [type(stage) for stage in stages] == [SavitzkyGolay] * 2 + [Gaussian]
+    assert (stages[0].window, stages[0].order) == (11, 2)
+    assert (stages[1].window, stages[1].order) == (7, 3)
+    assert stages[2].sigma == 1.5
+
+    for spec in [
+        "smooth=2",
+        "boxcar",
+        "boxcar=two",
+        "boxcar=0",
+        "baseline",
+        "savgol=10",
+        "savgol=7,x",
+        "gaussian",
+    ]:
+        with pytest.raises(ValueError):
+            parse_stage(spec)
+
+
+def test_steady_state_does_not_allocate():
+    wavelengths = np.linspace(340, 1030, 2028)
+    pipeline = Pipeline(
+        wavelengths, [Baseline(Band("", 400, 410)), Boxcar(3), Normalize()]
+    )
+    intensities = np.ones(len(wavelengths))
+    pipeline.run(intensities)
+
+    tracemalloc.start()
+    try:
+        pipeline.run(intensities)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # only numpy scalars, no arrays
+    assert peak < intensities.nbytes
+
+
+def test_experiment_pipeline():
+    device = OceanOpticsUSB2000Plus(
+        SimulatedDevice(latency_factor=0, seed=0), use_cache=False
+    )
+    device.stats = AcquisitionStats()
+    experiment = SpectroscopyExperiment(device, use_cache=False)
+    experiment.set_processing_stages([Normalize()])
+
+    for _, intensities in experiment.integrate_spectrum(3):
+        assert intensities.max() == pytest.approx(1.0)
+
+    # the running sum is not normalized
+    assert experiment.accumulator.sum.max() > 1000
+    assert device.stats.stages["normalize"].count == 3
+    with pytest.raises(ValueError):
+        experiment.set_processing_stages([Boxcar(5000)])
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from ocean_optics.recording import Recording, RecordingWriter
+from ocean_optics.simulation import SimulatedDevice
+from ocean_optics.usb2000plus import NUM_PIXELS, OceanOpticsUSB2000Plus
+
+
+@pytest.fixture
+def device():
+    return OceanOpticsUSB2000Plus(SimulatedDevice(latency_factor=0, seed=0))
+
+
+def test_write_and_read(tmp_path, device):
+    path = tmp_path / "test.oorec"
+    frames = [device.get_raw_spectrum().copy() for _ in range(10)]
+    with RecordingWriter(path, device.config, chunk_size=4) as writer:
+        for idx, frame in enumerate(frames):
+            writer.append(frame, timestamp=idx / 10, integration_time=1_000)
+
+    recording = Recording(path)
+    assert len(recording) == 10
+    assert recording.frames.shape == (10, NUM_PIXELS)
+    np.testing.assert_array_equal(recording.frames, frames)
+    np.testing.assert_allclose(recording.timestamps, np.arange(10) / 10)
+    assert (recording.integration_times == 1_000).all()
+    assert recording.config == device.config
+    np.testing.assert_allclose(recording.wavelengths, device.wavelengths)
+    np.testing.assert_allclose(recording.spectra(3), device.calibrate(frames[3])[1])
+
+
+def test_empty_recording(tmp_path, device):
+    path = tmp_path / "test.oorec"
+    RecordingWriter(path, device.config).close()
+
+    recording = Recording(path)
+    assert len(recording) == 0
+    assert recording.frames.shape == (0, NUM_PIXELS)
+
+
+def test_invalid_file(tmp_path):
+    path = tmp_path / "test.csv"
+    path.write_text("Wavelength (nm),Intensity\n")
+    with pytest.raises(ValueError):
+        Recording(path)
+
+
+@pytest.mark.parametrize("size", [10, 20])
+def test_truncated_header(tmp_path, device, size):
+    path = tmp_path / "test.oorec"
+    RecordingWriter(path, device.config).close()
+    path.write_bytes(path.read_bytes()[:size])
+
+    with pytest.raises(ValueError):
+        Recording(path)
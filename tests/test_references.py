@@ -0,0 +1,43 @@
+import numpy as np
+
+from ocean_optics.references import ReferenceStore
+
+
+def test_least_recently_used_spectra_are_evicted():
+    store = ReferenceStore(maxsize=2)
+    store.set_dark(1000, np.zeros(4))
+    store.set_dark(2000, np.ones(4))
+    store.get_dark(1000)
+    store.set_dark(3000, np.full(4, 2.0))
+
+    assert store.get_dark(2000) is None
+    np.testing.assert_array_equal(store.get_dark(1000), np.zeros(4))
+    np.testing.assert_array_equal(store.get_dark(3000), np.full(4, 2.0))
+
+
+def test_darks_and_references_are_separate():
+    store = ReferenceStore()
+    store.set_dark(1000, np.zeros(4))
+
+    assert store.get_reference(1000) is None
+
+
+def test_spectra_are_persisted(tmp_path):
+    path = tmp_path / "references.npz"
+    store = ReferenceStore(path=path)
+    store.set_dark(1000, np.arange(4))
+    store.set_reference(1000, np.arange(4) + 10)
+
+    store = ReferenceStore(path=path)
+
+    np.testing.assert_array_equal(store.get_dark(1000), np.arange(4))
+    np.testing.assert_array_equal(store.get_reference(1000), np.arange(4) + 10)
+
+
+def test_unreadable_file_is_ignored(tmp_path):
+    path = tmp_path / "references.npz"
+    path.write_text("garbage")
+
+    store = ReferenceStore(path=path)
+
+    assert store.get_dark(1000) is None
@@ -0,0 +1,99 @@
+import time
+
+import numpy as np
+import pytest
+
+from ocean_optics.export import write_spectra, write_time_series
+from ocean_optics.recording import RecordingWriter
+from ocean_optics.replay import ReplayDevice
+from ocean_optics.simulation import SimulatedDevice
+from ocean_optics.spectroscopy import SpectroscopyExperiment
+from ocean_optics.usb2000plus import NUM_DARK_PIXELS, OceanOpticsUSB2000Plus
+
+
+@pytest.fixture
+def device():
+    return OceanOpticsUSB2000Plus(
+        SimulatedDevice(latency_factor=0, seed=0), use_cache=False
+    )
+
+
+def test_replay_recording(tmp_path, device):
+    path = tmp_path / "test.oorec"
+    frames = [device.get_raw_spectrum().copy() for _ in range(3)]
+    with RecordingWriter(path, device.config) as writer:
+        for idx, frame in enumerate(frames):
+            writer.append(frame, timestamp=idx / 100, integration_time=10_000)
+
+    replay = OceanOpticsUSB2000Plus(
+        ReplayDevice.from_file(path, speed=None), use_cache=False
+    )
+
+    assert replay.config == device.config
+    # replay starts over after the last frame
+    for idx in range(4):
+        np.testing.assert_array_equal(replay.get_raw_spectrum(), frames[idx % 3])
+
+
+def test_replay_after_integration_time_change():
+    frames = np.repeat(np.arange(5, dtype=np.uint16)[:, np.newaxis], 2048, axis=1)
+    replay = OceanOpticsUSB2000Plus(ReplayDevice(frames, speed=None), use_cache=False)
+
+    assert replay.get_raw_spectrum()[0] == 0
+    replay.set_integration_time(10_000)
+    # the stale spectra discarded by the driver don't skip recorded frames
+    assert [replay.get_raw_spectrum()[0] for _ in range(5)] == [1, 2, 3, 4, 0]
+
+
+def test_replay_csv(tmp_path, device):
+    path = tmp_path / "spectra.tsv"
+    wavelengths = device.wavelengths
+    spectra = np.array([device.get_spectrum()[1] for _ in range(2)])
+    write_time_series(path, wavelengths, spectra, np.array([0.0, 0.05]))
+
+    replay = OceanOpticsUSB2000Plus(ReplayDevice.from_file(path), use_cache=False)
+
+    np.testing.assert_allclose(replay.wavelengths, wavelengths, atol=1e-6)
+    t0 = time.monotonic()
+    for idx in range(2):
+        # intensities are rounded to whole counts
+        np.testing.assert_allclose(replay.get_spectrum()[1], spectra[idx], atol=0.5)
+    # the frames are replayed at the recorded interval
+    assert time.monotonic() - t0 == pytest.approx(0.1, abs=0.04)
+
+
+def test_replay_speed(tmp_path, device):
+    path = tmp_path / "spectrum.csv"
+    wavelengths, intensities = device.get_spectrum()
+    write_spectra(
+        path,
+        wavelengths,
+        {"Intensity": intensities, "Standard error": np.ones_like(intensities)},
+    )
+    replay = ReplayDevice.from_csv(path, speed=10)
+    experiment = SpectroscopyExperiment(
+        OceanOpticsUSB2000Plus(replay, use_cache=False), use_cache=False
+    )
+    experiment.set_integration_time(100_000)
+
+    t0 = time.monotonic()
+    for _, spectrum in experiment.integrate_spectrum(5):
+        pass
+
+    # without timestamps, the integration time is used as the interval
+    assert time.monotonic() - t0 == pytest.approx(0.05, abs=0.04)
+    assert len(replay.frames) == 1
+    # the integrated spectrum is the sum of the replayed spectra
+    np.testing.assert_allclose(spectrum, 5 * intensities, atol=2.5)
+    assert (replay.frames[0, :NUM_DARK_PIXELS] == np.rint(intensities.min())).all()
+
+
+def test_replay_invalid_csv(tmp_path, device):
+    path = tmp_path / "spectrum.csv"
+    wavelengths, intensities = device.get_spectrum()
+    write_spectra(path, wavelengths[:100], {"Intensity": intensities[:100]})
+
+    with pytest.raises(ValueError, match="limited wavelengths"):
+        ReplayDevice.from_file(path)
+    with pytest.raises(ValueError):
+        ReplayDevice(np.zeros((2, 10), dtype=np.uint16))
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from ocean_optics import smoothing
+
+
+def test_savitzky_golay():
+    smoother = smoothing.savitzky_golay(5, 2)
+    # the classic coefficients
+    np.testing.assert_allclose(smoother.kernel * 35, [-3, 12, 17, 12, -3])
+
+    # polynomials up to the order of the filter are preserved, also at the ends
+    x = np.arange(50.0)
+    intensities = 1 + 2 * x - 0.1 * x**2
+    np.testing.assert_allclose(
+        smoothing.savitzky_golay(7, 2).apply(intensities), intensities
+    )
+
+
+def test_boxcar():
+    boxcar = smoothing.Boxcar(2, 10)
+    intensities = np.arange(10.0)
+
+    # the average of the available pixels near the ends
+    expected = [1, 1.5, 2, 3, 4, 5, 6, 7, 7.5, 8]
+    np.testing.assert_allclose(boxcar.apply(intensities), expected)
+    boxcar.apply(intensities, out=intensities)
+    np.testing.assert_allclose(intensities, expected)
+
+
+def test_gaussian():
+    smoother = smoothing.gaussian(1.5)
+    intensities = np.zeros(41)
+    intensities[20] = 1.0
+
+    smoothed = smoother.apply(intensities)
+
+    assert smoother.window == 13
+    assert smoothed.sum() == pytest.approx(1.0)
+    pixels = np.arange(41) - 20
+    assert np.sqrt((smoothed * pixels**2).sum()) == pytest.approx(1.5, rel=1e-3)
+    # a constant spectrum is unchanged, including the ends
+    np.testing.assert_allclose(smoother.apply(np.full(41, 3.0)), 3.0)
+
+
+def test_out():
+    smoother = smoothing.savitzky_golay(11, 3)
+    intensities = np.random.default_rng(0).normal(size=100)
+    expected = smoother.apply(intensities)
+    out = np.empty(100)
+
+    assert smoother.apply(intensities, out=out) is out
+    np.testing.assert_array_equal(out, expected)
+    # smoothing in place
+    smoother.apply(intensities, out=intensities)
+    np.testing.assert_array_equal(intensities, expected)
+
+
+def test_filters_are_cached():
+    assert smoothing.savitzky_golay(11, 3) is smoothing.savitzky_golay(11, 3)
+    assert smoothing.gaussian(2.0) is smoothing.gaussian(2.0)
+    with pytest.raises(ValueError):
+        smoothing.savitzky_golay(11, 3).kernel[0] = 1.0
+
+
+@pytest.mark.parametrize(
+    "factory, args",
+    [
+        (smoothing.savitzky_golay, (4, 2)),
+        (smoothing.savitzky_golay, (5, 5)),
+        (smoothing.Boxcar, (0, 10)),
+        (smoothing.Boxcar, (10, 10)),
+        (smoothing.gaussian, (0.0,)),
+    ],
+)
+def test_invalid_parameters(factory, args):
+    with pytest.raises(ValueError):
+        factory(*args)
+
+
+def test_short_spectrum():
+    with pytest.raises(ValueError):
+        smoothing.savitzky_golay(5).apply(np.zeros(4))
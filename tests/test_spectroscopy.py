@@ -0,0 +1,143 @@
+import time
+
+import numpy as np
+import pytest
+
+from ocean_optics.simulation import EmissionLine, SimulatedDevice
+from ocean_optics.spectroscopy import (
+    MeasurementMode,
+    ReferenceNotAvailableError,
+    SpectroscopyExperiment,
+    get_spectra,
+)
+from ocean_optics.usb2000plus import OceanOpticsUSB2000Plus
+
+
+@pytest.fixture
+def experiment():
+    device = OceanOpticsUSB2000Plus(SimulatedDevice(latency_factor=0, seed=0))
+    return SpectroscopyExperiment(device)
+
+
+def test_integrate_spectrum(experiment):
+    results = [
+        intensities.copy()
+        for _, intensities in experiment.integrate_spectrum(5, track_variance=True)
+    ]
+
+    assert len(results) == 5
+    assert experiment.accumulator.count == 5
+    np.testing.assert_allclose(results[-1], 5 * experiment.accumulator.mean)
+    assert (experiment.accumulator.standard_error > 0).all()
+
+
+def test_stop_integration(experiment):
+    for idx, _ in enumerate(experiment.integrate_spectrum(10)):
+        if idx == 2:
+            experiment.stopped = True
+
+    assert experiment.accumulator.count == 3
+
+
+def test_dark_subtracted_spectrum(experiment):
+    experiment.device.device.lines = []
+    experiment.capture_dark(count=20)
+    experiment.set_measurement_mode(MeasurementMode.DARK_SUBTRACTED)
+
+    _, intensities = experiment.get_spectrum()
+
+    assert abs(intensities.mean()) < 5
+
+
+def test_transmittance_and_absorbance(experiment):
+    simulation = experiment.device.device
+    simulation.lines = [EmissionLine(546.1, 200_000, width=5.0)]
+    experiment.capture_reference(count=20)
+    simulation.lines = []
+    experiment.capture_dark(count=20)
+    simulation.lines = [EmissionLine(546.1, 100_000, width=5.0)]
+    experiment.set_measurement_mode(MeasurementMode.TRANSMITTANCE)
+    _, transmittance = experiment.get_spectrum()
+    experiment.set_measurement_mode(MeasurementMode.ABSORBANCE)
+    wavelengths, absorbance = experiment.get_spectrum()
+
+    peak = np.argmin(abs(wavelengths - 546.1))
+    assert transmittance[peak] == pytest.approx(0.5, abs=0.05)
+    assert absorbance[peak] == pytest.approx(-np.log10(0.5), abs=0.05)
+
+
+def test_dark_is_selected_by_integration_time(experiment):
+    experiment.set_integration_time(10_000)
+    dark_short = experiment.capture_dark(count=2)
+    experiment.set_integration_time(20_000)
+    dark_long = experiment.capture_dark(count=2)
+    experiment.set_measurement_mode(MeasurementMode.DARK_SUBTRACTED)
+    intensities = np.full(len(dark_short), 1000.0)
+
+    experiment.set_integration_time(10_000)
+    np.testing.assert_allclose(
+        experiment.process_spectrum(intensities), 1000 - dark_short
+    )
+    experiment.set_integration_time(20_000)
+    np.testing.assert_allclose(
+        experiment.process_spectrum(intensities), 1000 - dark_long
+    )
+    experiment.set_integration_time(30_000)
+    with pytest.raises(ReferenceNotAvailableError):
+        experiment.process_spectrum(intensities)
+
+
+def test_references_are_persisted(experiment):
+    dark = experiment.capture_dark(count=2)
+
+    other = SpectroscopyExperiment(experiment.device)
+
+    np.testing.assert_array_equal(
+        other.references.get_dark(experiment.device.get_integration_time()), dark
+    )
+
+
+def test_get_spectra_concurrently():
+    experiments = [
+        SpectroscopyExperiment(
+            OceanOpticsUSB2000Plus(SimulatedDevice(serial_number=f"SIM{idx}"))
+        )
+        for idx in range(3)
+    ]
+    for experiment in experiments:
+        experiment.set_integration_time(50_000)
+
+    t0 = time.perf_counter()
+    spectra = get_spectra(experiments)
+    elapsed = time.perf_counter() - t0
+
+    assert len(spectra) == 3
+    # the devices measure at the same time
+    assert elapsed < 0.1
+
+
+def test_sweep_integration_time(experiment):
+    experiment.set_integration_time(30_000)
+
+    results = list(experiment.sweep_integration_time([40_000, 10_000, 20_000], 2))
+
+    assert [integration_time for integration_time, _, _ in results] == [
+        10_000,
+        20_000,
+        40_000,
+    ]
+    peaks = [intensities.max() for _, _, intensities in results]
+    assert peaks[0] < peaks[1] < peaks[2]
+    assert experiment.device.get_integration_time() == 30_000
+
+
+def test_auto_exposure_selects_references(experiment):
+    experiment.set_integration_time(10_000)
+    experiment.capture_dark()
+    experiment.set_measurement_mode(MeasurementMode.DARK_SUBTRACTED)
+
+    result = experiment.auto_exposure()
+
+    assert result.converged
+    with pytest.raises(ReferenceNotAvailableError):
+        experiment.get_spectrum()
@@ -0,0 +1,83 @@
+import asyncio
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from ocean_optics.simulation import SimulatedDevice
+from ocean_optics.streaming import SpectrumClient, SpectrumServer, parse_address
+from ocean_optics.usb2000plus import OceanOpticsUSB2000Plus
+
+
+@pytest.fixture
+def server():
+    device = OceanOpticsUSB2000Plus(SimulatedDevice(seed=0))
+    device.set_integration_time(5_000)
+    server = SpectrumServer(device)
+    loop = asyncio.new_event_loop()
+    started = loop.create_future()
+    task = loop.create_task(server.serve(port=0, started=started))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    while not started.done():
+        time.sleep(0.01)
+    port = started.result().sockets[0].getsockname()[1]
+    server.address = f"127.0.0.1:{port}"
+    yield server
+    loop.call_soon_threadsafe(task.cancel)
+    while not task.done():
+        time.sleep(0.01)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_parse_address():
+    assert parse_address("localhost:1234") == ("localhost", 1234)
+    assert parse_address("localhost") == ("localhost", 7417)
+    assert str(parse_address("/tmp/spectra.sock")) == "/tmp/spectra.sock"
+
+
+def test_remote_device(server):
+    client = SpectrumClient(server.address)
+    try:
+        remote = OceanOpticsUSB2000Plus(client, use_cache=False)
+        wavelengths, intensities = remote.get_spectrum()
+
+        assert remote.config == server.device.config
+        np.testing.assert_array_equal(wavelengths, server.device.wavelengths)
+        np.testing.assert_array_equal(client.wavelengths[20:], wavelengths)
+        assert intensities.mean() > 0
+        remote.set_integration_time(7_000)
+        time.sleep(0.05)
+        assert server.device.get_integration_time() == 7_000
+    finally:
+        client.close()
+
+
+def test_slow_client_does_not_stall_others(server):
+    server.device.set_integration_time(1_000)
+    host, port = parse_address(server.address)
+    # a client with a small receive buffer which never reads
+    slow = socket.socket()
+    slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    slow.connect((host, port))
+    fast = OceanOpticsUSB2000Plus(
+        SpectrumClient(server.address, control=False), use_cache=False
+    )
+    try:
+        t0 = time.monotonic()
+        while server.dropped_frames == 0 and time.monotonic() - t0 < 5:
+            fast.get_raw_spectrum()
+        assert server.dropped_frames > 0
+        assert server.num_clients == 2
+        # the fast client keeps receiving fresh frames
+        t0 = time.monotonic()
+        for _ in range(20):
+            fast.get_raw_spectrum()
+        assert time.monotonic() - t0 < 0.2
+    finally:
+        slow.close()
+        fast.device.close()
@@ -0,0 +1,135 @@
+import libusb_package
+import numpy as np
+import pytest
+import usb.core
+
+from ocean_optics.simulation import EmissionLine, SimulatedDevice
+from ocean_optics.usb2000plus import (
+    NUM_DARK_PIXELS,
+    NUM_PIXELS,
+    DeviceNotFoundError,
+    OceanOpticsUSB2000Plus,
+    TriggerMode,
+    list_devices,
+)
+
+
+@pytest.fixture
+def device():
+    return OceanOpticsUSB2000Plus(
+        SimulatedDevice(lines=[EmissionLine(546.1, 100_000)], latency_factor=0, seed=0)
+    )
+
+
+def test_configuration(device):
+    config = device.config
+    assert config.serial_number == "SIM00001"
+    assert config.wavelength_calibration_coefficients == pytest.approx(
+        [339.1, 0.3728, -1.58e-5, -1.93e-9]
+    )
+    assert config.polynomial_order_nonlinearity_calibration == 7
+    assert config.saturation_level == 62_500
+
+
+def test_raw_spectrum(device):
+    data = device.get_raw_spectrum()
+    assert data.shape == (NUM_PIXELS,)
+    assert data.dtype == np.uint16
+    assert not data.flags.writeable
+
+    out = np.zeros(NUM_PIXELS, dtype=np.uint16)
+    assert device.get_raw_spectrum(out=out) is out
+    assert out.any()
+
+
+def test_spectrum(device):
+    wavelengths, intensities = device.get_spectrum()
+    assert len(wavelengths) == len(intensities) == NUM_PIXELS - NUM_DARK_PIXELS
+    assert not wavelengths.flags.writeable
+    assert wavelengths[intensities.argmax()] == pytest.approx(546.1, abs=0.5)
+
+    out = np.empty(NUM_PIXELS - NUM_DARK_PIXELS)
+    _, intensities = device.get_spectrum(out=out)
+    assert intensities is out
+
+
+def test_integration_time(device):
+    device.set_integration_time(10_000)
+    _, short = device.get_spectrum()
+    device.set_integration_time(100_000)
+    _, long = device.get_spectrum()
+    assert np.ptp(long) > 5 * np.ptp(short)
+
+
+def test_stale_spectra_are_discarded(device):
+    device.set_integration_time(10_000)
+    short = device.get_raw_spectrum().max()
+    device.set_integration_time(100_000)
+    # the spectra still integrated at 10 ms are never returned
+    for _ in range(3):
+        assert device.get_raw_spectrum().max() > 3 * short
+
+
+def test_scans_to_average(device):
+    device.set_scans_to_average(16)
+    _, averaged = device.get_spectrum()
+    device.set_scans_to_average(1)
+    _, single = device.get_spectrum()
+    # noise in the dark part of the spectrum is reduced by averaging
+    assert np.std(averaged[:200]) < np.std(single[:200]) / 2
+
+
+def test_boxcar_width(device):
+    device.set_boxcar_width(0)
+    wavelengths = device.wavelengths
+    data = np.random.default_rng(0).integers(0, 60_000, NUM_PIXELS).astype(np.uint16)
+    _, raw = device.calibrate(data)
+    device.set_boxcar_width(3)
+    _, smoothed = device.calibrate(data)
+
+    assert len(smoothed) == len(wavelengths)
+    assert smoothed[10] == pytest.approx(raw[7:14].mean())
+    assert smoothed[0] == pytest.approx(raw[:4].mean())
+    assert smoothed[-1] == pytest.approx(raw[-4:].mean())
+
+
+def test_external_trigger():
+    simulated = SimulatedDevice(latency_factor=0)
+    device = OceanOpticsUSB2000Plus(simulated)
+    device.set_trigger_mode(TriggerMode.EXTERNAL_EDGE)
+    assert device.get_acquisition_settings().trigger_mode == TriggerMode.EXTERNAL_EDGE
+
+    device.device.write(0x01, b"\x09")
+    with pytest.raises(usb.core.USBTimeoutError):
+        device.device.read(0x82, 512)
+    simulated.trigger()
+    assert len(device.device.read(0x82, 512)) == 512
+
+
+def test_configuration_cache(cache_dir):
+    simulated = SimulatedDevice(serial_number="SIM12345", latency_factor=0)
+    device = OceanOpticsUSB2000Plus(simulated)
+    assert (cache_dir / "configurations" / "SIM12345.json").exists()
+
+    # the cached configuration is used, even though the device changed
+    simulated.wavelength_calibration_coefficients = (400.0, 0.2, 0.0, 0.0)
+    cached = OceanOpticsUSB2000Plus(simulated)
+    assert cached.config == device.config
+
+    refreshed = OceanOpticsUSB2000Plus(simulated, refresh_cache=True)
+    assert refreshed.config.wavelength_calibration_coefficients[0] == 400.0
+    assert OceanOpticsUSB2000Plus(simulated).config == refreshed.config
+
+
+def test_open_device_by_serial_number(monkeypatch):
+    connected = [SimulatedDevice(serial_number=serial) for serial in ("B2", "A1")]
+    monkeypatch.setattr(
+        libusb_package, "find", lambda find_all=False, **kwargs: iter(connected)
+    )
+
+    assert list_devices() == ["A1", "B2"]
+    device = OceanOpticsUSB2000Plus(serial_number="B2")
+    assert device.device is connected[0]
+    assert device.config.serial_number == "B2"
+    with pytest.raises(DeviceNotFoundError):
+        OceanOpticsUSB2000Plus(serial_number="C3")